@@ -0,0 +1,99 @@
+from typing import List
+from day_model import DayModel
+from solve_stats import SolveStats
+import math
+import random
+import time
+
+
+def anneal(model: DayModel, rng: random.Random, time_budget: float | None = None, max_iterations: int | None = None, stats: SolveStats | None = None) -> int:
+    """
+    Improve a complete assignment with simulated annealing and leave the best assignment found in model.
+    Returns the spread (max - min worker load) of that assignment.
+
+    A move either transfers a ride to another worker that can check it, or swaps two rides
+    between two workers. Moves are scored by the change in the sum of squared worker loads,
+    which is smooth where the spread is not, and accepted with the Metropolis rule.
+    The temperature cools geometrically over the budget: time_budget seconds and/or
+    max_iterations moves, whichever runs out first, a budget of 0 leaves the assignment as it is.
+    With no budget, 50 moves per ride are made.
+    With stats, the accepted moves are added to stats.moves.
+    """
+    ride_time = model.ride_time
+    remaining = model.remaining
+    assignment = model.assignment
+    eligible = model.eligible
+    can_check = model.can_check
+    if max_iterations is None and time_budget is None:
+        max_iterations = 50 * len(ride_time)
+    if len(ride_time) == 0 or len(remaining) < 2 or max_iterations == 0 or time_budget == 0:
+        return model.spread() # Nothing to move or no budget to move anything.
+
+    rides_of: List[List[int]] = [[] for _ in remaining]
+    position: List[int] = [0] * len(ride_time) # Index of every ride in rides_of of its worker, for O(1) removal.
+    for ride_id, worker_id in enumerate(assignment):
+        position[ride_id] = len(rides_of[worker_id])
+        rides_of[worker_id].append(ride_id)
+
+    def move(ride_id: int, worker_id: int) -> None:
+        rides = rides_of[assignment[ride_id]]
+        last = rides.pop()
+        if last != ride_id:
+            rides[position[ride_id]] = last
+            position[last] = position[ride_id]
+        position[ride_id] = len(rides_of[worker_id])
+        rides_of[worker_id].append(ride_id)
+        model.transfer(ride_id, worker_id)
+
+    mean_ride_time = sum(ride_time) / len(ride_time)
+    start_temperature = 2 * mean_ride_time ** 2
+    end_temperature = 0.01
+    best_spread = model.spread()
+    best_assignment = assignment[:]
+    start = time.perf_counter()
+    iteration = 0
+    accepted = 0
+    progress = 0.0
+    while progress < 1:
+        if time_budget is not None and iteration % 256 == 0:
+            progress = (time.perf_counter() - start) / time_budget
+        if max_iterations is not None:
+            progress = max(progress, iteration / max_iterations)
+        temperature = start_temperature * (end_temperature / start_temperature) ** min(progress, 1)
+        iteration += 1
+
+        ride_id = rng.randrange(len(ride_time))
+        worker_id = assignment[ride_id]
+        other_worker = eligible[ride_id][rng.randrange(len(eligible[ride_id]))]
+        if other_worker == worker_id:
+            continue
+        # Load difference is the opposite of the remaining time difference.
+        gap = remaining[worker_id] - remaining[other_worker]
+        if rng.random() < 0.5 or not rides_of[other_worker]:
+            # Transfer: loads change by -d and +d, sum of squares changes by 2d(d - (La - Lb)).
+            d = ride_time[ride_id]
+            if d > remaining[other_worker]:
+                continue
+            other_ride = -1
+        else:
+            # Swap: the ride of other_worker must be checkable by worker_id and both must have the time.
+            other_ride = rides_of[other_worker][rng.randrange(len(rides_of[other_worker]))]
+            d = ride_time[ride_id] - ride_time[other_ride]
+            if not (can_check[other_ride] >> worker_id) & 1 or d > remaining[other_worker] or -d > remaining[worker_id]:
+                continue
+        delta = 2 * d * (d + gap)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            move(ride_id, other_worker)
+            accepted += 1
+            if other_ride != -1:
+                move(other_ride, worker_id)
+            if (spread := model.spread()) < best_spread:
+                best_spread = spread
+                best_assignment = assignment[:]
+
+    for ride_id, worker_id in enumerate(best_assignment):
+        if assignment[ride_id] != worker_id:
+            model.transfer(ride_id, worker_id)
+    if stats is not None:
+        stats.moves += accepted
+    return best_spread
@@ -0,0 +1,175 @@
+# Indexed archive of every generated schedule, with a command line tool to query it.
+# For example: python archive.py who wooden --day mon --since 2025-04-01
+#              python archive.py minutes bob --since 2026-10-01
+#              python archive.py history --since 2026-04-01 --output output/season.html
+
+from typing import Dict, List, Tuple, Iterator, get_args
+from datetime import date, datetime, timedelta
+from util import Day
+import argparse
+import sqlite3
+
+DAYS: List[Day] = list(get_args(Day))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS rides (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS schedules (id INTEGER PRIMARY KEY, week_start TEXT UNIQUE NOT NULL, created TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS checks (
+    schedule_id INTEGER NOT NULL REFERENCES schedules(id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    ride_id INTEGER NOT NULL REFERENCES rides(id),
+    worker_id INTEGER NOT NULL REFERENCES workers(id),
+    minutes INTEGER NOT NULL,
+    PRIMARY KEY (date, ride_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS checks_worker ON checks(worker_id, date);
+CREATE INDEX IF NOT EXISTS checks_ride ON checks(ride_id, day, date);
+CREATE INDEX IF NOT EXISTS checks_schedule ON checks(schedule_id);
+"""
+
+
+def week_start_of(day: date) -> date:
+    """
+    Monday of the week of day.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+class ScheduleArchive:
+    """
+    SQLite archive of schedules. Every ride check is one row (date, ride id, worker id, minutes),
+    with rides and workers interned to ids, indexed by worker, by ride and by date.
+    Only the latest schedule of a week is kept, storing a week again replaces it.
+    Dates are ISO strings, so date ranges compare as strings.
+    """
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def intern(self, table: str, names: List[str]) -> Dict[str, int]:
+        self.connection.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in names])
+        ids: Dict[str, int] = {}
+        for name, id in self.connection.execute(f"SELECT name, id FROM {table}"):
+            ids[name] = id
+        return ids
+
+    def store(self, week_start: date, multiple_day_assignments: Dict[Day, Dict[str, str]], all_rides_time: Dict[str, int]) -> None:
+        """
+        Store the schedule of the week starting on week_start (a Monday).
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM schedules WHERE week_start = ?", (week_start.isoformat(),))
+            schedule_id = self.connection.execute(
+                "INSERT INTO schedules (week_start, created) VALUES (?, ?)", (week_start.isoformat(), datetime.now().isoformat(timespec='seconds'))
+            ).lastrowid
+            ride_ids = self.intern("rides", list(all_rides_time))
+            worker_ids = self.intern("workers", sorted({worker for day_assignment in multiple_day_assignments.values() for worker in day_assignment.values()}))
+            rows = []
+            for day, day_assignment in multiple_day_assignments.items():
+                day_date = (week_start + timedelta(days=DAYS.index(day))).isoformat()
+                for ride, worker in day_assignment.items():
+                    rows.append((schedule_id, day_date, day, ride_ids[ride], worker_ids[worker], all_rides_time[ride]))
+            self.connection.executemany("INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def who_checked(self, ride: str, day: Day | None = None, since: date | None = None, until: date | None = None) -> List[Tuple[str, str]]:
+        """
+        (date, worker) of every check of ride, optionally only on one day of the week, since and until are inclusive.
+        """
+        query = "SELECT checks.date, workers.name FROM checks JOIN rides ON rides.id = checks.ride_id JOIN workers ON workers.id = checks.worker_id WHERE rides.name = ?"
+        parameters: List[str] = [ride]
+        if day is not None:
+            query += " AND checks.day = ?"
+            parameters.append(day)
+        query, parameters = with_date_range(query, parameters, since, until)
+        return list(self.connection.execute(query + " ORDER BY checks.date", parameters))
+
+    def worker_checks(self, worker: str, since: date | None = None, until: date | None = None) -> List[Tuple[str, str, int]]:
+        """
+        (date, ride, minutes) of every check by worker, since and until are inclusive.
+        """
+        query = "SELECT checks.date, rides.name, checks.minutes FROM checks JOIN rides ON rides.id = checks.ride_id JOIN workers ON workers.id = checks.worker_id WHERE workers.name = ?"
+        query, parameters = with_date_range(query, [worker], since, until)
+        return list(self.connection.execute(query + " ORDER BY checks.date", parameters))
+
+    def worker_minutes(self, worker: str, since: date | None = None, until: date | None = None) -> int:
+        """
+        Total ride check minutes of worker, since and until are inclusive.
+        """
+        query = "SELECT COALESCE(SUM(checks.minutes), 0) FROM checks JOIN workers ON workers.id = checks.worker_id WHERE workers.name = ?"
+        query, parameters = with_date_range(query, [worker], since, until)
+        return self.connection.execute(query, parameters).fetchone()[0]
+
+    def week_rows(self, since: date | None = None, until: date | None = None) -> Iterator[Tuple[str, str, Day, str]]:
+        """
+        (week_start, ride, day, worker) of every check, ordered by week, ride and date, since and until are inclusive.
+        Rows are read from the database as they are iterated.
+        """
+        query = (
+            "SELECT schedules.week_start, rides.name, checks.day, workers.name FROM checks JOIN schedules ON schedules.id = checks.schedule_id "
+            "JOIN rides ON rides.id = checks.ride_id JOIN workers ON workers.id = checks.worker_id WHERE 1"
+        )
+        query, parameters = with_date_range(query, [], since, until)
+        return iter(self.connection.execute(query + " ORDER BY schedules.week_start, checks.ride_id, checks.date", parameters))
+
+    def worker_totals(self, since: date | None = None, until: date | None = None) -> List[Tuple[str, int, int]]:
+        """
+        (worker, checks, minutes) of every worker with checks, most minutes first, since and until are inclusive.
+        """
+        query = "SELECT workers.name, COUNT(*), SUM(checks.minutes) FROM checks JOIN workers ON workers.id = checks.worker_id WHERE 1"
+        query, parameters = with_date_range(query, [], since, until)
+        return list(self.connection.execute(query + " GROUP BY checks.worker_id ORDER BY SUM(checks.minutes) DESC, workers.name", parameters))
+
+
+def with_date_range(query: str, parameters: List[str], since: date | None, until: date | None) -> Tuple[str, List[str]]:
+    if since is not None:
+        query += " AND checks.date >= ?"
+        parameters = parameters + [since.isoformat()]
+    if until is not None:
+        query += " AND checks.date <= ?"
+        parameters = parameters + [until.isoformat()]
+    return query, parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the archive of past schedules.")
+    parser.add_argument("--db", default="output/archive.sqlite3", help="Archive file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    who = commands.add_parser("who", help="Who checked a ride.")
+    who.add_argument("ride")
+    who.add_argument("--day", choices=DAYS, help="Only this day of the week.")
+    checks = commands.add_parser("checks", help="Rides checked by a worker.")
+    checks.add_argument("worker")
+    minutes = commands.add_parser("minutes", help="Total ride check minutes of a worker.")
+    minutes.add_argument("worker")
+    history = commands.add_parser("history", help="HTML page of every week, with the totals of every worker.")
+    history.add_argument("--output", default="output/history.html", help="HTML file to write.")
+    for command in (who, checks, minutes, history):
+        command.add_argument("--since", type=date.fromisoformat, help="First date, YYYY-MM-DD.")
+        command.add_argument("--until", type=date.fromisoformat, help="Last date, YYYY-MM-DD.")
+    args = parser.parse_args()
+
+    archive = ScheduleArchive(args.db)
+    if args.command == "who":
+        for check_date, worker in archive.who_checked(args.ride, args.day, args.since, args.until):
+            print(check_date, worker)
+    elif args.command == "checks":
+        for check_date, ride, ride_minutes in archive.worker_checks(args.worker, args.since, args.until):
+            print(check_date, ride, ride_minutes)
+    elif args.command == "minutes":
+        print(archive.worker_minutes(args.worker, args.since, args.until))
+    else:
+        from make_html_table import make_history_html # Only this command renders HTML.
+        title = f"Ridechecks {args.since or 'start'} to {args.until or 'now'}"
+        make_history_html(archive.week_rows(args.since, args.until), archive.worker_totals(args.since, args.until), args.output, title)
+        print(f"Wrote {args.output}.")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
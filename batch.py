@@ -0,0 +1,201 @@
+# Generate schedules for many parks or candidate weeks at once, writing one JSON line per instance as soon as it is solved.
+# For example: python batch.py --manifest parks.txt --output results.jsonl
+#   parks.txt lists input folders (like 'input', with the three YAML files), one per line, relative to parks.txt.
+# Or: python batch.py --instances weeks.jsonl
+#   every line of weeks.jsonl is {"id": ..., "rides_time": {...}, "workers_cannot_check": {...}, "days_info": {...}, "seed": ...}, id and seed are optional.
+#
+# Every result line is {"index": ..., "id": ..., "status": "ok", "schedule": {day: {ride: worker...}...}, "spread": ..., "seconds": ...}
+# or {"index": ..., "id": ..., "status": "error", "error": ...}, in the order the instances finish.
+# Schedules are not written to output folders and past weeks are not taken into account.
+
+from typing import Dict, List, Tuple, Set, Any, Iterator, TextIO
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from day_assignment import NoDayAssignment
+from multiple_day_assignments import generate_multiple_day_assignments
+from pipeline import read_input, validate_rides_time, validate_workers_cannot_check, validate_days_info, workers_can_check_from, Roster, InputError
+from solve_stats import SolveStats
+from util import derive_seed
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import yaml
+
+
+@dataclass
+class Instance:
+    index: int
+    id: str
+    data: Tuple[Any, Any, Any] | None # all_rides_time, all_workers_cannot_check, days_info, not validated yet.
+    seed: int | None = None
+    error: str | None = None # Why the instance could not be read.
+
+
+def manifest_instances(manifest_path: str) -> Iterator[Instance]:
+    """
+    The input folders listed in the manifest, read one at a time. Blank lines and lines starting with # are skipped.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r") as f:
+        index = 0
+        for line in f:
+            directory = line.strip()
+            if not directory or directory.startswith("#"):
+                continue
+            try:
+                yield Instance(index, directory, read_input(os.path.join(base, directory)))
+            except InputError as e:
+                yield Instance(index, directory, None, error=str(e))
+            except yaml.YAMLError as e:
+                yield Instance(index, directory, None, error=f"Could not read YAML: {e}")
+            index += 1
+
+
+def jsonl_instances(instances_path: str) -> Iterator[Instance]:
+    """
+    The instances of a JSONL file, read one line at a time. The id of an instance without one is its line number.
+    """
+    with open(instances_path, "r") as f:
+        index = 0
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            instance_id = str(line_number)
+            try:
+                record = json.loads(line)
+                if type(record) != dict:
+                    raise InputError("An instance is a JSON object")
+                instance_id = str(record.get("id", instance_id))
+                if record.get("seed") is not None and type(record["seed"]) != int:
+                    raise InputError("The seed of an instance must be a number")
+                data = tuple(record.get(key) for key in ["rides_time", "workers_cannot_check", "days_info"])
+                yield Instance(index, instance_id, data, record.get("seed")) # type: ignore
+            except (InputError, json.JSONDecodeError) as e:
+                yield Instance(index, instance_id, None, error=str(e))
+            index += 1
+
+
+class SharedRosters:
+    """
+    Validated rides and workers of the last size rosters, so that instances of the same park are only
+    validated and get their all_workers_can_check built once. Keeping only a few keeps memory flat.
+    """
+    def __init__(self, size: int = 32):
+        self.size = size
+        self.rosters: OrderedDict[str, Tuple[Dict[str, int], Dict[str, Set[str]]]] = OrderedDict()
+
+    def roster(self, all_rides_time: Any, all_workers_cannot_check: Any, days_info: Any) -> Roster:
+        """
+        Raises InputError if the data does not follow format.
+        """
+        key = repr((all_rides_time, all_workers_cannot_check))
+        if key in self.rosters:
+            self.rosters.move_to_end(key)
+        else:
+            validate_rides_time(all_rides_time)
+            validate_workers_cannot_check(all_workers_cannot_check, all_rides_time)
+            self.rosters[key] = all_rides_time, workers_can_check_from(all_workers_cannot_check, all_rides_time)
+            if len(self.rosters) > self.size:
+                self.rosters.popitem(last=False)
+        all_rides_time, all_workers_can_check = self.rosters[key]
+        validate_days_info(days_info, all_rides_time, all_workers_can_check)
+        return Roster(all_rides_time, all_workers_can_check, days_info)
+
+
+def solve_instance(roster: Roster, seed: int | None, week_balance: bool, solver_options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Schedule of one instance, with the spread of the weekly totals and the time it took.
+    Module level so that it can be sent to a worker process, the days are solved one after the other.
+    """
+    stats = SolveStats()
+    schedule = generate_multiple_day_assignments(
+        roster.days_info, roster.all_rides_time, roster.all_workers_can_check, processes=1, seed=seed,
+        balance_weekly_totals=week_balance, stats=stats, **solver_options
+    )
+    return {'schedule': schedule, 'spread': stats.spread, 'seconds': stats.seconds}
+
+
+def run_batch(
+        instances: Iterator[Instance],
+        out: TextIO,
+        processes: int | None = None,
+        seed: int | None = None,
+        week_balance: bool = True,
+        **solver_options: Any) -> Tuple[int, int]:
+    """
+    Solve instances on a pool of processes (None: one per core) and write a JSON line to out for every
+    instance as soon as it is done. Only a couple of instances per process are read ahead, so memory
+    does not grow with the number of instances. An instance without its own seed gets one derived from seed and its id.
+    Returns the number of instances solved and the number that failed.
+    """
+    rosters = SharedRosters()
+    pending: Dict[Future, Instance] = {}
+    max_pending = 2 * (processes or os.cpu_count() or 1)
+    counts = {'ok': 0, 'error': 0}
+
+    def write(instance: Instance, result: Dict[str, Any]) -> None:
+        counts[result['status']] += 1
+        out.write(json.dumps({'index': instance.index, 'id': instance.id, **result}) + "\n")
+        out.flush()
+
+    def write_done() -> None:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            instance = pending.pop(future)
+            try:
+                write(instance, {'status': 'ok', **future.result()})
+            except NoDayAssignment as e:
+                write(instance, {'status': 'error', 'error': str(e)})
+            except Exception as e: # Whatever goes wrong with one instance, the others are still solved.
+                write(instance, {'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+
+    with ProcessPoolExecutor(processes) as executor:
+        for instance in instances:
+            if instance.data is None:
+                write(instance, {'status': 'error', 'error': instance.error})
+                continue
+            try:
+                roster = rosters.roster(*instance.data)
+            except InputError as e:
+                write(instance, {'status': 'error', 'error': str(e)})
+                continue
+            except Exception as e: # Data that slips past validation fails this instance only.
+                write(instance, {'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+                continue
+            instance_seed = instance.seed if instance.seed is not None else derive_seed(seed, instance.id)
+            instance.data = None # The worker process has its own copy.
+            pending[executor.submit(solve_instance, roster, instance_seed, week_balance, solver_options)] = instance
+            if len(pending) >= max_pending:
+                write_done()
+        while pending:
+            write_done()
+    return counts['ok'], counts['error']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate schedules for many input folders or instances, one JSON line per instance.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="Text file listing input folders, one per line.")
+    source.add_argument("--instances", help="JSONL file with one instance per line.")
+    parser.add_argument("--output", default=None, help="JSONL file to write the results to (default: print them).")
+    parser.add_argument("--processes", type=int, default=None, help="Number of instances solved at the same time (default: one per core).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible schedules.")
+    parser.add_argument("--no-week-balance", action="store_true", help="Only balance every day on its own, not the weekly totals of the workers.")
+    args = parser.parse_args()
+
+    instances = manifest_instances(args.manifest) if args.manifest else jsonl_instances(args.instances)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        solved, failed = run_batch(instances, out, args.processes, args.seed, not args.no_week_balance)
+    finally:
+        if args.output:
+            out.close()
+    print(f"{solved} solved, {failed} failed.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
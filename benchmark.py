@@ -0,0 +1,175 @@
+# Scaling benchmark of the solver on seeded synthetic instances, written as JSON so that versions can be compared.
+# For example: python benchmark.py --output before.json, then after a change: python benchmark.py --output after.json --compare before.json
+
+from typing import Dict, List, Tuple, Set, Any, get_args
+from day_assignment import generate_day_assignment, load_spread, NoDayAssignment
+from multiple_day_assignments import generate_multiple_day_assignments
+from week_balance import weekly_loads
+from util import without_keys, Day, DayInfo
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+DAYS: List[Day] = list(get_args(Day))
+
+# Grid of instance sizes, every combination is run.
+FULL_GRID: Dict[str, List[Any]] = {
+    'rides': [50, 200, 1000],
+    'workers': [10, 30],
+    'density': [0.1, 0.4],
+    'tightness': [0.7, 0.9],
+}
+QUICK_GRID: Dict[str, List[Any]] = {
+    'rides': [50, 200],
+    'workers': [10],
+    'density': [0.2],
+    'tightness': [0.8],
+}
+
+
+def generate_instance(rides: int, workers: int, density: float, tightness: float, seed: int) -> Tuple[int, Dict[str, int], Dict[str, Set[str]]]:
+    """
+    A random day like the ones in the input folder, returns worker_time, rides_time and workers_can_check.
+
+    Rides take 5 to 30 minutes, every worker cannot check a share `density` of the rides
+    (as listed in workers_cannot_check.yaml), and every ride can be checked by at least one worker.
+    The worker time is set so that the rides fill a share `tightness` of the total worker time,
+    and is at least the longest ride.
+    """
+    rng = random.Random(seed)
+    rides_time = {f"ride{i}": rng.randint(5, 30) for i in range(rides)}
+    workers_can_check = {f"worker{j}": {ride for ride in rides_time if rng.random() >= density} for j in range(workers)}
+    for ride in rides_time:
+        if not any(ride in can_check for can_check in workers_can_check.values()):
+            workers_can_check[rng.choice(list(workers_can_check))].add(ride)
+    worker_time = max(-(-sum(rides_time.values()) * 100 // int(workers * tightness * 100)), max(rides_time.values()))
+    return worker_time, rides_time, workers_can_check
+
+
+def generate_week_instance(rides: int, workers: int, density: float, tightness: float, seed: int) -> Tuple[Dict[Day, DayInfo], Dict[str, int], Dict[str, Set[str]]]:
+    """
+    A random week from generate_instance, returns days_info, all_rides_time and all_workers_can_check.
+    One day is closed, on the others about 10% of the workers are absent and 5% of the rides are closed,
+    the time of a day is scaled to the workers present so that every day has about the same tightness.
+    """
+    rng = random.Random(seed)
+    worker_time, all_rides_time, all_workers_can_check = generate_instance(rides, workers, density, tightness, seed)
+    closed_day = rng.choice(DAYS)
+    days_info: Dict[Day, DayInfo] = {}
+    for day in DAYS:
+        if day == closed_day:
+            days_info[day] = {'time': 0, 'uaworkers': [], 'uarides': []}
+            continue
+        uaworkers = [worker for worker in all_workers_can_check if rng.random() < 0.1][:workers - 1]
+        uarides = [ride for ride in all_rides_time if rng.random() < 0.05]
+        day_time = worker_time * workers // (workers - len(uaworkers))
+        days_info[day] = {'time': day_time, 'uaworkers': uaworkers, 'uarides': uarides}
+    return days_info, all_rides_time, all_workers_can_check
+
+
+def run_benchmark(grid: Dict[str, List[Any]], repeats: int = 3, seed: int = 0, **solver_options: Any) -> List[Dict[str, Any]]:
+    """
+    Time generate_day_assignment and generate_multiple_day_assignments (one process, week balancing on)
+    on `repeats` instances of every combination of grid. One record per solve:
+    kind ('day' or 'week'), the instance parameters, seconds, spread (load spread of the day, or of the
+    least balanced day of the week, week balancing trades it for the weekly totals), weekly_spread for weeks (spread of the weekly totals, workers absent
+    on some days are bound to have less) and status ('ok' or 'infeasible').
+    """
+    records: List[Dict[str, Any]] = []
+    for rides, workers, density, tightness in itertools.product(grid['rides'], grid['workers'], grid['density'], grid['tightness']):
+        for repeat in range(repeats):
+            instance_seed = seed * 1000 + repeat
+            parameters = {'rides': rides, 'workers': workers, 'density': density, 'tightness': tightness, 'seed': instance_seed}
+
+            worker_time, rides_time, workers_can_check = generate_instance(rides, workers, density, tightness, instance_seed)
+            start = time.perf_counter()
+            try:
+                assignment = generate_day_assignment(worker_time, rides_time, workers_can_check, seed=instance_seed, **solver_options)
+                spread, status = load_spread(assignment, rides_time, workers_can_check), 'ok'
+            except NoDayAssignment:
+                spread, status = None, 'infeasible'
+            records.append({'kind': 'day', **parameters, 'seconds': time.perf_counter() - start, 'spread': spread, 'status': status})
+
+            days_info, all_rides_time, all_workers_can_check = generate_week_instance(rides, workers, density, tightness, instance_seed)
+            start = time.perf_counter()
+            try:
+                week = generate_multiple_day_assignments(days_info, all_rides_time, all_workers_can_check, seed=instance_seed, balance_weekly_totals=True, **solver_options)
+                seconds = time.perf_counter() - start
+                spread = max(load_spread(week[day], all_rides_time, without_keys(all_workers_can_check, days_info[day]['uaworkers'])) for day in week if week[day])
+                loads = weekly_loads(week, all_rides_time)
+                weekly_spread, status = max(loads.values()) - min(loads.get(worker, 0) for worker in all_workers_can_check), 'ok'
+            except NoDayAssignment:
+                seconds, spread, weekly_spread, status = time.perf_counter() - start, None, None, 'infeasible'
+            records.append({'kind': 'week', **parameters, 'seconds': seconds, 'spread': spread, 'weekly_spread': weekly_spread, 'status': status})
+    return records
+
+
+def record_key(record: Dict[str, Any]) -> Tuple:
+    return record['kind'], record['rides'], record['workers'], record['density'], record['tightness'], record['seed']
+
+
+def compare(old_records: List[Dict[str, Any]], new_records: List[Dict[str, Any]]) -> List[str]:
+    """
+    One line per instance in both runs: time ratio new/old and spread old -> new.
+    """
+    old = {record_key(record): record for record in old_records}
+    lines = []
+    for record in new_records:
+        previous = old.get(record_key(record))
+        if previous is None:
+            continue
+        ratio = record['seconds'] / previous['seconds'] if previous['seconds'] > 0 else float('inf')
+        lines.append(
+            f"{record['kind']:<4} rides={record['rides']:<5} workers={record['workers']:<3} density={record['density']:<4} "
+            f"tightness={record['tightness']:<4} seed={record['seed']:<5} time x{ratio:.2f}  spread {previous['spread']} -> {record['spread']}"
+        )
+    return lines
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver on seeded synthetic instances.")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file to write the results to.")
+    parser.add_argument("--quick", action="store_true", help="Only run a few small instances.")
+    parser.add_argument("--repeats", type=int, default=3, help="Instances per combination of sizes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the instances.")
+    parser.add_argument("--compare", default=None, help="Earlier results to compare with.")
+    parser.add_argument("--improve", choices=["hillclimb", "anneal", "vectorized"], default="hillclimb", help="How the solver improves a day (vectorized needs numpy).")
+    args = parser.parse_args()
+
+    grid = QUICK_GRID if args.quick else FULL_GRID
+    records = run_benchmark(grid, args.repeats, args.seed, improve=args.improve)
+    result = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'grid': grid,
+        'improve': args.improve,
+        'records': records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=1)
+    for record in records:
+        print(
+            f"{record['kind']:<4} rides={record['rides']:<5} workers={record['workers']:<3} density={record['density']:<4} "
+            f"tightness={record['tightness']:<4} {record['seconds']:8.3f}s  spread={record['spread']}  {record['status']}"
+        )
+    if args.compare:
+        with open(args.compare, "r") as f:
+            for line in compare(json.load(f)['records'], records):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
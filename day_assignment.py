@@ -1,91 +1,313 @@
-from typing import Dict, List, Tuple, Set, Iterable, Callable
+from typing import Dict, List, Tuple, Set, Iterable, Callable, Literal
+from day_model import DayModel
+from annealing import anneal
+from vectorized import vectorized_improve
+from solve_stats import SolveStats
 import random
+import bisect
+import time
 
 
 class NoDayAssignment(Exception):
     pass
 
 
-def generate_day_assignment(worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]]) -> Dict[str, str]:
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchRestart(Exception):
+    """
+    One attempt of the search reached its backtrack limit, see find_assignment.
+    """
+    pass
+
+
+SearchMode = Literal['plain', 'propagate']
+ImproveMode = Literal['hillclimb', 'anneal', 'vectorized']
+
+# Dead ends of the first attempt of the search, later attempts get a multiple of it (see luby).
+RESTART_BACKTRACKS = 64
+
+
+def ride_order(model: DayModel) -> List[int]:
+    """
+    Most-constrained-first ride order: fewest eligible workers, then longest ride time.
+    Ties keep the order of rides_time.
+    """
+    return sorted(range(len(model.rides)), key=lambda ride_id: (len(model.eligible[ride_id]), -model.ride_time[ride_id]))
+
+
+def generate_day_assignment(worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]], search: SearchMode = 'propagate', seed: int | None = None,
+        improve: ImproveMode = 'hillclimb', time_budget: float | None = None, max_iterations: int | None = None, stats: SolveStats | None = None,
+        search_time_limit: float | None = None) -> Dict[str, str]:
     """
     Find a complete assignment using dfs (backtracking), then improve the complete assignment using hillclimbing.
-    Returns a random locally optimal assignment {ride: worker...} and the remaining times of the workers {worker: time...}.
+    Returns a random locally optimal assignment {ride: worker...}.
+
+    improve='anneal' continues from the hillclimbing result with simulated annealing using ride
+    transfers and swaps between two workers, for time_budget seconds and/or max_iterations moves
+    (see annealing.anneal), and returns the assignment with the smallest load spread it found.
+    improve='vectorized' replaces hillclimbing with best-improvement transfers and swaps scored
+    with NumPy (see vectorized.vectorized_improve), which needs numpy to be installed.
+
+    Internally rides and workers are interned to integer ids (see DayModel) and the
+    search assigns and unassigns rides in place instead of copying dicts.
+
+    The same seed gives the same assignment, seed=None draws a fresh random one.
+    With stats, the counters and the time of every phase are added to it (see SolveStats).
+    Raises SearchTimeout if the dfs takes more than search_time_limit seconds, without a limit it always finishes.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter() if stats is not None else 0.0
+    deadline = time.perf_counter() + search_time_limit if search_time_limit is not None else None
+    model = DayModel(worker_time, rides_time, workers_can_check)
+    found = find_assignment(model, rng, search, deadline, stats=stats)
+    if stats is not None:
+        start = record_phase(stats, 'search', start)
+    if not found:
+        raise NoDayAssignment(f"No assignment exists for worker_time={worker_time}, ride_times={rides_time}, can_check={workers_can_check}")
+    if improve == 'vectorized':
+        vectorized_improve(model, stats=stats)
+        if stats is not None:
+            start = record_phase(stats, 'vectorized', start)
+    else:
+        hillclimb(model, rng, stats=stats)
+        if stats is not None:
+            start = record_phase(stats, 'hillclimb', start)
+    if improve == 'anneal':
+        anneal(model, rng, time_budget, max_iterations, stats=stats)
+        if stats is not None:
+            start = record_phase(stats, 'anneal', start)
+    if stats is not None:
+        stats.spread = model.spread()
+    return model.to_dict()
+
+
+def record_phase(stats: SolveStats, phase: str, start: float) -> float:
+    """
+    Add the time since start to phase, returns the start of the next phase.
+    """
+    now = time.perf_counter()
+    stats.add_phase(phase, now - start)
+    return now
+
+
+def luby(attempt: int) -> int:
+    """
+    The attempt-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8...
+    """
+    while True:
+        k = 1
+        while (1 << k) - 1 < attempt:
+            k += 1
+        if attempt == (1 << k) - 1:
+            return 1 << (k - 1)
+        attempt -= (1 << (k - 1)) - 1
+
+
+def find_assignment(model: DayModel, rng: random.Random, search: SearchMode = 'propagate', deadline: float | None = None, stats: SolveStats | None = None,
+        restart_backtracks: int | None = RESTART_BACKTRACKS) -> bool:
     """
-    def dfs(partial_assignment: Dict[str, str], partial_worker_times_remaining: Dict[str, int]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    Randomized dfs: assign the unassigned rides of model, keeping the rides that are already assigned.
+    Finds a random solution to CSP that is not even locally optimal.
+    Returns whether a complete assignment was found, in which case it is left in model,
+    otherwise model is left as it was.
+
+    On tight days an unlucky early choice can leave the dfs searching a huge subtree without solutions.
+    So the dfs starts over, with workers tried in a new random order, once an attempt reaches
+    restart_backtracks * luby(attempt) dead ends. The limits keep growing, so an attempt eventually
+    searches everything and proves that there is no assignment. restart_backtracks=None never restarts.
+
+    search='plain' takes rides in the order of rides_time without any lookahead.
+    search='propagate' takes rides most-constrained-first and prunes a branch as soon as
+    some unassigned ride has no eligible worker with enough time left (forward checking),
+    or the usable worker time left is less than the unassigned ride time (capacity bound).
+
+    Raises SearchTimeout, leaving model as it was, if time.perf_counter() passes deadline.
+    With stats, the dfs steps and dead ends are added to stats.nodes and stats.backtracks, and the restarts to stats.restarts.
+    """
+    attempt = 1
+    while True:
+        max_backtracks = restart_backtracks * luby(attempt) if restart_backtracks is not None else None
+        try:
+            return dfs(model, rng, search, deadline, stats, max_backtracks)
+        except SearchRestart:
+            attempt += 1
+            if stats is not None:
+                stats.restarts += 1
+
+
+def dfs(model: DayModel, rng: random.Random, search: SearchMode, deadline: float | None, stats: SolveStats | None, max_backtracks: int | None) -> bool:
+    """
+    One attempt of find_assignment, raises SearchRestart, leaving model as it was, after max_backtracks dead ends.
+    """
+    ride_time = model.ride_time
+    remaining = model.remaining
+    propagate = search == 'propagate'
+    order = [ride_id for ride_id in (ride_order(model) if propagate else range(len(model.rides))) if model.assignment[ride_id] == -1]
+    assigned = [worker_id != -1 for worker_id in model.assignment]
+    # unassigned_time[depth] and shortest_unassigned[depth]: total and shortest time of the rides order[depth:].
+    unassigned_time = [0] * (len(order) + 1)
+    shortest_unassigned = [max(ride_time, default=0) + 1] * (len(order) + 1)
+    for depth in reversed(range(len(order))):
+        unassigned_time[depth] = unassigned_time[depth + 1] + ride_time[order[depth]]
+        shortest_unassigned[depth] = min(shortest_unassigned[depth + 1], ride_time[order[depth]])
+
+    def has_capacity(depth: int) -> bool:
         """
-        partial_assignment: Dictionary of {ride: worker...} containing a subset of rides.
-        worker_times: How much time does every worker have remaining.
-        Randomized dfs: find a random solution to CSP that is not even locally optimal.
+        Capacity bound: workers with less time than the shortest unassigned ride cannot help,
+        the rest must have enough time between them for all unassigned rides.
         """
-        # Base case: 
-        if len(partial_assignment) == len(rides_time):
-            return partial_assignment, partial_worker_times_remaining
-        # Recursive case:
-        ride = next(ride for ride in rides_time if ride not in partial_assignment)
-        workers = list(workers_can_check.keys())
-        random.shuffle(workers)
-        for worker in workers: # Try to assign every worker to the ride in a random order.
-            if ride in workers_can_check[worker] and rides_time[ride] <= partial_worker_times_remaining[worker]:
-                # Recursive call, adding ride and worker to partial_assignment, worker_times reflect remaining time.
-                complete_assignment, complete_worker_times_remaining = dfs(
-                    partial_assignment | {ride: worker}, 
-                    partial_worker_times_remaining | {worker: partial_worker_times_remaining[worker] - rides_time[ride]}
-                )
-                if complete_assignment:
-                    return complete_assignment, complete_worker_times_remaining
-        # Could not find a complete assignment based on the partial_assignment and worker_times_remaining.
-        return {}, partial_worker_times_remaining
-    
-
-    complete_assignment, complete_worker_times_remaining = dfs({}, {worker: worker_time for worker in workers_can_check})
-    if complete_assignment == {}:
-        raise NoDayAssignment(f"No assignment exists for worker_time={worker_time}, ride_times={rides_time}, can_check={workers_can_check}")
+        shortest = shortest_unassigned[depth]
+        return sum(time_left for time_left in remaining if time_left >= shortest) >= unassigned_time[depth]
 
-    def hillclimb(complete_assignment: Dict[str, str], complete_worker_times_remaining: Dict[str, int]) -> bool:
+    def is_consistent(depth: int, worker_id: int) -> bool:
         """
-        Try to hillclimb (improve the assignment). Randomized to find different local optimums.
-        Return whether further hillclimbing is possible.
+        worker_id was just assigned order[depth - 1].
+        Forward checking: every unassigned ride the worker could check must still have an eligible worker with enough time.
+        """
+        for ride_id in model.checkable[worker_id]:
+            if not assigned[ride_id] and ride_time[ride_id] > remaining[worker_id]:
+                if not any(ride_time[ride_id] <= remaining[other] for other in model.eligible[ride_id]):
+                    return False
+        return has_capacity(depth)
+
+    def candidates(ride_id: int) -> List[int]:
         """
-        def try_transfer_ride(transferring_worker: str) -> Tuple[str, str] | None:
-            """
-            Transfer rides from transferring_worker to another if it results in a better 
-            balance of remaining time among the workers.
-
-            A: accepting_worker time remaining.
-            T: transferring_worker time remaining.
-            |(A - delta) - (T + delta)| < |A - T| <=> Should transfer.
-
-            Returns ride, accepting_worker if transfer occurs, otherwise returns None.
-            """
-            def should_transfer(accepting_worker_time_remaining: int, transferring_worker_time_remaining: int, ride_time: int) -> bool:
-                new_diff = abs(accepting_worker_time_remaining - transferring_worker_time_remaining - 2 * ride_time)
-                old_diff = abs(accepting_worker_time_remaining - transferring_worker_time_remaining)
-                return new_diff < old_diff and accepting_worker_time_remaining > transferring_worker_time_remaining      
-            transferring_worker_time_remaining = complete_worker_times_remaining[transferring_worker]
-            rides_to_transfer = [ride for ride in complete_assignment if complete_assignment[ride] == transferring_worker]
-            random.shuffle(rides_to_transfer)
-            for ride in rides_to_transfer:
-                ride_time = rides_time[ride]
-                accepting_workers = filter(lambda worker: worker != transferring_worker and ride in workers_can_check[worker], workers_can_check.keys())
-                for accepting_worker in accepting_workers:
-                    accepting_worker_time_remaining = complete_worker_times_remaining[accepting_worker]
-                    if should_transfer(accepting_worker_time_remaining, transferring_worker_time_remaining, ride_time):
-                        return ride, accepting_worker
-            return None
-        transferring_workers = list(workers_can_check.keys()) # All workers.
-        random.shuffle(transferring_workers)
-        for transferring_worker in transferring_workers:
-            # Choose random worker that will try to give one of its rides to a worker.
-            if (res := try_transfer_ride(transferring_worker)):
-                ride_transferred = res[0]
-                accepting_worker = res[1]
-                complete_assignment[ride_transferred] = accepting_worker
-                complete_worker_times_remaining[transferring_worker] += rides_time[ride_transferred]
-                complete_worker_times_remaining[accepting_worker] -= rides_time[ride_transferred]
-                return True
+        Workers to try for ride_id in a random order, reversed so that pop() returns the next one.
+        """
+        workers = model.eligible[ride_id][:]
+        rng.shuffle(workers)
+        if propagate:
+            workers.sort(key=lambda worker_id: remaining[worker_id])
+        workers.reverse()
+        return workers
+
+    if len(order) == 0:
+        return True
+    if propagate and not (
+        all(any(ride_time[ride_id] <= remaining[worker_id] for worker_id in model.eligible[ride_id]) for ride_id in order) and has_capacity(0)
+    ):
+        return False
+    # Iterative, so the number of rides is not limited by the recursion limit:
+    # stack[depth] holds the workers still to try for order[depth] and undo holds the
+    # rides assigned so far, one per depth, so that backtracking can unassign them.
+    stack: List[List[int]] = [candidates(order[0])]
+    undo: List[int] = []
+    steps = 0
+    backtracks = 0
+    try:
+        while stack:
+            steps += 1
+            if deadline is not None and steps % 1024 == 0 and time.perf_counter() > deadline:
+                for ride_id in undo:
+                    model.unassign(ride_id)
+                raise SearchTimeout()
+            depth = len(stack) - 1
+            ride_id = order[depth]
+            if len(undo) > depth:  # Coming back to this depth, undo the worker tried last.
+                assigned[undo.pop()] = False
+                model.unassign(ride_id)
+            workers = stack[-1]
+            while workers: # Try to assign every worker to the ride in a random order.
+                worker_id = workers.pop()
+                if ride_time[ride_id] <= remaining[worker_id]:
+                    model.assign(ride_id, worker_id)
+                    assigned[ride_id] = True
+                    undo.append(ride_id)
+                    if not propagate or is_consistent(depth + 1, worker_id):
+                        if depth + 1 == len(order):
+                            return True
+                        stack.append(candidates(order[depth + 1]))
+                        break
+                    assigned[undo.pop()] = False
+                    model.unassign(ride_id)
+            else:
+                # Could not find a complete assignment based on the partial assignment and the remaining times.
+                stack.pop()
+                backtracks += 1
+                if max_backtracks is not None and backtracks >= max_backtracks and stack:
+                    for ride_id in undo:
+                        model.unassign(ride_id)
+                    raise SearchRestart()
         return False
+    finally:
+        if stats is not None:
+            stats.nodes += steps
+            stats.backtracks += backtracks
+
+
+def load_spread(assignment: Dict[str, str], rides_time: Dict[str, int], workers: Iterable[str]) -> int:
+    """
+    Max - min worker load of an assignment {ride: worker...}, workers without rides have a load of 0.
+    """
+    loads = {worker: 0 for worker in workers}
+    for ride, worker in assignment.items():
+        loads[worker] += rides_time[ride]
+    return max(loads.values()) - min(loads.values()) if loads else 0
+
+
+def hillclimb(model: DayModel, rng: random.Random, movable: Set[int] | None = None, stats: SolveStats | None = None) -> int:
+    """
+    Improve a complete assignment by transferring rides until no transfer improves the
+    balance of remaining time (a local optimum). Randomized to find different local optimums.
+
+    A: accepting_worker time remaining.
+    T: transferring_worker time remaining.
+    |(A - delta) - (T + delta)| < |A - T| <=> Should transfer <=> 0 < delta < A - T.
+
+    The rides of every worker are kept in rides_of and the workers are kept sorted by
+    remaining time in by_remaining, both are updated in place after every transfer.
+    The accepting worker for a ride is found by bisecting by_remaining for the first
+    worker that has enough time remaining for the transfer to improve the balance.
+
+    If movable is given, only those rides are transferred.
+    Returns the number of transfers, which are also added to stats.moves.
+    """
+    ride_time = model.ride_time
+    remaining = model.remaining
+    can_check = model.can_check
+    rides_of: List[Set[int]] = [set() for _ in model.workers]
+    for ride_id, worker_id in enumerate(model.assignment):
+        if movable is None or ride_id in movable:
+            rides_of[worker_id].add(ride_id)
+    by_remaining = sorted((time_left, worker_id) for worker_id, time_left in enumerate(remaining))
+
+    def accepting_worker(ride_id: int, transferring_worker: int) -> int | None:
+        """
+        The most loaded worker that can check ride_id and should take it from transferring_worker.
+        Taking the closest fit keeps the transfers small, which balances better than always picking the least loaded worker.
+        """
+        limit = remaining[transferring_worker] + ride_time[ride_id]
+        for i in range(bisect.bisect_right(by_remaining, (limit, len(remaining))), len(by_remaining)):
+            worker_id = by_remaining[i][1]
+            if (can_check[ride_id] >> worker_id) & 1:
+                return worker_id
+        return None
 
-    while hillclimb(complete_assignment, complete_worker_times_remaining): # Hillclimb until local optimum.
-        pass
-    return complete_assignment
+    def transfer(ride_id: int, transferring_worker: int, accepting_worker: int) -> None:
+        for worker_id in (transferring_worker, accepting_worker):
+            del by_remaining[bisect.bisect_left(by_remaining, (remaining[worker_id], worker_id))]
+        model.transfer(ride_id, accepting_worker)
+        rides_of[transferring_worker].remove(ride_id)
+        rides_of[accepting_worker].add(ride_id)
+        for worker_id in (transferring_worker, accepting_worker):
+            bisect.insort(by_remaining, (remaining[worker_id], worker_id))
 
+    transfers = 0
+    transferred = True
+    while transferred: # Hillclimb until local optimum.
+        transferred = False
+        # The most loaded workers try to give their rides away first.
+        for _, transferring_worker in list(by_remaining):
+            rides_to_transfer = list(rides_of[transferring_worker])
+            rng.shuffle(rides_to_transfer)
+            for ride_id in rides_to_transfer:
+                if ride_time[ride_id] > 0 and (worker_id := accepting_worker(ride_id, transferring_worker)) is not None:
+                    transfer(ride_id, transferring_worker, worker_id)
+                    transfers += 1
+                    transferred = True
+    if stats is not None:
+        stats.moves += transfers
+    return transfers
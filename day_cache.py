@@ -0,0 +1,83 @@
+from typing import Dict, List, Set, Any
+import hashlib
+import json
+import os
+
+# Bump when a solver change should invalidate previously cached assignments.
+CACHE_VERSION = 1
+
+
+class DayCache:
+    """
+    On-disk cache of day assignments, one JSON file per day problem in `directory`.
+
+    Files are named by a hash of the canonical form of the problem (see DayCache.key), so
+    an unchanged day is served from the cache whatever else changed in the week.
+    The cache keeps at most max_entries files, evicting the least recently used ones.
+    """
+    def __init__(self, directory: str, max_entries: int = 512):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]], seed: int | None, solver_options: Dict[str, Any]) -> str:
+        """
+        Hash of the day problem and everything else that decides its assignment.
+        Rides a worker can check that are not in rides_time (closed today) are left out.
+        """
+        canonical = json.dumps({
+            'version': CACHE_VERSION,
+            'worker_time': worker_time,
+            'rides_time': sorted(rides_time.items()),
+            'workers_can_check': sorted((worker, sorted(can_check & rides_time.keys())) for worker, can_check in workers_can_check.items()),
+            'seed': seed,
+            'solver_options': sorted(solver_options.items()),
+        }, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Dict[str, str] | None:
+        """
+        The cached assignment, or None. A hit marks the entry as recently used.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                assignment = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return assignment
+
+    def put(self, key: str, assignment: Dict[str, str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = self.path(key) + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(assignment, f)
+        os.replace(temporary_path, self.path(key)) # Readers never see a half-written file.
+        self.evict()
+
+    def entries(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries beyond max_entries.
+        """
+        entries = self.entries()
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        for path in self.entries():
+            os.remove(path)
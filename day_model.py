@@ -0,0 +1,68 @@
+from typing import Dict, List, Set
+
+
+class DayModel:
+    """
+    Compact integer-indexed model of a single day, used internally by the solver.
+
+    Rides and workers are interned to ids (their index in `rides` and `workers`).
+    can_check[ride_id] is a bitmask of the workers that can check the ride,
+    eligible[ride_id] lists the same workers by id and checkable[worker_id] lists the rides a worker can check.
+    remaining[worker_id] is the time the worker has left and
+    assignment[ride_id] is the id of the assigned worker, or -1.
+    """
+    def __init__(self, worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]]):
+        self.worker_time = worker_time
+        self.rides: List[str] = list(rides_time)
+        self.workers: List[str] = list(workers_can_check)
+        self.ride_ids: Dict[str, int] = {ride: ride_id for ride_id, ride in enumerate(self.rides)}
+        self.worker_ids: Dict[str, int] = {worker: worker_id for worker_id, worker in enumerate(self.workers)}
+        self.ride_time: List[int] = [rides_time[ride] for ride in self.rides]
+        self.can_check: List[int] = [0] * len(self.rides)
+        self.eligible: List[List[int]] = [[] for _ in self.rides]
+        self.checkable: List[List[int]] = [[] for _ in self.workers]
+        for worker_id, worker in enumerate(self.workers):
+            bit = 1 << worker_id
+            for ride in workers_can_check[worker]:
+                ride_id = self.ride_ids.get(ride)
+                if ride_id is not None:  # Rides that are closed today are ignored.
+                    self.can_check[ride_id] |= bit
+                    self.eligible[ride_id].append(worker_id)
+                    self.checkable[worker_id].append(ride_id)
+            self.checkable[worker_id].sort()  # Sets iterate in hash order, keep ids in ride order.
+        self.remaining: List[int] = [worker_time] * len(self.workers)
+        self.assignment: List[int] = [-1] * len(self.rides)
+
+    def can_take(self, ride_id: int, worker_id: int) -> bool:
+        """
+        Whether the worker is trained on the ride and has enough time remaining for it.
+        """
+        return (self.can_check[ride_id] >> worker_id) & 1 == 1 and self.ride_time[ride_id] <= self.remaining[worker_id]
+
+    def assign(self, ride_id: int, worker_id: int) -> None:
+        self.assignment[ride_id] = worker_id
+        self.remaining[worker_id] -= self.ride_time[ride_id]
+
+    def unassign(self, ride_id: int) -> None:
+        worker_id = self.assignment[ride_id]
+        self.remaining[worker_id] += self.ride_time[ride_id]
+        self.assignment[ride_id] = -1
+
+    def transfer(self, ride_id: int, worker_id: int) -> None:
+        self.unassign(ride_id)
+        self.assign(ride_id, worker_id)
+
+    def spread(self) -> int:
+        """
+        Max - min worker load, the difference between the most and the least loaded worker.
+        """
+        return max(self.remaining) - min(self.remaining) if self.remaining else 0
+
+    def to_dict(self) -> Dict[str, str]:
+        """
+        Convert the assignment back to {ride: worker...}, skipping unassigned rides.
+        """
+        return {
+            self.rides[ride_id]: self.workers[worker_id]
+            for ride_id, worker_id in enumerate(self.assignment) if worker_id != -1
+        }
@@ -0,0 +1,82 @@
+from typing import Dict, Set
+from dataclasses import dataclass
+from day_model import DayModel
+from day_assignment import generate_day_assignment, find_assignment, hillclimb, SearchTimeout
+from feasibility import check_day_feasibility
+import random
+import time
+
+
+@dataclass
+class ExactResult:
+    assignment: Dict[str, str]
+    max_load: int # Load of the most loaded worker in assignment.
+    lower_bound: int # No assignment has a smaller max_load.
+
+    @property
+    def gap(self) -> int:
+        return self.max_load - self.lower_bound
+
+    @property
+    def optimal(self) -> bool:
+        return self.gap == 0
+
+
+def max_load(assignment: Dict[str, str], rides_time: Dict[str, int]) -> int:
+    loads: Dict[str, int] = {}
+    for ride, worker in assignment.items():
+        loads[worker] = loads.get(worker, 0) + rides_time[ride]
+    return max(loads.values(), default=0)
+
+
+def generate_exact_day_assignment(
+        worker_time: int,
+        rides_time: Dict[str, int],
+        workers_can_check: Dict[str, Set[str]],
+        time_limit: float = 10.0,
+        initial: Dict[str, str] | None = None,
+        seed: int | None = None) -> ExactResult:
+    """
+    Minimize the load of the most loaded worker, returning the best assignment found within
+    time_limit seconds together with a proven lower bound on the best possible max load.
+
+    Starts from initial (or a generate_day_assignment result) as the upper bound and from
+    the largest of the longest ride and the flow bound as the lower bound. The flow bound is
+    the smallest worker time for which the fractional relaxation of check_day_feasibility
+    is feasible. Then binary searches the max load in between: a max load is feasible iff
+    the day has an assignment when every worker only has that much time, which the complete
+    dfs of find_assignment either finds or rules out. When the time runs out the gap between
+    the two bounds is left open, otherwise the assignment is optimal.
+    Raises NoDayAssignment if the day has no assignment.
+    """
+    deadline = time.perf_counter() + time_limit
+    rng = random.Random(seed)
+    best = initial if initial is not None else generate_day_assignment(worker_time, rides_time, workers_can_check, seed=seed)
+    upper_bound = max_load(best, rides_time)
+
+    # Flow bound, the relaxation is monotone in the worker time so it can be binary searched too.
+    low = max(max(rides_time.values(), default=0), -(-sum(rides_time.values()) // max(len(workers_can_check), 1)))
+    high = upper_bound
+    while low < high:
+        middle = (low + high) // 2
+        if check_day_feasibility(middle, rides_time, workers_can_check) is None:
+            high = middle
+        else:
+            low = middle + 1
+    lower_bound = low
+
+    high = upper_bound
+    while lower_bound < high and time.perf_counter() < deadline:
+        middle = (lower_bound + high) // 2
+        model = DayModel(middle, rides_time, workers_can_check)
+        try:
+            found = find_assignment(model, rng, 'propagate', deadline)
+        except SearchTimeout:
+            break
+        if found:
+            hillclimb(model, rng) # Never increases the max load, balances the rest.
+            best = model.to_dict()
+            high = max_load(best, rides_time)
+        else:
+            lower_bound = middle + 1
+    return ExactResult(best, high, lower_bound)
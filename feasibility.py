@@ -0,0 +1,158 @@
+from typing import Dict, List, Set
+from dataclasses import dataclass, field
+from collections import deque
+
+
+@dataclass
+class Infeasibility:
+    """
+    Proof that a day has no assignment.
+
+    untrained_rides: rides that no present worker can check.
+    too_long_rides: rides that take longer than the time of a worker.
+    rides, workers: a group of rides that take rides_time minutes while the workers that can
+    check them (and nothing else) only have workers_time minutes between them.
+    """
+    untrained_rides: List[str] = field(default_factory=list)
+    too_long_rides: List[str] = field(default_factory=list)
+    rides: List[str] = field(default_factory=list)
+    workers: List[str] = field(default_factory=list)
+    rides_time: int = 0
+    workers_time: int = 0
+
+    def message(self) -> str:
+        reasons = []
+        if self.untrained_rides:
+            reasons.append(f"nobody present can check {quoted(self.untrained_rides)}")
+        if self.too_long_rides:
+            reasons.append(f"{quoted(self.too_long_rides)} {'takes' if len(self.too_long_rides) == 1 else 'take'} longer than the time of a worker")
+        if self.rides:
+            reasons.append(
+                f"{quoted(self.rides)} need {self.rides_time} minutes but the workers who can check them "
+                f"({quoted(self.workers) if self.workers else 'nobody'}) only have {self.workers_time} minutes"
+            )
+        return ", ".join(reasons)
+
+
+def quoted(names: List[str], limit: int = 8) -> str:
+    shown = ", ".join(f"'{name}'" for name in names[:limit])
+    return shown if len(names) <= limit else f"{shown} and {len(names) - limit} more"
+
+
+def check_day_feasibility(worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]]) -> Infeasibility | None:
+    """
+    Fast polynomial check run before the search. Returns an Infeasibility if the day provably
+    has no assignment, otherwise None (the day may still have no assignment).
+
+    Besides the single ride checks, this solves the fractional relaxation where a ride may be
+    split between the workers that can check it, as a max flow:
+    source -> ride (ride time) -> worker that can check it -> sink (worker_time).
+    If the flow cannot carry all the ride time, the rides still reachable from the source in
+    the residual graph need more time than the workers reachable from them have.
+    """
+    rides = list(rides_time)
+    workers = list(workers_can_check)
+    trained_rides = set().union(*workers_can_check.values())
+    untrained_rides = [ride for ride in rides if ride not in trained_rides]
+    too_long_rides = [ride for ride in rides if rides_time[ride] > worker_time and ride in trained_rides]
+    if untrained_rides or too_long_rides:
+        return Infeasibility(untrained_rides=untrained_rides, too_long_rides=too_long_rides)
+
+    # Nodes: source, rides, workers, sink. Edge e and e ^ 1 are each other's reverse.
+    source = 0
+    sink = len(rides) + len(workers) + 1
+    adjacency: List[List[int]] = [[] for _ in range(sink + 1)]
+    to: List[int] = []
+    capacity: List[int] = []
+
+    def add_edge(u: int, v: int, c: int) -> None:
+        adjacency[u].append(len(to))
+        to.append(v)
+        capacity.append(c)
+        adjacency[v].append(len(to))
+        to.append(u)
+        capacity.append(0)
+
+    total_time = sum(rides_time.values())
+    ride_nodes = {ride: 1 + i for i, ride in enumerate(rides)}
+    for worker_index, worker in enumerate(workers):
+        worker_node = 1 + len(rides) + worker_index
+        for ride in workers_can_check[worker]:
+            if ride in ride_nodes:
+                add_edge(ride_nodes[ride], worker_node, total_time)
+        add_edge(worker_node, sink, worker_time)
+    for ride, ride_node in ride_nodes.items():
+        add_edge(source, ride_node, rides_time[ride])
+
+    flow = max_flow(adjacency, to, capacity, source, sink)
+    if flow >= total_time:
+        return None
+    reachable = residual_reachable(adjacency, to, capacity, source)
+    bottleneck_rides = [ride for ride in rides if reachable[ride_nodes[ride]]]
+    bottleneck_workers = [worker for worker_index, worker in enumerate(workers) if reachable[1 + len(rides) + worker_index]]
+    return Infeasibility(
+        rides=bottleneck_rides,
+        workers=bottleneck_workers,
+        rides_time=sum(rides_time[ride] for ride in bottleneck_rides),
+        workers_time=worker_time * len(bottleneck_workers),
+    )
+
+
+def levels_from(adjacency: List[List[int]], to: List[int], capacity: List[int], source: int) -> List[int]:
+    """
+    BFS distance from source over edges with capacity left, -1 if unreachable.
+    """
+    level = [-1] * len(adjacency)
+    level[source] = 0
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        for edge in adjacency[u]:
+            if capacity[edge] > 0 and level[to[edge]] == -1:
+                level[to[edge]] = level[u] + 1
+                queue.append(to[edge])
+    return level
+
+
+def residual_reachable(adjacency: List[List[int]], to: List[int], capacity: List[int], source: int) -> List[bool]:
+    return [level != -1 for level in levels_from(adjacency, to, capacity, source)]
+
+
+def max_flow(adjacency: List[List[int]], to: List[int], capacity: List[int], source: int, sink: int) -> int:
+    """
+    Dinic's algorithm, capacity is updated in place to the residual capacities.
+    """
+    flow = 0
+    while True:
+        level = levels_from(adjacency, to, capacity, source)
+        if level[sink] == -1:
+            return flow
+        next_edge = [0] * len(adjacency)
+        path: List[int] = []
+        u = source
+        while True:
+            if u == sink:
+                pushed = min(capacity[edge] for edge in path)
+                for edge in path:
+                    capacity[edge] -= pushed
+                    capacity[edge ^ 1] += pushed
+                flow += pushed
+                path.clear()
+                u = source
+                continue
+            edges = adjacency[u]
+            while next_edge[u] < len(edges):
+                edge = edges[next_edge[u]]
+                if capacity[edge] > 0 and level[to[edge]] == level[u] + 1:
+                    break
+                next_edge[u] += 1
+            if next_edge[u] < len(edges):
+                edge = edges[next_edge[u]]
+                path.append(edge)
+                u = to[edge]
+            elif u == source:
+                break
+            else: # Dead end, never come back to u in this phase.
+                level[u] = -1
+                u = to[path.pop() ^ 1]
+                next_edge[u] += 1
@@ -0,0 +1,117 @@
+# Startup and save times of the GUI on a large synthetic roster, without showing a window.
+# For example: python gui_benchmark.py --rides 500 --workers 300 --output gui_benchmark.json
+
+from typing import Dict, Any, get_args
+from util import Day
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import yaml
+
+
+def write_roster(directory: str, rides: int, workers: int, seed: int) -> None:
+    """
+    input folder with rides rides, workers workers who cannot check about 10% of the rides,
+    and days where about 5% of the workers are absent and 5% of the rides are closed. Also an empty output folder.
+    """
+    rng = random.Random(seed)
+    rides_time = {f"ride{i}": rng.randint(5, 30) for i in range(rides)}
+    workers_cannot_check = {f"worker{j}": [ride for ride in rides_time if rng.random() < 0.1] for j in range(workers)}
+    days_info = {
+        day: {
+            'time': 600,
+            'uaworkers': [worker for worker in workers_cannot_check if rng.random() < 0.05],
+            'uarides': [ride for ride in rides_time if rng.random() < 0.05],
+        } for day in get_args(Day)
+    }
+    os.makedirs(os.path.join(directory, "input"))
+    os.makedirs(os.path.join(directory, "output"))
+    for name, data in [("rides_time.yaml", rides_time), ("workers_cannot_check.yaml", workers_cannot_check), ("days_info.yaml", days_info)]:
+        with open(os.path.join(directory, "input", name), "w") as f:
+            yaml.safe_dump(data, f, sort_keys=False)
+
+
+def run_gui_benchmark(rides: int, workers: int, edits: int = 100, seed: int = 0) -> Dict[str, Any]:
+    """
+    Seconds to open the main window (the first time and again), to open every day, to add and remove edits absent workers on every day, and to save.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import gui_days_info
+
+    result: Dict[str, Any] = {'rides': rides, 'workers': workers, 'edits': edits}
+    directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        write_roster(temporary_directory, rides, workers, seed)
+        os.chdir(temporary_directory)
+        try:
+            start = time.perf_counter()
+            window = gui_days_info.MainWindow()
+            window.show()
+            app.processEvents()
+            result['startup_seconds'] = time.perf_counter() - start
+
+            # Opening it again reads the input snapshot the first window wrote.
+            start = time.perf_counter()
+            warm_window = gui_days_info.MainWindow()
+            warm_window.show()
+            app.processEvents()
+            result['warm_startup_seconds'] = time.perf_counter() - start
+            if warm_window.solver is not None:
+                warm_window.solver.shutdown()
+            warm_window.deleteLater()
+
+            start = time.perf_counter()
+            days_widget = window.days_widget
+            for day in get_args(Day): # Days are built when they are first shown.
+                days_widget.show_day(day)
+            app.processEvents()
+            result['open_days_seconds'] = time.perf_counter() - start
+
+            # Every day, mark edits workers absent and then present again.
+            start = time.perf_counter()
+            for day_widget in days_widget.day_widgets.values():
+                absent_workers_widget = day_widget.absent_workers_widget
+                names = [name for name in window.workers_model.names if name not in absent_workers_widget.chosen_model][:edits]
+                for name in names:
+                    absent_workers_widget.add_chosen(name)
+                for name in names:
+                    absent_workers_widget.remove_chosen(name)
+            app.processEvents()
+            result['edit_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            window.save()
+            result['save_seconds'] = time.perf_counter() - start
+
+            # Not window.close(), it asks whether to save.
+            if window.solver is not None:
+                window.solver.shutdown()
+            window.deleteLater()
+        finally:
+            os.chdir(directory)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI startup and save times on a large synthetic roster.")
+    parser.add_argument("--rides", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=300)
+    parser.add_argument("--edits", type=int, default=100, help="Number of workers marked absent and present again on every day.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON file to write the results to.")
+    args = parser.parse_args()
+
+    result = run_gui_benchmark(args.rides, args.workers, args.edits, args.seed)
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
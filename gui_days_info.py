@@ -1,6 +1,5 @@
 # GUI for editing days_info.yaml.
 
-import yaml
 from PySide6.QtGui import Qt
 from PySide6.QtWidgets import (
     QApplication,
@@ -10,53 +9,94 @@ from PySide6.QtWidgets import (
     QLabel,
     QPushButton,
     QWidget,
-    QScrollArea,
     QMessageBox,
     QComboBox,
     QTabWidget,
+    QListView,
+    QAbstractItemView,
 )
-from util import Day
-from typing import get_args, List
-from PySide6.QtCore import Signal
-
-# Standard
-app = QApplication([])
-
-
-class Dropdown(QWidget):
+from util import dump_yaml, Day
+from typing import get_args, List, Dict, Iterable
+from PySide6.QtCore import Signal, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+from gui_solver import BackgroundSolver
+from pipeline import load_roster, read_input, write_outputs, InputError
+from load_history import LoadHistory, week_key
+from archive import week_start_of
+from datetime import date
+import copy
+import multiprocessing
+import os
+import webbrowser
+
+
+class NameModel(QAbstractListModel):
     """
-    Consists of Qlabel and QComboBox.
-    For choosing from a list of unique strings.
+    List of unique names (rides or workers) for Qt views.
+    Adding and removing a name take O(1): a removed name is replaced by the last one,
+    so the order is not kept, views sort through a proxy.
     """
-    def __init__(self, parent, elem_name: str, elems: List[str]):
+    def __init__(self, parent, names: Iterable[str] = ()):
         super().__init__(parent)
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.row_of: Dict[str, int] = {name: row for row, name in enumerate(self.names)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.names[index.row()]
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.row_of
+
+    def add(self, name: str) -> None:
+        if name in self.row_of:
+            return
+        row = len(self.names)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.names.append(name)
+        self.row_of[name] = row
+        self.endInsertRows()
+
+    def remove(self, name: str) -> None:
+        if name not in self.row_of:
+            return
+        row = self.row_of.pop(name)
+        last = len(self.names) - 1
+        if row != last:
+            moved = self.names[last]
+            self.names[row] = moved
+            self.row_of[moved] = row
+            self.touch(moved)
+        self.beginRemoveRows(QModelIndex(), last, last)
+        self.names.pop()
+        self.endRemoveRows()
+
+    def touch(self, name: str) -> None:
+        """
+        Tell the views of name to look at it again, for example because a filter depends on it.
+        """
+        index = self.index(self.row_of[name])
+        self.dataChanged.emit(index, index)
+
+
+class AvailableProxy(QSortFilterProxyModel):
+    """
+    The names of a shared NameModel that are not in chosen_model and match the search text, sorted.
+    """
+    def __init__(self, parent, all_model: NameModel, chosen_model: NameModel):
+        super().__init__(parent)
+        self.chosen_model = chosen_model
+        self.setSourceModel(all_model)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.sort(0)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        name = self.sourceModel().names[source_row]
+        return name not in self.chosen_model and super().filterAcceptsRow(source_row, source_parent)
 
-        label = QLabel(self)
-        label.setText(f"{elem_name.capitalize()}:")
-        self.combo_box = QComboBox(self)
-        for elem in elems:
-            self.add_elem(elem)
-        
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(label)
-        layout.addWidget(self.combo_box)
-        
-    def remove_elem(self, elem: str) -> None:
-        for i in range(self.combo_box.count()):
-            if elem == self.combo_box.itemText(i):
-                self.combo_box.removeItem(i)
-                break
-
-    def add_elem(self, elem: str) -> None:
-        self.combo_box.addItem(elem)
-    
-    def current_elem(self) -> str:
-        return self.combo_box.currentText()
-    
-    def is_empty(self) -> bool:
-        return self.combo_box.currentIndex() < 0
-    
 
 class ChosenWidget(QWidget):
     """
@@ -67,89 +107,83 @@ class ChosenWidget(QWidget):
     possible to choose some of those rides to be unavailable.
 
     Consists of: 
-    - Dropdown
+    - Search box, typing in it narrows down the dropdown
+    - Dropdown of the elements that are not chosen
     - Add button
-    - List view of chosen elements 
+    - List view of chosen elements (double click to unchoose)
+    - Remove button for the selected chosen elements
+
+    all_model is shared between the widgets of every day, when a name is chosen or
+    unchosen only that name is looked at again, so it does not matter how many names there are.
     """
-    def __init__(self, parent, elem_name, chosen_elems, all_elems):
+    chosen_changed = Signal()
+
+    def __init__(self, parent, elem_name: str, chosen_elems: List[str], all_model: NameModel):
         super().__init__(parent)
 
-        self.elem_widgets = []
+        self.all_model = all_model
+        self.chosen_model = NameModel(self, [elem for elem in chosen_elems if elem in all_model])
 
-        dropdown = Dropdown(self, elem_name, all_elems)
+        label = QLabel(self)
+        label.setText(f"{elem_name.capitalize()}:")
+        search_edit = QLineEdit(self)
+        search_edit.setPlaceholderText("Search...")
+        available = AvailableProxy(self, all_model, self.chosen_model)
+        search_edit.textChanged.connect(available.setFilterFixedString)
+        self.combo_box = QComboBox(self)
+        self.combo_box.setModel(available)
 
         add_button = QPushButton(self)  # Button to choose element.
-
         add_button.setText(f"Add {elem_name}")
+        add_button.clicked.connect(lambda: self.add_chosen(self.combo_box.currentText()))
 
-        chosen_holder = QWidget(self)
-        scroll_area = QScrollArea(self)
-        scroll_area.setWidgetResizable(True) # This is critical, otherwise no elements can be chosen.
-        scroll_area.setWidget(chosen_holder)
-        scroll_area.setFrameStyle(0)
-
-        layout = QVBoxLayout(self)  # `self` argument is critical
-        layout.addWidget(dropdown)
-        layout.addWidget(add_button)
-        layout.addWidget(scroll_area)  # QScrollArea is a widget
-
-        chosen_layout = QVBoxLayout(chosen_holder)
-        chosen_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        def add_elem(elem):
-            dropdown.remove_elem(elem)
-            elem_widget = ElementWidget(self, elem)
-            self.elem_widgets.append(elem_widget)
-            chosen_layout.addWidget(elem_widget)
-
-            def delete_elem():
-                self.elem_widgets.remove(elem_widget)
-                current = elem_widget.read()
-                dropdown.add_elem(current)
-                elem_widget.deleteLater()
-
-            elem_widget.element_unchoose.connect(delete_elem)
-        
-        def add_elem_from_dropdown():
-            if dropdown.is_empty():
-                return
-            add_elem(dropdown.current_elem())
+        chosen_sorted = QSortFilterProxyModel(self)
+        chosen_sorted.setSourceModel(self.chosen_model)
+        chosen_sorted.sort(0)
+        chosen_view = QListView(self)
+        chosen_view.setModel(chosen_sorted)
+        chosen_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        chosen_view.doubleClicked.connect(lambda index: self.remove_chosen(index.data()))
 
-        add_button.clicked.connect(add_elem_from_dropdown)
+        remove_button = QPushButton(self)
+        remove_button.setText(f"Remove {elem_name}")
 
-        for chosen_elem in chosen_elems:
-            add_elem(chosen_elem)
+        def remove_selected():
+            for elem in [index.data() for index in chosen_view.selectedIndexes()]:
+                self.remove_chosen(elem)
 
-    def read_chosen(self):
-        return [elem_widget.read() for elem_widget in self.elem_widgets]
+        remove_button.clicked.connect(remove_selected)
 
+        layout = QVBoxLayout(self)  # `self` argument is critical
+        layout.addWidget(label)
+        layout.addWidget(search_edit)
+        layout.addWidget(self.combo_box)
+        layout.addWidget(add_button)
+        layout.addWidget(chosen_view)
+        layout.addWidget(remove_button)
 
-class ElementWidget(QWidget):
-    """
-    Consists of QPushButton for unchoosing element and QLabel
-    """
-    element_unchoose = Signal(bool)
-
-    def __init__(self, parent, text):
-        super().__init__(parent)
+    def add_chosen(self, elem: str) -> None:
+        if elem not in self.all_model or elem in self.chosen_model:
+            return
+        self.chosen_model.add(elem)
+        self.all_model.touch(elem) # Leaves the dropdown.
+        self.chosen_changed.emit()
 
-        unchoose_button = QPushButton(self)
-        unchoose_button.setText("-")
-        unchoose_button.setFixedSize(30, 20)
-        unchoose_button.clicked.connect(lambda: self.element_unchoose.emit(True))
-        self.label = QLabel(self)
-        self.label.setText(text)
+    def remove_chosen(self, elem: str) -> None:
+        if elem not in self.chosen_model:
+            return
+        self.chosen_model.remove(elem)
+        if elem in self.all_model:
+            self.all_model.touch(elem) # Back in the dropdown.
+        self.chosen_changed.emit()
 
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)  # Remove spacing
-        layout.addWidget(unchoose_button)
-        layout.addWidget(self.label)
+    def read_chosen(self) -> List[str]:
+        return list(self.chosen_model.names)
 
-    def read(self):
-        return self.label.text()
-    
 
 class TimeEditWidget(QWidget):
+    time_changed = Signal()
+
     def __init__(self, parent, time):
         super().__init__(parent)
 
@@ -172,6 +206,7 @@ class TimeEditWidget(QWidget):
             try:
                 self.time = int(to)
                 update_time_view_widget()
+                self.time_changed.emit()
             except ValueError:
                 pass
 
@@ -185,23 +220,29 @@ class DayWidget(QWidget):
     """
     Edit time, unavailable rides, and unavailable workers for a given day.
     """
-    def __init__(self, parent, day_data, rides, workers):
+    day_changed = Signal()
+
+    def __init__(self, parent, day_data, rides_model: NameModel, workers_model: NameModel):
         super().__init__(parent)
 
         layout = QVBoxLayout(self)
 
         self.time_edit_widget = TimeEditWidget(self, day_data["time"])
         self.closed_rides_widget = ChosenWidget(
-            self, "closed ride", day_data["uarides"], rides
+            self, "closed ride", day_data["uarides"], rides_model
         )
         self.absent_workers_widget = ChosenWidget(
-            self, "absent worker", day_data["uaworkers"], workers
+            self, "absent worker", day_data["uaworkers"], workers_model
         )
 
         layout.addWidget(self.time_edit_widget)
         layout.addWidget(self.closed_rides_widget)
         layout.addWidget(self.absent_workers_widget)
 
+        self.time_edit_widget.time_changed.connect(self.day_changed)
+        self.closed_rides_widget.chosen_changed.connect(self.day_changed)
+        self.absent_workers_widget.chosen_changed.connect(self.day_changed)
+
     def read_day(self):
         return {
             "time": self.time_edit_widget.read_time(),
@@ -210,26 +251,43 @@ class DayWidget(QWidget):
         }
 
 
-class DaysWidget(QWidget):
-    def __init__(self, parent, days_data, rides, workers):
+class DaysWidget(QTabWidget):
+    """
+    One tab per day. The DayWidget of a day is only built when its tab is first shown,
+    until then read_days gives the day as it was loaded.
+    """
+    day_edited = Signal(str)
+
+    def __init__(self, parent, days_data, rides_model: NameModel, workers_model: NameModel):
         super().__init__(parent)
+        self.days_data = days_data
+        self.rides_model = rides_model
+        self.workers_model = workers_model
         self.day_widgets = {}
-        layout = QHBoxLayout(self)
+        self.containers = {}
         for day in get_args(Day):
             container = QWidget(self)
-            container_layout = QVBoxLayout(container)
-            day_label = QLabel(container)
-            day_label.setText(day.capitalize())
-            day_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            day_widget = DayWidget(container, days_data[day], rides, workers)
-            self.day_widgets[day] = day_widget
-            container_layout.addWidget(day_label)
-            container_layout.addWidget(day_widget)
-            layout.addWidget(container)
+            QVBoxLayout(container)
+            self.containers[day] = container
+            self.addTab(container, day.capitalize())
+        self.currentChanged.connect(lambda index: self.build_day(get_args(Day)[index]))
+        self.build_day(get_args(Day)[self.currentIndex()])
+
+    def build_day(self, day: Day) -> None:
+        if day in self.day_widgets:
+            return
+        container = self.containers[day]
+        day_widget = DayWidget(container, self.days_data[day], self.rides_model, self.workers_model)
+        day_widget.day_changed.connect(lambda: self.day_edited.emit(day))
+        container.layout().addWidget(day_widget)
+        self.day_widgets[day] = day_widget
+
+    def show_day(self, day: Day) -> None:
+        self.setCurrentIndex(get_args(Day).index(day))
 
     def read_days(self):
         return {
-            day: self.day_widgets[day].read_day() for day in self.day_widgets
+            day: self.day_widgets[day].read_day() if day in self.day_widgets else copy.deepcopy(self.days_data[day]) for day in get_args(Day)
         }
 
 
@@ -241,7 +299,7 @@ class WorkersWidget(QWidget):
     Modify worker permissions using a checkbox grid 
     and add/remove worker.
     """
-    def __init__(self, parent, workers_cannot_check, rides):
+    def __init__(self, parent, workers, rides):
         super().__init__()
         ...
 
@@ -262,20 +320,24 @@ class MainWindow(QWidget):
         self.setGeometry(400, 400, 400, 600) # Increase default size and default position on desktop.
         self.setWindowTitle("Ridechecks App")
 
-        # Load YAML
-        with open("input/days_info.yaml", "r") as f:
-            days_info = yaml.safe_load(f)
-        with open("input/rides_time.yaml", "r") as f:
-            rides_time = yaml.safe_load(f)
-        with open("input/workers_cannot_check.yaml", "r") as f:
-            workers_cannot_check = yaml.safe_load(f)
+        # Load the input folder, from the snapshot of the last run if the files did not change since.
+        roster_error = None
+        try:
+            self.roster = load_roster("input", "cache/roster.pickle")
+            days_info, rides_time, workers = self.roster.days_info, self.roster.all_rides_time, list(self.roster.all_workers_can_check)
+        except InputError as e: # The days can still be edited, but not generated.
+            roster_error = e
+            rides_time, workers_cannot_check, days_info = read_input("input")
+            workers = list(workers_cannot_check.keys())
 
         tab_widget = QTabWidget(self)
 
         rides = list(rides_time.keys())
-        workers = list(workers_cannot_check.keys())
-        self.days_widget = DaysWidget(self, days_info, rides, workers)
-        self.workers_widget = WorkersWidget(self, workers_cannot_check, rides)
+        # Shared by the editors of every day.
+        self.rides_model = NameModel(self, rides)
+        self.workers_model = NameModel(self, workers)
+        self.days_widget = DaysWidget(self, days_info, self.rides_model, self.workers_model)
+        self.workers_widget = WorkersWidget(self, workers, rides)
         self.rides_widget = RidesWidget(self, rides_time)
 
         tab_widget.addTab(self.days_widget, 'Weekly Info')
@@ -286,19 +348,90 @@ class MainWindow(QWidget):
         save_button.setText("SAVE")
 
         save_button.clicked.connect(self.save)
-        
+
+        # Schedules are solved in the background while the days are edited, so that generating is quick.
+
+        self.status_label = QLabel(self)
+        self.generate_button = QPushButton(self)
+        self.generate_button.setText("GENERATE")
+        cancel_button = QPushButton(self)
+        cancel_button.setText("CANCEL")
+        generate_layout = QHBoxLayout()
+        generate_layout.addWidget(self.generate_button)
+        generate_layout.addWidget(cancel_button)
+
+        self.generate_requested = False
+        self.day_errors = {}
+        self.solver = None
+        if roster_error is not None:
+            self.status_label.setText(f"Cannot generate: {roster_error}.")
+            self.generate_button.setEnabled(False)
+            cancel_button.setEnabled(False)
+        else:
+            self.history = LoadHistory("output/load_history.yaml") if os.path.isdir("output") else None
+            self.week_start = week_start_of(date.today())
+            prior_loads = self.history.prior_loads(week_key(self.week_start)) if self.history else None
+            self.solver = BackgroundSolver(self, self.roster, self.days_widget.read_days, prior_loads)
+            self.solver.progress.connect(self.show_progress)
+            self.solver.day_solved.connect(lambda day: self.day_errors.pop(day, None))
+            self.solver.day_failed.connect(self.show_day_failed)
+            self.solver.week_ready.connect(self.week_ready)
+            self.solver.week_failed.connect(self.week_failed)
+            self.days_widget.day_edited.connect(lambda day: self.solver.edited())
+            self.generate_button.clicked.connect(self.generate)
+            cancel_button.clicked.connect(self.cancel)
+            self.solver.solve_now()
+
         layout = QVBoxLayout(self)
         layout.addWidget(tab_widget)
         layout.addWidget(save_button)
+        layout.addWidget(self.status_label)
+        layout.addLayout(generate_layout)
+
+    def show_progress(self, done, total):
+        if done < total:
+            self.status_label.setText(f"Solving... {done}/{total} days")
+
+    def show_day_failed(self, day, message):
+        self.day_errors[day] = message
+        self.status_label.setText("\n".join(self.day_errors.values()))
+
+    def generate(self):
+        """
+        Write the schedule as soon as the latest days are solved.
+        """
+        self.generate_requested = True
+        self.generate_button.setEnabled(False)
+        self.solver.solve_now()
+
+    def cancel(self):
+        self.generate_requested = False
+        self.generate_button.setEnabled(True)
+        self.solver.cancel()
+        self.status_label.setText("Cancelled.")
+
+    def week_ready(self, week):
+        if not self.generate_requested:
+            self.status_label.setText("Ready to generate.")
+            return
+        self.generate_requested = False
+        self.generate_button.setEnabled(True)
+        if not os.path.isdir("output"):
+            self.status_label.setText("Please make sure that there is a folder called 'output'.")
+            return
+        html_path = write_outputs(self.roster, week, "output", self.week_start, self.history)
+        self.status_label.setText(f"Generated {html_path}.")
+        webbrowser.open(f"file://{os.path.abspath(html_path)}")
+
+    def week_failed(self):
+        self.generate_requested = False
+        self.generate_button.setEnabled(True)
 
     def save(self):
-            with open("input/days_info.yaml", "w") as f:
-                yaml.safe_dump(self.days_widget.read_days(), f, sort_keys=False)
-            with open("input/rides_time.yaml", "w") as f:
-                ...
-            with open("input/workers_cannot_check.yaml", "r") as f:
-                ...
-        
+        # The Workers and Rides tabs cannot edit anything yet, so their files are left alone.
+        with open("input/days_info.yaml", "w") as f:
+            dump_yaml(self.days_widget.read_days(), f)
+
     def closeEvent(self, event):
         reply = QMessageBox.question(self, 'Save Confirmation', 'Would you like to save before closing?',
                                      QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Cancel)
@@ -310,8 +443,13 @@ class MainWindow(QWidget):
             event.accept()
         else:
             event.ignore()
-        
-        
-window = MainWindow()
-window.show()
-app.exec()
+        if event.isAccepted() and self.solver is not None:
+            self.solver.shutdown()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Days are solved on worker processes.
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec()
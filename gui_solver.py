@@ -0,0 +1,199 @@
+# Background solving for the GUI: days are solved on worker processes, driven from a QThread, so the window never waits for the solver.
+
+from typing import Dict, List, Tuple, Set, Callable, Any
+from concurrent.futures import Executor, ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from day_assignment import NoDayAssignment
+from week_balance import balance_week
+from multiple_day_assignments import solve_day
+from pipeline import Roster
+from util import day_problem, Day, DayInfo
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+import copy
+import threading
+
+
+class SolveWorker(QObject):
+    """
+    Solves the given days on executor and then balances the week, in its own QThread.
+    Cancellation is per day: days that have not started are dropped, a day being solved
+    finishes on its worker process but its result is ignored.
+    """
+    day_solved = Signal(str, object) # day, assignment {ride: worker...}
+    day_failed = Signal(str, str) # day, why it has no assignment
+    finished = Signal(object) # {day: {ride: worker...}...} of the whole week, or None if some day failed
+    cancelled = Signal()
+
+    def __init__(
+            self,
+            executor: Executor,
+            roster: Roster,
+            days_info: Dict[Day, DayInfo],
+            solved: Dict[Day, Dict[str, str]],
+            to_solve: List[Day],
+            prior_loads: Dict[str, int] | None):
+        super().__init__()
+        self.executor = executor
+        self.roster = roster
+        self.days_info = days_info
+        self.solved = dict(solved)
+        self.to_solve = to_solve
+        self.prior_loads = prior_loads
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        Called from the GUI thread, the worker stops before the next day.
+        """
+        self.cancel_event.set()
+
+    @Slot()
+    def run(self) -> None:
+        pending: Dict[Future, Day] = {}
+        for day in self.to_solve:
+            problem = day_problem(self.days_info[day], self.roster.all_rides_time, self.roster.all_workers_can_check)
+            pending[self.executor.submit(solve_day, day, *problem, None, {})] = day
+        failed = False
+        while pending:
+            done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            if self.cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                self.cancelled.emit()
+                return
+            for future in done:
+                day = pending.pop(future)
+                try:
+                    self.solved[day] = future.result()
+                    self.day_solved.emit(day, self.solved[day])
+                except NoDayAssignment as e:
+                    failed = True
+                    self.day_failed.emit(day, str(e))
+        if failed:
+            self.finished.emit(None)
+            return
+        week = {day: self.solved[day] for day in self.days_info}
+        roster = self.roster
+        self.finished.emit(balance_week(week, self.days_info, roster.all_rides_time, roster.all_workers_can_check, self.prior_loads))
+
+
+class BackgroundSolver(QObject):
+    """
+    Keeps a solved week in step with the days being edited, without blocking the GUI.
+
+    edited() restarts a debounce timer, when it runs out the days whose day_info changed since
+    they were last solved are solved again in the background (a day with no time is never solved).
+    solve_now() skips the timer. A run started while another is going cancels the other one.
+    Progress comes back through the signals, with the balanced week in week_ready.
+    """
+    day_solved = Signal(str)
+    day_failed = Signal(str, str)
+    progress = Signal(int, int) # days solved, days to solve
+    week_ready = Signal(object) # {day: {ride: worker...}...}
+    week_failed = Signal()
+
+    def __init__(self, parent: QObject | None, roster: Roster, read_days: Callable[[], Dict[Day, DayInfo]],
+            prior_loads: Dict[str, int] | None = None, debounce_ms: int = 500, processes: int | None = None):
+        super().__init__(parent)
+        self.roster = roster
+        self.read_days = read_days
+        self.prior_loads = prior_loads
+        self.processes = processes
+        self.executor: ProcessPoolExecutor | None = None
+        self.solved: Dict[Day, Tuple[DayInfo, Dict[str, str]]] = {} # day_info each day was solved for, and its assignment.
+        self.thread: QThread | None = None
+        self.worker: SolveWorker | None = None
+        self.running_days_info: Dict[Day, DayInfo] = {}
+        self.done = 0
+        self.total = 0
+        self.rerun = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.solve_now)
+
+    def edited(self) -> None:
+        self.timer.start()
+
+    def is_running(self) -> bool:
+        return self.worker is not None
+
+    def solve_now(self) -> None:
+        self.timer.stop()
+        if self.worker is not None:
+            # Start again once the current run has stopped, with the latest edits.
+            self.rerun = True
+            self.worker.cancel()
+            return
+        days_info = copy.deepcopy(self.read_days())
+        to_solve = [day for day, day_info in days_info.items() if day_info['time'] != 0 and (day not in self.solved or self.solved[day][0] != day_info)]
+        solved = {day: self.solved[day][1] if day_info['time'] != 0 else {} for day, day_info in days_info.items() if day not in to_solve}
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.processes)
+        self.running_days_info = days_info
+        self.done = 0
+        self.total = len(to_solve)
+        self.thread = QThread(self)
+        self.worker = SolveWorker(self.executor, self.roster, days_info, solved, to_solve, self.prior_loads)
+        self.worker.moveToThread(self.thread)
+        # Connected to methods of this object, so they run in the GUI thread.
+        self.worker.day_solved.connect(self.on_day_solved)
+        self.worker.day_failed.connect(self.on_day_failed)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.cancelled.connect(self.stop_thread)
+        self.thread.started.connect(self.worker.run)
+        self.progress.emit(0, self.total)
+        self.thread.start()
+
+    @Slot(str, object)
+    def on_day_solved(self, day: Day, assignment: Dict[str, str]) -> None:
+        self.solved[day] = self.running_days_info[day], assignment
+        self.done += 1
+        self.progress.emit(self.done, self.total)
+        self.day_solved.emit(day)
+
+    @Slot(str, str)
+    def on_day_failed(self, day: Day, message: str) -> None:
+        self.done += 1
+        self.progress.emit(self.done, self.total)
+        self.day_failed.emit(day, message)
+
+    @Slot(object)
+    def on_finished(self, week: Dict[Day, Dict[str, str]] | None) -> None:
+        rerun = self.rerun
+        self.stop_thread()
+        if rerun: # The days changed while this week was solved, it is already being solved again.
+            return
+        if week is None:
+            self.week_failed.emit()
+        else:
+            self.week_ready.emit(week)
+
+    def cancel(self) -> None:
+        self.timer.stop()
+        self.rerun = False
+        if self.worker is not None:
+            self.worker.cancel()
+
+    @Slot()
+    def stop_thread(self) -> None:
+        if self.thread is None:
+            return
+        self.thread.quit()
+        self.thread.wait()
+        self.thread = None
+        self.worker = None
+        if self.rerun:
+            self.rerun = False
+            self.solve_now()
+
+    def shutdown(self) -> None:
+        """
+        Stop solving before the window closes.
+        """
+        self.cancel()
+        if self.thread is not None:
+            self.thread.quit()
+            self.thread.wait()
+            self.thread = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
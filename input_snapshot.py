@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple, Any
+import hashlib
+import os
+import pickle
+
+# Bump when what is stored in snapshots changes (for example the Roster fields), older snapshots are then ignored.
+SNAPSHOT_VERSION = 1
+
+
+class InputSnapshot:
+    """
+    Pickle of what was built from some input files (the validated Roster of the input folder), at path.
+
+    The snapshot records the size, mtime and SHA-256 of every file. get() only returns it while the files
+    are unchanged: files with the same size and mtime are taken as unchanged without reading them,
+    a file that was only touched (same size and hash, new mtime) still counts as unchanged.
+    Anything else, a missing, corrupt or older-version snapshot included, is a miss.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def file_states(paths: List[str]) -> Dict[str, Tuple[int, int, str]] | None:
+        """
+        {path: (size, mtime_ns, sha256)...} of the files, or None if one is missing.
+        """
+        states = {}
+        try:
+            for path in paths:
+                stat = os.stat(path)
+                with open(path, "rb") as f:
+                    states[path] = stat.st_size, stat.st_mtime_ns, hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+        return states
+
+    def get(self, paths: List[str]) -> Any | None:
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError):
+            return None
+        if type(snapshot) != dict or snapshot.get('version') != SNAPSHOT_VERSION or sorted(snapshot.get('files', {})) != sorted(paths):
+            return None
+        for path, (size, mtime_ns, sha256) in snapshot['files'].items():
+            try:
+                stat = os.stat(path)
+                if stat.st_size != size:
+                    return None
+                if stat.st_mtime_ns != mtime_ns:
+                    with open(path, "rb") as f:
+                        if hashlib.sha256(f.read()).hexdigest() != sha256:
+                            return None
+            except OSError:
+                return None
+        return snapshot['data']
+
+    def put(self, files: Dict[str, Tuple[int, int, str]], data: Any) -> None:
+        """
+        Store data built from files, as returned by file_states before the files were read
+        (so that a file changed while it was read is read again next time).
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            pickle.dump({'version': SNAPSHOT_VERSION, 'files': files, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.path) # Readers never see a half-written file.
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
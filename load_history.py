@@ -0,0 +1,83 @@
+from typing import Dict, List, Any
+from datetime import date
+from util import load_yaml, dump_yaml
+import os
+
+
+def week_key(day: date) -> str:
+    """
+    ISO week of a date, e.g. '2026-W42'. Schedules generated in the same week replace each other.
+    """
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class LoadHistory:
+    """
+    Per-worker ride check minutes of the last `window` weekly schedules, kept in a small YAML file
+    so that past HTML or YAML schedules never have to be parsed again.
+
+    Besides the loads of every schedule in the window, the file keeps their per-worker totals.
+    The totals are updated incrementally by record(): the new schedule is added, and a schedule
+    it replaces or that drops out of the window is subtracted.
+    Entries are kept in week order, so a schedule generated for a past week lands in its place.
+    """
+    def __init__(self, path: str, window: int = 8):
+        self.path = path
+        self.window = window
+        self.entries: List[Dict[str, Any]] = [] # [{'week': week_key, 'loads': {worker: minutes...}}...], oldest first.
+        self.totals: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = load_yaml(f) or {}
+            self.entries = sorted(data.get('entries', []), key=lambda entry: entry['week'])
+            self.totals = data.get('totals', {})
+
+    def window_entries(self, this_week: str | None = None) -> List[Dict[str, Any]]:
+        """
+        The entries of the last `window` weeks before this_week (or of the last `window` weeks), oldest first.
+        """
+        entries = [entry for entry in self.entries if this_week is None or entry['week'] < this_week]
+        return entries[len(entries) - self.window:] if self.window > 0 else []
+
+    def prior_loads(self, this_week: str | None = None) -> Dict[str, int]:
+        """
+        Cumulative minutes of every worker over the `window` weeks before this_week, workers missing from it have 0.
+        An earlier schedule of this_week is left out, it is about to be replaced, and so are the schedules of
+        later weeks when a past week is scheduled again. The window is the one this history was opened with,
+        even if the file holds more weeks.
+        """
+        entries = self.window_entries(this_week)
+        if len(entries) == len(self.entries):
+            return dict(self.totals) # The totals are kept for exactly the stored entries.
+        loads: Dict[str, int] = {}
+        for entry in entries:
+            for worker, minutes in entry['loads'].items():
+                loads[worker] = loads.get(worker, 0) + minutes
+        return loads
+
+    def add(self, loads: Dict[str, int], sign: int) -> None:
+        for worker, minutes in loads.items():
+            self.totals[worker] = self.totals.get(worker, 0) + sign * minutes
+            if self.totals[worker] == 0:
+                del self.totals[worker]
+
+    def record(self, week: str, loads: Dict[str, int]) -> None:
+        """
+        Record the loads of the schedule of week, replacing an earlier schedule of the same week, and save.
+        """
+        for entry in [entry for entry in self.entries if entry['week'] == week]:
+            self.entries.remove(entry)
+            self.add(entry['loads'], -1)
+        self.entries.append({'week': week, 'loads': dict(loads)})
+        self.entries.sort(key=lambda entry: entry['week'])
+        self.add(loads, 1)
+        while len(self.entries) > self.window:
+            self.add(self.entries.pop(0)['loads'], -1)
+        self.save()
+
+    def save(self) -> None:
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as f:
+            dump_yaml({'window': self.window, 'totals': self.totals, 'entries': self.entries}, f)
+        os.replace(temporary_path, self.path)
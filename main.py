@@ -1,12 +1,14 @@
 # Read files in input folder, generate multiple_day_assignments, and write ridechecks_<day>_<month>_<year> YAML and HTML files to output folder.
+# The steps themselves are in pipeline.py.
+# Only argparse and datetime are imported at the top: the solver and the renderers are imported by main() once the options are known,
+# so --help and mistyped options answer at once, and the template engine is only loaded when HTML is written.
+# Startup time is measured by startup_benchmark.py.
 
-from multiple_day_assignments import generate_multiple_day_assignments, Day, DayInfo
-from day_assignment import NoDayAssignment
-from make_html_table import make_html_table
-from util import is_list_of_strings, timestamp_string
-from typing import Dict, List, Tuple, Set, Iterable, Callable, Collection, Any
-import os
-import yaml
+from datetime import date
+import argparse
+
+# The validated input folder, read instead of the YAML files while they do not change.
+ROSTER_SNAPSHOT = "cache/roster.pickle"
 
 
 def early_exit(s: str):
@@ -17,105 +19,62 @@ def early_exit(s: str):
     exit()
 
 
-# Check the input folder.
-
-if (
-    not os.path.exists("input")
-    or not os.path.exists("input/workers_cannot_check.yaml")
-    or not os.path.exists("input/rides_time.yaml")
-    or not os.path.exists("input/days_info.yaml")
-):
-    early_exit(
-        "Please make sure that there is a folder called 'input' containing the files 'workers_cannot_check.yaml', 'rides_time.yaml', and 'days_info.yaml'"
-    )
-
-# Check the output folder.
-
-if not os.path.exists("output"):
-    early_exit("Please make sure that there is a folder called 'output'")
-
-# Read yaml files in the input folder.
-
-with open("input/workers_cannot_check.yaml", "r") as file:
-    all_workers_cannot_check: Dict[str, List[str]] = yaml.safe_load(file)
-
-with open("input/rides_time.yaml", "r") as file:
-    all_rides_time: Dict[str, int] = yaml.safe_load(file)
-
-with open("input/days_info.yaml", "r") as file:
-    days_info: Dict[Day, DayInfo] = yaml.safe_load(file)
-
-# Validate the data.
-
-for ride, time in all_rides_time.items():
-    if type(ride) != str or type(time) != int:
-        early_exit("Data in 'rides_time.yaml' does not follow format")
-
-for worker, cannot_check in all_workers_cannot_check.items():
-    if type(worker) != str or type(cannot_check) != list:
-        early_exit("Data in 'workers_cannot_check.yaml' does not follow format")
-    for ride in cannot_check:
-        if ride not in all_rides_time:
-            early_exit(
-                f"Ride '{ride}' listed in 'workers_cannot_check.yaml' does not appear in 'rides_time.yaml', check ride name"
-            )
-
-for day, day_info in days_info.items():
-    if type(day) != str or type(day_info) != dict:
-        early_exit("Data in 'days_info.yaml' does not follow format")
-
-    for key, value in day_info.items():
-        if key not in ["time", "uaworkers", "uarides"]:
-            early_exit("Data in 'days_info.yaml' does not follow format")
-
-        if type(value) != int and not is_list_of_strings(value):
-            early_exit("Data in 'days_info.yaml' does not follow format")
-
-        if key == "time" and type(value) != int:
-            early_exit(
-                "Data in 'days_info.yaml' does not follow format, time must be a number"
-            )
-
-        if (key == "uarides" or key == "uaworkers") and type(value) != list:
-            early_exit(
-                "Data in 'days_info.yaml' does not follow format, expected a list of unavailable workers or unavailable rides"
-            )
-
-        if key == "uarides":
-            for ride in value:  # type: ignore
-                if ride not in all_rides_time:
-                    early_exit(
-                        f"Unavailable ride '{ride}' listed in 'days_info.yaml' for day '{day}' does not appear in 'rides_time.yaml', check ride name"
-                    )
-
-        if key == "uaworkers":
-            for worker in value:  # type: ignore
-                if worker not in all_workers_cannot_check:
-                    early_exit(
-                        f"Unavailable worker '{worker}' listed in 'days_info.yaml' for day '{day}' does not appear in 'workers_cannot_check.yaml', check worker name"
-                    )
-
-# Convert all_workers_cannot_check to all_workers_can_check.
-
-all_workers_can_check: Dict[str, Set[str]] = {}
-for worker in all_workers_cannot_check:
-    cannot_check = all_workers_cannot_check[worker]
-    all_workers_can_check[worker] = set(all_rides_time.keys()) - set(cannot_check)
-
-# Generate assignments, handling case where assignments cannot be generated.
-
-try:
-    multiple_day_assignments = generate_multiple_day_assignments(
-        days_info, all_rides_time, all_workers_can_check
-    )
-except NoDayAssignment as e:
-    early_exit(str(e))
-
-# Write assignments to YAML file.
-
-with open("output/ridechecks.yaml", "w") as f:
-    yaml.safe_dump(multiple_day_assignments, f, sort_keys=False)  # type: ignore
-
-# Write assignments to HTML file using jinja.
-
-make_html_table(multiple_day_assignments, list(all_rides_time.keys()), f"output/ridechecks[{timestamp_string()}].html")  # type: ignore
+def main():
+    parser = argparse.ArgumentParser(description="Generate ridechecks from the files in the input folder.")
+    parser.add_argument("--processes", type=int, default=None, help="Number of days solved at the same time (default: one per core).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible schedules.")
+    parser.add_argument("--no-cache", action="store_true", help="Read the input folder and solve every day again instead of reusing what earlier runs read and solved.")
+    parser.add_argument("--clear-cache", action="store_true", help="Remove what earlier runs read and solved before generating.")
+    parser.add_argument("--no-week-balance", action="store_true", help="Only balance every day on its own, not the weekly totals of the workers.")
+    parser.add_argument("--history-window", type=int, default=8, help="Number of past weeks whose totals are evened out by this week's schedule, 0 to ignore past weeks.")
+    parser.add_argument("--repair", action="store_true", help="Start from 'output/ridechecks.yaml' and only change the rides that have to change.")
+    parser.add_argument("--stats", choices=["print", "json"], default=None, help="Print where the solver spent its time, or write it to 'output/ridechecks_stats.json' (not with --repair).")
+    parser.add_argument("--week-start", type=date.fromisoformat, default=None, help="Monday of the week being scheduled, YYYY-MM-DD (default: this week's Monday).")
+    parser.add_argument("--runs", type=int, default=1, help="Solve every day this many times with different seeds and keep the most even schedule.")
+    parser.add_argument("--target-spread", type=int, default=None, help="With --runs, stop solving a day once the loads of its workers are within this many minutes.")
+    parser.add_argument("--no-html", action="store_true", help="Only write 'output/ridechecks.yaml', not the HTML table.")
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    from pipeline import load_roster, run_pipeline, InputError
+    from day_assignment import NoDayAssignment
+    from day_cache import DayCache
+    from input_snapshot import InputSnapshot
+    from solve_stats import SolveStats
+
+    if args.clear_cache:
+        DayCache("cache").clear()
+        InputSnapshot(ROSTER_SNAPSHOT).clear()
+
+    stats = SolveStats() if args.stats else None
+    try:
+        roster = load_roster("input", None if args.no_cache else ROSTER_SNAPSHOT)
+        result = run_pipeline(
+            roster, "output", cache_directory=None if args.no_cache else "cache", processes=args.processes, seed=args.seed,
+            week_balance=not args.no_week_balance, history_window=args.history_window, repair=args.repair,
+            week_start=args.week_start, stats=stats, html=not args.no_html,
+            runs=args.runs, target_spread=args.target_spread
+        )
+    except (InputError, NoDayAssignment) as e:
+        early_exit(str(e))
+
+    if result.repairs is not None:
+        for day, repair in result.repairs.items():
+            print(f"{day}: {repair.changed} rides changed in {repair.seconds:.3f}s")
+
+    # Report where the solver spent its time.
+
+    if stats is not None and not args.repair:
+        if args.stats == "print":
+            print(stats.summary())
+        else:
+            import json
+            with open("output/ridechecks_stats.json", "w") as f:
+                json.dump(stats.to_dict(), f, indent=1)
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # Needed for worker processes in the packaged main.exe.
+    main()
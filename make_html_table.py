@@ -1,15 +1,89 @@
-from typing import Dict, List, Tuple, Set, Iterable, Callable, Collection, Any
-from multiple_day_assignments import Day, DayInfo
-import jinja2
-
-def make_html_table(multiple_day_assignments: Dict[Day, Dict[str, str]], rides: List[str], html_path: str) -> None:
-    template_loader = jinja2.FileSystemLoader(searchpath="./")
-    template_env = jinja2.Environment(loader=template_loader)
-    template_path = "template.html"
-    template = template_env.get_template(template_path)
-    output_text = template.render({
-        'multiple_day_assignments': multiple_day_assignments,
-        'rides': rides
-    })
+from typing import Dict, List, Tuple, Iterable, Iterator, Any, TYPE_CHECKING, get_args
+from itertools import groupby, islice
+from operator import itemgetter
+from util import Day
+import functools
+
+if TYPE_CHECKING:
+    import jinja2
+
+DAYS: List[Day] = list(get_args(Day))
+
+# A section of a page: heading (None for no heading), days of the columns and rows (ride, [worker of every day...]).
+Section = Tuple[str | None, List[str], Iterable[Tuple[str, List[str]]]]
+
+
+@functools.lru_cache(maxsize=None)
+def template_environment(searchpath: str = "./") -> "jinja2.Environment":
+    """
+    One environment per template folder, it keeps the compiled templates and only compiles a template again when its file changes.
+    jinja2 is only imported here, by the first page rendered, so that runs that write no HTML never load it.
+    """
+    import jinja2
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=searchpath), trim_blocks=True, lstrip_blocks=True)
+
+
+def render_page(html_path: str, title: str, sections: Iterable[Section], totals: Iterable[Tuple[str, int, int]]) -> None:
+    """
+    Write template.html to html_path as it is rendered, so sections and totals can be generators
+    and a page of any length is never held in memory as a whole.
+    totals are (worker, checks, minutes) rows.
+    """
+    template = template_environment().get_template("template.html")
+    chunks = template.generate(title=title, sections=sections, totals=totals)
     with open(html_path, 'w') as f:
-        f.write(output_text)
+        # Every cell is a few tiny chunks, joining them in batches writes much faster than one at a time.
+        while batch := list(islice(chunks, 1000)):
+            f.write("".join(batch))
+
+
+def schedule_grid(multiple_day_assignments: Dict[Day, Dict[str, str]], rides: Iterable[str]) -> List[Tuple[str, List[str]]]:
+    """
+    Rows (ride, [worker of every day of multiple_day_assignments...]), an empty string where the ride is not checked.
+    """
+    day_assignments = list(multiple_day_assignments.values())
+    return [(ride, [day_assignment.get(ride, "") for day_assignment in day_assignments]) for ride in rides]
+
+
+def worker_totals(multiple_day_assignments: Dict[Day, Dict[str, str]], all_rides_time: Dict[str, int]) -> List[Tuple[str, int, int]]:
+    """
+    (worker, checks, minutes) of every worker with at least one check, most minutes first.
+    """
+    totals: Dict[str, List[int]] = {}
+    for day_assignment in multiple_day_assignments.values():
+        for ride, worker in day_assignment.items():
+            total = totals.setdefault(worker, [0, 0])
+            total[0] += 1
+            total[1] += all_rides_time[ride]
+    return sorted(((worker, checks, minutes) for worker, (checks, minutes) in totals.items()), key=lambda total: (-total[2], total[0]))
+
+
+def make_html_table(multiple_day_assignments: Dict[Day, Dict[str, str]], all_rides_time: Dict[str, int], html_path: str) -> None:
+    """
+    Page of one week: a row per ride with the worker of every day, then the totals of every worker.
+    """
+    sections: List[Section] = [(None, list(multiple_day_assignments), schedule_grid(multiple_day_assignments, all_rides_time))]
+    render_page(html_path, "Ridechecks", sections, worker_totals(multiple_day_assignments, all_rides_time))
+
+
+def history_sections(rows: Iterable[Tuple[str, str, Day, str]]) -> Iterator[Section]:
+    """
+    One section per week from (week_start, ride, day, worker) rows ordered by week and ride, see ScheduleArchive.week_rows.
+    Lazy: only the rows of one ride are looked at at a time.
+    """
+    def week_grid(week_rows: Iterable[Tuple[str, str, Day, str]]) -> Iterator[Tuple[str, List[str]]]:
+        for ride, ride_rows in groupby(week_rows, key=itemgetter(1)):
+            workers = [""] * len(DAYS)
+            for _, _, day, worker in ride_rows:
+                workers[DAYS.index(day)] = worker
+            yield ride, workers
+
+    for week_start, week_rows in groupby(rows, key=itemgetter(0)):
+        yield f"Week of {week_start}", DAYS, week_grid(week_rows) # type: ignore
+
+
+def make_history_html(rows: Iterable[Tuple[str, str, Day, str]], totals: Iterable[Tuple[str, int, int]], html_path: str, title: str = "Ridechecks history") -> None:
+    """
+    Page of many weeks (a season) from rows of the archive, streamed to html_path.
+    """
+    render_page(html_path, title, history_sections(rows), totals)
@@ -1,26 +1,160 @@
 from typing import Dict, List, Tuple, Set, Iterable, Collection, Callable, Any, Literal
-from day_assignment import generate_day_assignment, NoDayAssignment
-from util import without_keys, Day
+from concurrent.futures import ProcessPoolExecutor
+from day_assignment import generate_day_assignment, load_spread, record_phase, NoDayAssignment
+from day_cache import DayCache
+from feasibility import check_day_feasibility
+from portfolio import generate_day_assignment_portfolio
+from week_balance import balance_week, weekly_loads
+from solve_stats import SolveStats
+from util import without_keys, derive_seed, day_problem, Day, DayInfoKey, DayInfo
+import time
+
+
+def check_days_feasibility(problems: Dict[Day, Tuple[int, Dict[str, int], Dict[str, Set[str]]]]) -> None:
+    """
+    Fail fast before any search: raises NoDayAssignment explaining why, for every day that provably has no assignment.
+    """
+    messages = []
+    for day, (worker_time, day_ride_times, day_can_check) in problems.items():
+        if worker_time != 0 and (infeasibility := check_day_feasibility(worker_time, day_ride_times, day_can_check)) is not None:
+            messages.append(f"No assignment exists for day '{day}', {infeasibility.message()}")
+    if messages:
+        raise NoDayAssignment("; ".join(messages))
+
+
+def generate_single_day(
+        worker_time: int,
+        day_ride_times: Dict[str, int],
+        day_can_check: Dict[str, Set[str]],
+        seed: int | None,
+        solver_options: Dict[str, Any],
+        collect_stats: bool = False) -> Tuple[Dict[str, str], SolveStats | None]:
+    """
+    Solve one day, a day with no time has no rides checked.
+    With 'runs' in solver_options (and optionally 'target_spread'), the day is solved that many times with
+    different seeds and the most even assignment is kept, see portfolio.generate_day_assignment_portfolio.
+    The runs are made one after the other, since the days themselves may already be solved on a pool.
+    Returns the assignment and, with collect_stats, the SolveStats of the day (of all runs together).
+    Module level so that it can be sent to a worker process, which is why the stats are returned instead of filled in.
+    """
+    stats = SolveStats() if collect_stats else None
+    if worker_time == 0:
+        return {}, stats
+    options = dict(solver_options)
+    runs = options.pop('runs', 1)
+    target_spread = options.pop('target_spread', None)
+    if runs > 1:
+        assignment = generate_day_assignment_portfolio(
+            worker_time, day_ride_times, day_can_check, runs=runs, processes=1, seed=seed, target_spread=target_spread, stats=stats, **options
+        )
+        return assignment, stats
+    return generate_day_assignment(worker_time, day_ride_times, day_can_check, seed=seed, stats=stats, **options), stats
+
+
+def solve_day(day: Day, worker_time: int, rides_time: Dict[str, int], workers_can_check: Dict[str, Set[str]], seed: int | None, solver_options: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Feasibility check and solve of one day on its own (the service and the GUI solve days one by one),
+    raises NoDayAssignment naming the day.
+    Module level so that it can be sent to a worker process.
+    """
+    if worker_time != 0:
+        check_days_feasibility({day: (worker_time, rides_time, workers_can_check)})
+    try:
+        return generate_single_day(worker_time, rides_time, workers_can_check, seed, solver_options)[0]
+    except NoDayAssignment:
+        raise NoDayAssignment(f"No assignment exists for day '{day}'")
 
-DayInfoKey = Literal['time', 'uaworkers', 'uarides']
-DayInfo = Dict[DayInfoKey, Any]
 
 def generate_multiple_day_assignments(
         days_info: Dict[Day, DayInfo], 
         all_rides_time: Dict[str, int], 
-        all_workers_can_check: Dict[str, Set[str]]) -> Dict[Day, Dict[str, str]]:
-    multiple_day_assignments: Dict[Day, Dict[str, str]] = {}
-    for day, day_info in days_info.items():
-        worker_time: int = day_info['time']
-        if worker_time == 0:
-            day_assignment = {}
-        else:
-            day_ride_times = without_keys(all_rides_time, day_info['uarides'])
-            day_can_check = without_keys(all_workers_can_check, day_info['uaworkers'])
+        all_workers_can_check: Dict[str, Set[str]],
+        processes: int | None = 1,
+        seed: int | None = None,
+        cache: DayCache | None = None,
+        balance_weekly_totals: bool = False,
+        prior_loads: Dict[str, int] | None = None,
+        stats: SolveStats | None = None,
+        **solver_options: Any) -> Dict[Day, Dict[str, str]]:
+    """
+    Solve every day in days_info, keeping the order of days_info.
+
+    Days are independent, so with processes other than 1 they are solved concurrently on a
+    pool of that many worker processes (None: one per core). Every day gets its own seed
+    derived from seed and the day, so the result does not depend on how the days are scheduled.
+    solver_options are passed on to generate_day_assignment, except runs and target_spread (see generate_single_day).
+    With a cache, days whose problem, seed and solver_options were solved before are not solved again.
+    With balance_weekly_totals, the solved days are then balanced over the whole week with balance_week,
+    counting prior_loads {worker: minutes...} from past weeks (see load_history) towards the weekly totals.
+    Raises NoDayAssignment naming every day that has no assignment, with the reason when check_day_feasibility finds one.
+    With stats, the time of every phase, the week balance moves and the SolveStats of every day are added to it,
+    together with the totals of the days.
+    """
+    start = time.perf_counter()
+    day_seeds = {day: derive_seed(seed, day) for day in days_info}
+    problems = {day: day_problem(day_info, all_rides_time, all_workers_can_check) for day, day_info in days_info.items()}
+    check_days_feasibility(problems)
+    if stats is not None:
+        start = record_phase(stats, 'feasibility', start)
+    solved: Dict[Day, Dict[str, str]] = {}
+    cache_keys: Dict[Day, str] = {}
+    if cache is not None:
+        for day, (worker_time, day_ride_times, day_can_check) in problems.items():
+            if worker_time == 0:
+                continue
+            cache_keys[day] = cache.key(worker_time, day_ride_times, day_can_check, day_seeds[day], solver_options)
+            cached = cache.get(cache_keys[day])
+            if cached is not None and cached.keys() == day_ride_times.keys():
+                solved[day] = {ride: cached[ride] for ride in day_ride_times} # Keep the order of rides_time.
+                if stats is not None:
+                    stats.days[day] = SolveStats(cached=True)
+    if stats is not None:
+        start = record_phase(stats, 'cache', start)
+    to_solve = [day for day in days_info if day not in solved]
+    failed_days: List[Day] = []
+    collect_stats = stats is not None
+    if processes == 1:
+        for day in to_solve:
             try:
-                day_assignment = generate_day_assignment(worker_time, day_ride_times, day_can_check)
-            except NoDayAssignment as e:
-                # print(e)
-                raise NoDayAssignment(f"No assignment exists for day '{day}'")
-        multiple_day_assignments[day] = day_assignment
+                solved[day], day_stats = generate_single_day(*problems[day], day_seeds[day], solver_options, collect_stats)
+            except NoDayAssignment:
+                failed_days.append(day)
+                continue
+            if stats is not None and day_stats is not None:
+                stats.days[day] = day_stats
+    elif to_solve:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {day: executor.submit(generate_single_day, *problems[day], day_seeds[day], solver_options, collect_stats) for day in to_solve}
+            for day, future in futures.items():
+                try:
+                    solved[day], day_stats = future.result()
+                except NoDayAssignment:
+                    failed_days.append(day)
+                    continue
+                if stats is not None and day_stats is not None:
+                    stats.days[day] = day_stats
+    if cache is not None:
+        for day in to_solve:
+            if day in cache_keys and day in solved:
+                cache.put(cache_keys[day], solved[day])
+    if stats is not None:
+        start = record_phase(stats, 'solve', start)
+        stats.days = {day: stats.days[day] for day in days_info if day in stats.days}
+        for day_stats in stats.days.values():
+            stats.nodes += day_stats.nodes
+            stats.backtracks += day_stats.backtracks
+            stats.restarts += day_stats.restarts
+            stats.moves += day_stats.moves
+    if failed_days:
+        raise NoDayAssignment("; ".join(f"No assignment exists for day '{day}'" for day in failed_days))
+    multiple_day_assignments = {day: solved[day] for day in days_info}
+    if balance_weekly_totals:
+        multiple_day_assignments = balance_week(multiple_day_assignments, days_info, all_rides_time, all_workers_can_check, prior_loads, seed=seed, stats=stats)
+        if stats is not None:
+            record_phase(stats, 'balance', start)
+    if stats is not None:
+        for day, day_stats in stats.days.items():
+            day_stats.spread = load_spread(multiple_day_assignments[day], all_rides_time, problems[day][2]) if multiple_day_assignments[day] else 0
+        loads = weekly_loads(multiple_day_assignments, all_rides_time)
+        stats.spread = max(loads.get(worker, 0) for worker in all_workers_can_check) - min(loads.get(worker, 0) for worker in all_workers_can_check) if all_workers_can_check else 0
     return multiple_day_assignments
@@ -0,0 +1,253 @@
+# The steps of main.py as functions: read and validate the input folder, generate (or repair) the schedule and write the output folder.
+# Importing this module has no side effects, so the GUI and the service can call it as often as they like.
+# Steps that only some runs need (repairing, rendering HTML) import their modules when they run, to keep startup fast.
+
+from typing import Dict, List, Tuple, Set, Any, TYPE_CHECKING, get_args
+from dataclasses import dataclass
+from datetime import date
+from multiple_day_assignments import generate_multiple_day_assignments
+from day_cache import DayCache
+from solve_stats import SolveStats
+from week_balance import weekly_loads
+from load_history import LoadHistory, week_key
+from archive import ScheduleArchive, week_start_of
+from input_snapshot import InputSnapshot
+from util import is_list_of_strings, timestamp_string, load_yaml, dump_yaml, Day, DayInfo
+import os
+
+if TYPE_CHECKING:
+    from repair import RepairResult
+
+
+class InputError(Exception):
+    """
+    The input folder is missing files or its data does not follow format.
+    """
+    pass
+
+
+@dataclass
+class Roster:
+    all_rides_time: Dict[str, int]
+    all_workers_can_check: Dict[str, Set[str]]
+    days_info: Dict[Day, DayInfo]
+
+
+@dataclass
+class PipelineResult:
+    multiple_day_assignments: Dict[Day, Dict[str, str]]
+    html_path: str | None # None when no HTML table was written.
+    repairs: "Dict[Day, RepairResult] | None" = None # Only when repairing.
+
+
+def validate_rides_time(all_rides_time: Any) -> None:
+    if type(all_rides_time) != dict:
+        raise InputError("Data in 'rides_time.yaml' does not follow format")
+    for ride, time in all_rides_time.items():
+        if type(ride) != str or type(time) != int:
+            raise InputError("Data in 'rides_time.yaml' does not follow format")
+
+
+def validate_workers_cannot_check(all_workers_cannot_check: Any, all_rides_time: Dict[str, int]) -> None:
+    if type(all_workers_cannot_check) != dict:
+        raise InputError("Data in 'workers_cannot_check.yaml' does not follow format")
+    for worker, cannot_check in all_workers_cannot_check.items():
+        if type(worker) != str or not is_list_of_strings(cannot_check):
+            raise InputError("Data in 'workers_cannot_check.yaml' does not follow format")
+        for ride in cannot_check:
+            if ride not in all_rides_time:
+                raise InputError(f"Ride '{ride}' listed in 'workers_cannot_check.yaml' does not appear in 'rides_time.yaml', check ride name")
+
+
+def validate_day_info(day: Any, day_info: Any, all_rides_time: Dict[str, int], all_workers: Set[str] | Dict[str, Any]) -> None:
+    """
+    Check one day of days_info against the rides and workers.
+    """
+    if type(day) != str or type(day_info) != dict:
+        raise InputError("Data in 'days_info.yaml' does not follow format")
+
+    if day not in get_args(Day):
+        raise InputError(f"Day '{day}' in 'days_info.yaml' is not one of {', '.join(get_args(Day))}")
+
+    for key in ["time", "uaworkers", "uarides"]:
+        if key not in day_info:
+            raise InputError(f"Data in 'days_info.yaml' does not follow format, day '{day}' has no '{key}'")
+
+    for key, value in day_info.items():
+        if key not in ["time", "uaworkers", "uarides"]:
+            raise InputError("Data in 'days_info.yaml' does not follow format")
+
+        if type(value) != int and not is_list_of_strings(value):
+            raise InputError("Data in 'days_info.yaml' does not follow format")
+
+        if key == "time" and type(value) != int:
+            raise InputError("Data in 'days_info.yaml' does not follow format, time must be a number")
+
+        if (key == "uarides" or key == "uaworkers") and type(value) != list:
+            raise InputError("Data in 'days_info.yaml' does not follow format, expected a list of unavailable workers or unavailable rides")
+
+        if key == "uarides":
+            for ride in value:
+                if ride not in all_rides_time:
+                    raise InputError(f"Unavailable ride '{ride}' listed in 'days_info.yaml' for day '{day}' does not appear in 'rides_time.yaml', check ride name")
+
+        if key == "uaworkers":
+            for worker in value:
+                if worker not in all_workers:
+                    raise InputError(f"Unavailable worker '{worker}' listed in 'days_info.yaml' for day '{day}' does not appear in 'workers_cannot_check.yaml', check worker name")
+
+
+def validate_days_info(days_info: Any, all_rides_time: Dict[str, int], all_workers: Set[str] | Dict[str, Any]) -> None:
+    if type(days_info) != dict:
+        raise InputError("Data in 'days_info.yaml' does not follow format")
+    for day, day_info in days_info.items():
+        validate_day_info(day, day_info, all_rides_time, all_workers)
+
+
+def workers_can_check_from(all_workers_cannot_check: Dict[str, List[str]], all_rides_time: Dict[str, int]) -> Dict[str, Set[str]]:
+    all_rides = set(all_rides_time)
+    return {worker: all_rides - set(cannot_check) for worker, cannot_check in all_workers_cannot_check.items()}
+
+
+def input_paths(input_directory: str = "input") -> Dict[str, str]:
+    return {name: os.path.join(input_directory, name) for name in ["workers_cannot_check.yaml", "rides_time.yaml", "days_info.yaml"]}
+
+
+def read_input(input_directory: str = "input") -> Tuple[Any, Any, Any]:
+    """
+    Data of rides_time.yaml, workers_cannot_check.yaml and days_info.yaml in the input folder, not validated yet.
+    Raises InputError if the folder or a file is missing.
+    """
+    paths = input_paths(input_directory)
+    if not os.path.isdir(input_directory) or not all(os.path.exists(path) for path in paths.values()):
+        raise InputError(
+            f"Please make sure that there is a folder called '{input_directory}' containing the files 'workers_cannot_check.yaml', 'rides_time.yaml', and 'days_info.yaml'"
+        )
+
+    with open(paths["workers_cannot_check.yaml"], "r") as file:
+        all_workers_cannot_check: Dict[str, List[str]] = load_yaml(file)
+
+    with open(paths["rides_time.yaml"], "r") as file:
+        all_rides_time: Dict[str, int] = load_yaml(file)
+
+    with open(paths["days_info.yaml"], "r") as file:
+        days_info: Dict[Day, DayInfo] = load_yaml(file)
+
+    return all_rides_time, all_workers_cannot_check, days_info
+
+
+def load_roster(input_directory: str = "input", snapshot_path: str | None = None) -> Roster:
+    """
+    Read and validate the files in the input folder.
+    With snapshot_path, the validated roster is pickled there, and read back instead of parsing and
+    validating the files again for as long as they do not change (see InputSnapshot).
+    Raises InputError if they are missing or do not follow format.
+    """
+    if snapshot_path is None:
+        return roster_from_data(*read_input(input_directory))
+    snapshot = InputSnapshot(snapshot_path)
+    paths = list(input_paths(input_directory).values())
+    roster = snapshot.get(paths)
+    if isinstance(roster, Roster):
+        return roster
+    files = snapshot.file_states(paths)
+    roster = roster_from_data(*read_input(input_directory))
+    if files is not None:
+        snapshot.put(files, roster)
+    return roster
+
+
+def roster_from_data(all_rides_time: Any, all_workers_cannot_check: Any, days_info: Any) -> Roster:
+    """
+    Validate the data of the three input files, already read (the GUI reads them itself).
+    Raises InputError if it does not follow format.
+    """
+    validate_rides_time(all_rides_time)
+    validate_workers_cannot_check(all_workers_cannot_check, all_rides_time)
+    validate_days_info(days_info, all_rides_time, all_workers_cannot_check)
+    return Roster(all_rides_time, workers_can_check_from(all_workers_cannot_check, all_rides_time), days_info)
+
+
+def run_pipeline(
+        roster: Roster,
+        output_directory: str = "output",
+        cache_directory: str | None = "cache",
+        processes: int | None = None,
+        seed: int | None = None,
+        week_balance: bool = True,
+        history_window: int = 8,
+        repair: bool = False,
+        week_start: date | None = None,
+        stats: SolveStats | None = None,
+        html: bool = True,
+        runs: int = 1,
+        target_spread: int | None = None) -> PipelineResult:
+    """
+    Generate the schedule of roster, or repair the previous one in output_directory, and write
+    ridechecks.yaml, the HTML table, the load history and the archive to output_directory.
+    cache_directory=None solves every day again. stats is only filled in when generating.
+    html=False skips the HTML table (and never loads the template engine).
+    With runs > 1, every day is solved runs times with different seeds and the most even assignment is kept,
+    stopping early once a day's spread is at most target_spread minutes.
+    Raises InputError if output_directory (or the previous schedule when repairing) is missing,
+    and NoDayAssignment if some day has no assignment.
+    """
+    if not os.path.isdir(output_directory):
+        raise InputError(f"Please make sure that there is a folder called '{output_directory}'")
+    week_start = week_start_of(week_start or date.today())
+    schedule_path = os.path.join(output_directory, "ridechecks.yaml")
+
+    # Per-worker totals of past weeks, kept up to date after every run.
+
+    history = LoadHistory(os.path.join(output_directory, "load_history.yaml"), history_window) if history_window > 0 else None
+
+    repairs = None
+    if repair:
+        if not os.path.exists(schedule_path):
+            raise InputError(f"There is no previous schedule '{schedule_path}' to repair")
+        from repair import repair_multiple_day_assignments
+        with open(schedule_path, "r") as file:
+            previous_assignments: Dict[Day, Dict[str, str]] = load_yaml(file) or {}
+        repairs = repair_multiple_day_assignments(previous_assignments, roster.days_info, roster.all_rides_time, roster.all_workers_can_check, seed=seed)
+        multiple_day_assignments = {day: repair.assignment for day, repair in repairs.items()}
+    else:
+        # Days that did not change since an earlier run are read from the cache folder.
+        cache = DayCache(cache_directory) if cache_directory is not None else None
+        portfolio = {'runs': runs, 'target_spread': target_spread} if runs > 1 else {}
+        multiple_day_assignments = generate_multiple_day_assignments(
+            roster.days_info, roster.all_rides_time, roster.all_workers_can_check, processes=processes, seed=seed, cache=cache,
+            balance_weekly_totals=week_balance, prior_loads=history.prior_loads(week_key(week_start)) if history else None,
+            stats=stats, **portfolio
+        )
+
+    html_path = write_outputs(roster, multiple_day_assignments, output_directory, week_start, history, html)
+    return PipelineResult(multiple_day_assignments, html_path, repairs)
+
+
+def write_outputs(
+        roster: Roster,
+        multiple_day_assignments: Dict[Day, Dict[str, str]],
+        output_directory: str,
+        week_start: date,
+        history: LoadHistory | None,
+        html: bool = True) -> str | None:
+    """
+    Write ridechecks.yaml and (if html) the HTML table, record the week in history and store it in the archive.
+    Returns the path of the HTML table, None without html.
+    """
+    with open(os.path.join(output_directory, "ridechecks.yaml"), "w") as f:
+        dump_yaml(multiple_day_assignments, f)
+
+    html_path = None
+    if html:
+        from make_html_table import make_html_table
+        html_path = os.path.join(output_directory, f"ridechecks[{timestamp_string()}].html")
+        make_html_table(multiple_day_assignments, roster.all_rides_time, html_path)
+
+    if history:
+        history.record(week_key(week_start), weekly_loads(multiple_day_assignments, roster.all_rides_time))
+
+    archive = ScheduleArchive(os.path.join(output_directory, "archive.sqlite3"))
+    archive.store(week_start, multiple_day_assignments, roster.all_rides_time)
+    archive.close()
+    return html_path
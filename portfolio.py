@@ -0,0 +1,93 @@
+from typing import Dict, List, Tuple, Set, Any
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from day_assignment import generate_day_assignment, load_spread, NoDayAssignment
+from solve_stats import SolveStats
+from util import derive_seed
+import time
+
+
+def solve_run(
+        worker_time: int,
+        rides_time: Dict[str, int],
+        workers_can_check: Dict[str, Set[str]],
+        seed: int | None,
+        solver_options: Dict[str, Any],
+        collect_stats: bool = False) -> Tuple[int, Dict[str, str], SolveStats | None]:
+    """
+    One randomized solve of the portfolio, returns the load spread, the assignment and, with collect_stats, its SolveStats.
+    Module level so that it can be sent to a worker process, which is why the stats are returned instead of filled in.
+    """
+    stats = SolveStats() if collect_stats else None
+    assignment = generate_day_assignment(worker_time, rides_time, workers_can_check, seed=seed, stats=stats, **solver_options)
+    return load_spread(assignment, rides_time, workers_can_check), assignment, stats
+
+
+def generate_day_assignment_portfolio(
+        worker_time: int,
+        rides_time: Dict[str, int],
+        workers_can_check: Dict[str, Set[str]],
+        runs: int = 8,
+        processes: int | None = None,
+        seed: int | None = None,
+        target_spread: int | None = None,
+        time_limit: float | None = None,
+        stats: SolveStats | None = None,
+        **solver_options: Any) -> Dict[str, str]:
+    """
+    Solve the same day `runs` times with independent seeds derived from seed, on a pool of
+    `processes` worker processes (None: one per core, 1: in this process), and return the
+    assignment with the smallest load spread. Ties go to the earliest run.
+
+    Stops early once an assignment with a spread of at most target_spread is found, or once
+    time_limit seconds have passed and at least one run has finished.
+    solver_options are passed on to generate_day_assignment (search, improve, time_budget...).
+    With stats, the counters and phase times of every finished run are added to it, and its spread is the one of the result.
+    Raises NoDayAssignment if the day has no assignment.
+    """
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+    start = time.perf_counter()
+    run_seeds = [derive_seed(seed, 'run', run) for run in range(runs)]
+    best: Tuple[int, int, Dict[str, str]] | None = None # spread, run, assignment
+    collect_stats = stats is not None
+
+    def add_run(run: int, spread: int, assignment: Dict[str, str], run_stats: SolveStats | None) -> None:
+        nonlocal best
+        if stats is not None and run_stats is not None:
+            stats.add(run_stats)
+        if best is None or (spread, run) < best[:2]:
+            best = spread, run, assignment
+
+    def is_done() -> bool:
+        if best is None:
+            return False
+        if target_spread is not None and best[0] <= target_spread:
+            return True
+        return time_limit is not None and time.perf_counter() - start >= time_limit
+
+    if processes == 1:
+        for run, run_seed in enumerate(run_seeds):
+            add_run(run, *solve_run(worker_time, rides_time, workers_can_check, run_seed, solver_options, collect_stats))
+            if is_done():
+                break
+    else:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        pending: Dict[Future, int] = {}
+        try:
+            for run, run_seed in enumerate(run_seeds):
+                pending[executor.submit(solve_run, worker_time, rides_time, workers_can_check, run_seed, solver_options, collect_stats)] = run
+            while pending and not is_done():
+                timeout = None if time_limit is None or best is None else max(0.0, time_limit - (time.perf_counter() - start))
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = pending.pop(future)
+                    add_run(run, *future.result()) # The search is complete, so NoDayAssignment from one run holds for all.
+        finally:
+            # Runs that have not started are dropped, runs in progress finish in the background.
+            executor.shutdown(wait=not pending, cancel_futures=True)
+
+    if best is None:
+        raise NoDayAssignment(f"No assignment exists for worker_time={worker_time}, ride_times={rides_time}, can_check={workers_can_check}")
+    if stats is not None:
+        stats.spread = best[0]
+    return best[2]
@@ -0,0 +1,91 @@
+from typing import Dict, List, Set, Any
+from dataclasses import dataclass
+from day_model import DayModel
+from day_assignment import find_assignment, hillclimb, NoDayAssignment, SearchMode
+from multiple_day_assignments import check_days_feasibility
+from util import derive_seed, day_problem, Day, DayInfo
+import random
+import time
+
+
+@dataclass
+class RepairResult:
+    assignment: Dict[str, str]
+    changed: int # Rides whose worker is not the one in the previous assignment, new rides included.
+    seconds: float
+
+
+def repair_day_assignment(
+        previous: Dict[str, str],
+        worker_time: int,
+        rides_time: Dict[str, int],
+        workers_can_check: Dict[str, Set[str]],
+        search: SearchMode = 'propagate',
+        seed: int | None = None) -> RepairResult:
+    """
+    Warm start from the previous assignment {ride: worker...} of the day instead of solving it from scratch.
+
+    Rides keep their previous worker unless the worker is absent or cannot check the ride.
+    Workers left with too little time (shorter day, longer rides) give up as few rides as they can.
+    The rides left over and the new rides are placed with the dfs and balanced with hillclimbing
+    that only moves those rides, so the rest of the schedule does not change. If the kept rides
+    leave no room for the others, the day is solved from scratch.
+    Raises NoDayAssignment if the day has no assignment.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    model = DayModel(worker_time, rides_time, workers_can_check)
+    for ride_id, ride in enumerate(model.rides):
+        worker_id = model.worker_ids.get(previous.get(ride, ''))
+        if worker_id is not None and (model.can_check[ride_id] >> worker_id) & 1:
+            model.assign(ride_id, worker_id)
+    for worker_id in range(len(model.workers)):
+        rides = [ride_id for ride_id, assigned_worker in enumerate(model.assignment) if assigned_worker == worker_id]
+        while model.remaining[worker_id] < 0:
+            # Give up the shortest ride that is enough on its own, otherwise the longest ride.
+            excess = -model.remaining[worker_id]
+            enough = [ride_id for ride_id in rides if model.ride_time[ride_id] >= excess]
+            ride_id = min(enough, key=lambda ride_id: model.ride_time[ride_id]) if enough else max(rides, key=lambda ride_id: model.ride_time[ride_id])
+            rides.remove(ride_id)
+            model.unassign(ride_id)
+    kept = {ride_id for ride_id, worker_id in enumerate(model.assignment) if worker_id != -1}
+    movable: Set[int] | None = set(range(len(model.rides))) - kept
+    if not find_assignment(model, rng, search):
+        for ride_id in kept:
+            model.unassign(ride_id)
+        movable = None
+        if not find_assignment(model, rng, search):
+            raise NoDayAssignment(f"No assignment exists for worker_time={worker_time}, ride_times={rides_time}, can_check={workers_can_check}")
+    hillclimb(model, rng, movable)
+    assignment = model.to_dict()
+    changed = sum(1 for ride, worker in assignment.items() if previous.get(ride) != worker)
+    return RepairResult(assignment, changed, time.perf_counter() - start)
+
+
+def repair_multiple_day_assignments(
+        previous: Dict[Day, Dict[str, str]],
+        days_info: Dict[Day, DayInfo],
+        all_rides_time: Dict[str, int],
+        all_workers_can_check: Dict[str, Set[str]],
+        seed: int | None = None,
+        **repair_options: Any) -> Dict[Day, RepairResult]:
+    """
+    Repair every day in days_info starting from previous {day: {ride: worker...}...}, keeping the order of days_info.
+    Days missing from previous are solved from scratch.
+    Raises NoDayAssignment naming every day that has no assignment.
+    """
+    problems = {day: day_problem(day_info, all_rides_time, all_workers_can_check) for day, day_info in days_info.items()}
+    check_days_feasibility(problems)
+    results: Dict[Day, RepairResult] = {}
+    failed_days: List[Day] = []
+    for day, (worker_time, day_ride_times, day_can_check) in problems.items():
+        if worker_time == 0:
+            results[day] = RepairResult({}, 0, 0.0)
+            continue
+        try:
+            results[day] = repair_day_assignment(previous.get(day) or {}, worker_time, day_ride_times, day_can_check, seed=derive_seed(seed, day), **repair_options)
+        except NoDayAssignment:
+            failed_days.append(day)
+    if failed_days:
+        raise NoDayAssignment("; ".join(f"No assignment exists for day '{day}'" for day in failed_days))
+    return results
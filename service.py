@@ -0,0 +1,231 @@
+# Local HTTP/JSON scheduling service that keeps the roster loaded between requests.
+# For example: python service.py --port 8765, then
+#   curl localhost:8765/schedule
+#   curl -X PATCH localhost:8765/days/wed -d '{"uaworkers": {"add": ["bob"]}, "time": 45}'
+#
+# GET /roster                  days_info of the roster in memory.
+# PATCH /days/<day>            change one day with a delta: {"time": minutes, "uaworkers": {"add": [...], "remove": [...]}, "uarides": {...}}.
+# GET /days/<day>/schedule     assignment {ride: worker...} of one day, balanced on its own.
+# GET /schedule                assignments of every day {day: {ride: worker...}...}, balanced over the week.
+# POST /reload                 read the input folder again.
+
+from typing import Dict, List, Tuple, Any, get_args
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from day_assignment import NoDayAssignment
+from multiple_day_assignments import solve_day
+from week_balance import balance_week
+from pipeline import load_roster, validate_day_info, Roster, InputError
+from util import derive_seed, day_problem, Day, DayInfo
+import argparse
+import asyncio
+import copy
+import json
+import multiprocessing
+import traceback
+
+DAYS: List[Day] = list(get_args(Day))
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class ScheduleService:
+    """
+    Keeps the roster in memory and solves on executor, off the event loop.
+
+    Every day has a version that changes when the day is edited (or the roster is reloaded).
+    The solve of a day is kept per version, so a day is only solved again after it changed,
+    and clients asking for the same day at the same time share one solve. The week balance
+    of the current versions of all days is kept the same way, it works on a copy of days_info taken
+    when it starts, so days edited while the week is solving do not affect it.
+    Every day is solved with a seed derived from seed and the day, like generate_multiple_day_assignments,
+    so with the same seed the schedule is the same as the one main.py generates without cache and history.
+    """
+    def __init__(self, roster: Roster, executor: Executor, seed: int | None = None, week_balance: bool = True, input_directory: str = "input", **solver_options: Any):
+        self.roster = roster
+        self.executor = executor
+        self.seed = seed
+        self.week_balance = week_balance
+        self.input_directory = input_directory
+        self.solver_options = solver_options
+        self.version = 0
+        self.day_versions: Dict[Day, int] = {day: 0 for day in roster.days_info}
+        self.day_solves: Dict[Day, Tuple[int, asyncio.Future]] = {}
+        self.week_solve: Tuple[Tuple[int, ...], asyncio.Future] | None = None
+
+    def edit_day(self, day: str, delta: Any) -> DayInfo:
+        """
+        Apply a delta to day, a day that is not in days_info yet starts with no time.
+        Raises InputError, leaving the day as it was, if the delta or the new day does not follow format.
+        """
+        if day not in DAYS:
+            raise InputError(f"Unknown day '{day}', expected one of {', '.join(DAYS)}")
+        if type(delta) != dict or any(key not in ["time", "uaworkers", "uarides"] for key in delta):
+            raise InputError("A day delta is an object with 'time', 'uaworkers' and/or 'uarides'")
+        day_info: DayInfo = dict(self.roster.days_info.get(day) or {'time': 0, 'uaworkers': [], 'uarides': []}) # type: ignore
+        if 'time' in delta:
+            day_info['time'] = delta['time']
+        for key in ["uaworkers", "uarides"]:
+            if key not in delta:
+                continue
+            changes = delta[key]
+            if type(changes) != dict or any(change not in ["add", "remove"] for change in changes):
+                raise InputError(f"'{key}' of a day delta is an object with 'add' and/or 'remove' lists")
+            unavailable = [name for name in day_info.get(key, []) if name not in changes.get('remove', [])]
+            unavailable += [name for name in changes.get('add', []) if name not in unavailable]
+            day_info[key] = unavailable # type: ignore
+        validate_day_info(day, day_info, self.roster.all_rides_time, self.roster.all_workers_can_check)
+        self.roster.days_info[day] = day_info # type: ignore
+        self.version += 1
+        self.day_versions[day] = self.version # type: ignore
+        return day_info
+
+    def reload(self) -> None:
+        self.roster = load_roster(self.input_directory)
+        self.version += 1
+        self.day_versions = {day: self.version for day in self.roster.days_info}
+
+    def day_future(self, day: Day) -> asyncio.Future:
+        version = self.day_versions[day]
+        if day in self.day_solves and self.day_solves[day][0] == version:
+            return self.day_solves[day][1]
+        problem = day_problem(self.roster.days_info[day], self.roster.all_rides_time, self.roster.all_workers_can_check)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, solve_day, day, *problem, derive_seed(self.seed, day), self.solver_options)
+        self.day_solves[day] = version, future
+        return future
+
+    async def day_assignment(self, day: Day) -> Dict[str, str]:
+        if day not in self.roster.days_info:
+            raise KeyError(day)
+        return await asyncio.shield(self.day_future(day))
+
+    async def schedule(self) -> Dict[Day, Dict[str, str]]:
+        days = list(self.roster.days_info)
+        versions = tuple(self.day_versions[day] for day in days)
+        if self.week_solve is None or self.week_solve[0] != versions:
+            # The days are copied together with their versions, and their solves started right away, before any edit can land.
+            days_info = {day: copy.deepcopy(self.roster.days_info[day]) for day in days}
+            day_futures = [self.day_future(day) for day in days]
+            self.week_solve = versions, asyncio.ensure_future(self.solve_week(self.roster, days_info, day_futures))
+        return await asyncio.shield(self.week_solve[1])
+
+    async def solve_week(self, roster: Roster, days_info: Dict[Day, DayInfo], day_futures: List[asyncio.Future]) -> Dict[Day, Dict[str, str]]:
+        """
+        Balance the solves of the days of days_info over the week, roster is the one they were taken from.
+        """
+        days = list(days_info)
+        results = await asyncio.gather(*day_futures, return_exceptions=True)
+        errors = [str(result) for result in results if isinstance(result, NoDayAssignment)]
+        if errors:
+            raise NoDayAssignment("; ".join(errors))
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        multiple_day_assignments: Dict[Day, Dict[str, str]] = dict(zip(days, results)) # type: ignore
+        if not self.week_balance:
+            return multiple_day_assignments
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, balance_week, multiple_day_assignments, days_info, roster.all_rides_time, roster.all_workers_can_check, None, self.seed
+        )
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """
+        Answer one request, returns the HTTP status and the JSON response.
+        """
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        try:
+            if parts == ["roster"]:
+                if method != "GET":
+                    return 405, {'error': "Use GET"}
+                return 200, {'days_info': self.roster.days_info, 'version': self.version}
+            if parts == ["schedule"]:
+                if method != "GET":
+                    return 405, {'error': "Use GET"}
+                return 200, {'schedule': await self.schedule(), 'version': self.version}
+            if parts == ["reload"]:
+                if method != "POST":
+                    return 405, {'error': "Use POST"}
+                self.reload()
+                return 200, {'days_info': self.roster.days_info, 'version': self.version}
+            if len(parts) == 2 and parts[0] == "days":
+                if method != "PATCH":
+                    return 405, {'error': "Use PATCH"}
+                return 200, {'day': parts[1], 'day_info': self.edit_day(parts[1], json.loads(body or b"{}")), 'version': self.version}
+            if len(parts) == 3 and parts[0] == "days" and parts[2] == "schedule":
+                if method != "GET":
+                    return 405, {'error': "Use GET"}
+                if parts[1] not in self.roster.days_info:
+                    return 404, {'error': f"Day '{parts[1]}' is not in days_info"}
+                return 200, {'day': parts[1], 'assignment': await self.day_assignment(parts[1]), 'version': self.version} # type: ignore
+            return 404, {'error': f"Unknown path '{path}'"}
+        except (InputError, json.JSONDecodeError) as e:
+            return 400, {'error': str(e)}
+        except NoDayAssignment as e:
+            return 422, {'error': str(e)}
+        except Exception as e:
+            # A bug answers this request with an error instead of dropping the connection, the service keeps running.
+            traceback.print_exc()
+            return 500, {'error': f"Internal error: {e!r}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        One HTTP/1.1 request per connection.
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers: Dict[str, str] = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) != 3:
+                status, response = 400, {'error': "Malformed request"}
+            else:
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                status, response = await self.handle(request_line[0], request_line[1], body)
+            payload = json.dumps(response).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve schedules of the input folder over HTTP, keeping it loaded between requests.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: only this computer).")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--processes", type=int, default=None, help="Number of days solved at the same time (default: one per core, 1: in a thread of this process).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible schedules.")
+    parser.add_argument("--no-week-balance", action="store_true", help="Only balance every day on its own, not the weekly totals of the workers.")
+    args = parser.parse_args()
+
+    try:
+        roster = load_roster("input")
+    except InputError as e:
+        print(f"{e}.")
+        return
+    executor = ThreadPoolExecutor(1) if args.processes == 1 else ProcessPoolExecutor(args.processes)
+    service = ScheduleService(roster, executor, seed=args.seed, week_balance=not args.no_week_balance)
+
+    async def serve_forever() -> None:
+        server = await service.serve(args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
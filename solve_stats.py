@@ -0,0 +1,57 @@
+from typing import Dict, Any
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class SolveStats:
+    """
+    What a solve spent its time on, filled in by the solver when passed as stats=.
+
+    nodes: dfs steps, backtracks: dfs dead ends (a ride with no worker left to try), restarts: times the dfs started over.
+    moves: rides moved while improving (hillclimb transfers, accepted anneal moves, vectorized transfers and swaps, week balance transfers).
+    phases: seconds per phase, e.g. 'search', 'hillclimb' (or 'vectorized'), 'anneal' for a day,
+    'feasibility', 'cache', 'solve', 'balance' for a week.
+    spread: load spread (max - min worker load) of the result, for a week of the weekly totals.
+    days: stats of every day of a week, cached days were read from the cache and not solved.
+    """
+    nodes: int = 0
+    backtracks: int = 0
+    restarts: int = 0
+    moves: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+    spread: int | None = None
+    cached: bool = False
+    days: Dict[str, 'SolveStats'] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.phases.values())
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add(self, other: 'SolveStats') -> None:
+        """
+        Add the counters and phase times of other, e.g. of a solve made in another process.
+        """
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.restarts += other.restarts
+        self.moves += other.moves
+        for phase, seconds in other.phases.items():
+            self.add_phase(phase, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'seconds': self.seconds}
+
+    def summary(self) -> str:
+        lines = [self.line('total')]
+        for day, day_stats in self.days.items():
+            lines.append(day_stats.line(day))
+        return "\n".join(lines)
+
+    def line(self, name: str) -> str:
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+        if self.cached:
+            return f"{name}: from cache, spread {self.spread}"
+        return f"{name}: {self.seconds:.3f}s ({phases}), {self.nodes} nodes, {self.backtracks} backtracks, {self.restarts} restarts, {self.moves} moves, spread {self.spread}"
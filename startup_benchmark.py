@@ -0,0 +1,92 @@
+# Startup time of main.py, cold (a fresh copy of the program, nothing compiled yet, like the first run after unzipping) and warm (run again).
+# For example: python startup_benchmark.py --repeats 10 --budget 0.1 --output startup_benchmark.json
+# Exits with status 1 if the median cold start of 'main.py --help' is over the budget (in seconds).
+
+from typing import Dict, List, Any
+from benchmark import git_commit
+from gui_benchmark import write_roster
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# What is timed: startup alone, and a small week (one day at a time) written as YAML only and with the HTML table.
+COMMANDS: Dict[str, List[str]] = {
+    'help': ["--help"],
+    'yaml': ["--no-html", "--no-cache", "--processes", "1", "--seed", "0"],
+    'html': ["--no-cache", "--processes", "1", "--seed", "0"],
+}
+
+
+def copy_program(directory: str, rides: int, workers: int, seed: int) -> None:
+    """
+    The modules (not the tests) and template.html of this folder, without any __pycache__, and a roster of rides rides and workers workers.
+    """
+    source = os.path.dirname(os.path.abspath(__file__))
+    for path in glob.glob(os.path.join(source, "*.py")) + [os.path.join(source, "template.html")]:
+        if not os.path.basename(path).startswith("test_"):
+            shutil.copy(path, directory)
+    write_roster(directory, rides, workers, seed)
+
+
+def time_run(directory: str, arguments: List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", *arguments], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def run_startup_benchmark(repeats: int = 5, rides: int = 20, workers: int = 8, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    {command: {'cold': seconds, 'warm': seconds}...}, medians of repeats runs of every command of COMMANDS.
+    Every cold run is the first run of a new copy of the program, its warm run comes right after it in the same copy.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for command, arguments in COMMANDS.items():
+        cold, warm = [], []
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as directory:
+                copy_program(directory, rides, workers, seed)
+                cold.append(time_run(directory, arguments))
+                warm.append(time_run(directory, arguments))
+        results[command] = {'cold': statistics.median(cold), 'warm': statistics.median(warm)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long main.py takes to start, cold and warm.")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs of every command, the medians are reported.")
+    parser.add_argument("--rides", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=None, help="Seconds the median cold start of 'main.py --help' may take.")
+    parser.add_argument("--output", default=None, help="JSON file to write the results to.")
+    args = parser.parse_args()
+
+    results = run_startup_benchmark(args.repeats, args.rides, args.workers, args.seed)
+    result: Dict[str, Any] = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'rides': args.rides,
+        'workers': args.workers,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+    for command, seconds in results.items():
+        print(f"{command:<5} cold {seconds['cold']:.3f}s  warm {seconds['warm']:.3f}s")
+    if args.budget is not None and results['help']['cold'] > args.budget:
+        print(f"Cold start {results['help']['cold']:.3f}s is over the budget of {args.budget:.3f}s.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
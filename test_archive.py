@@ -0,0 +1,37 @@
+from archive import ScheduleArchive, week_start_of
+from make_html_table import make_history_html
+from datetime import date
+
+
+def test_archive(tmp_path):
+    rides_time = {'wooden': 20, 'metal': 10, 'red': 5}
+    archive = ScheduleArchive(str(tmp_path / "archive.sqlite3"))
+    archive.store(date(2026, 10, 5), {'mon': {'wooden': 'bob', 'metal': 'john'}, 'tue': {'wooden': 'john', 'red': 'bob'}}, rides_time) # type: ignore
+    archive.store(date(2026, 10, 12), {'mon': {'wooden': 'josh', 'metal': 'bob'}}, rides_time) # type: ignore
+    assert archive.who_checked('wooden', 'mon') == [('2026-10-05', 'bob'), ('2026-10-12', 'josh')]
+    assert archive.who_checked('wooden', since=date(2026, 10, 6), until=date(2026, 10, 11)) == [('2026-10-06', 'john')]
+    assert archive.worker_minutes('bob') == 35
+    assert archive.worker_minutes('bob', since=date(2026, 10, 6)) == 15
+    # Generating a week again replaces its schedule.
+    archive.store(date(2026, 10, 12), {'mon': {'wooden': 'bob', 'metal': 'josh'}}, rides_time) # type: ignore
+    assert archive.worker_checks('bob', since=date(2026, 10, 12)) == [('2026-10-12', 'wooden', 20)]
+    assert archive.worker_minutes('nobody') == 0
+    archive.close()
+    assert week_start_of(date(2026, 10, 18)) == date(2026, 10, 12)
+
+
+def test_archive_history(tmp_path):
+    rides_time = {'wooden': 20, 'metal': 10}
+    archive = ScheduleArchive(str(tmp_path / "archive.sqlite3"))
+    archive.store(date(2026, 10, 12), {'mon': {'wooden': 'josh', 'metal': 'bob'}}, rides_time) # type: ignore
+    archive.store(date(2026, 10, 5), {'mon': {'wooden': 'bob', 'metal': 'john'}, 'tue': {'wooden': 'john'}}, rides_time) # type: ignore
+    assert list(archive.week_rows(until=date(2026, 10, 11))) == [
+        ('2026-10-05', 'wooden', 'mon', 'bob'), ('2026-10-05', 'wooden', 'tue', 'john'), ('2026-10-05', 'metal', 'mon', 'john')
+    ]
+    assert archive.worker_totals() == [('bob', 2, 30), ('john', 2, 30), ('josh', 1, 20)]
+    html_path = str(tmp_path / "history.html")
+    make_history_html(archive.week_rows(), archive.worker_totals(), html_path)
+    archive.close()
+    with open(html_path) as f:
+        html = f.read()
+    assert html.index("Week of 2026-10-05") < html.index("Week of 2026-10-12")
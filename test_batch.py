@@ -0,0 +1,81 @@
+import io
+import json
+import yaml
+from batch import run_batch, jsonl_instances, manifest_instances, SharedRosters
+from pipeline import InputError
+import pytest
+
+RIDES_TIME = {'wooden': 10, 'scary': 5, 'fast': 5}
+WORKERS_CANNOT_CHECK = {'bob': ['fast'], 'alice': [], 'john': ['wooden']}
+
+
+def day_info(time, uaworkers=[]):
+    return {'time': time, 'uaworkers': uaworkers, 'uarides': []}
+
+
+def test_run_batch_jsonl(tmp_path):
+    instances = [
+        {'id': 'week1', 'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': day_info(10), 'tue': day_info(20)}},
+        {'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': day_info(5, ['alice'])}, 'seed': 3},
+        {'id': 'typo', 'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': day_info(10, ['josh'])}},
+        {'id': 'partial', 'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': {'time': 20}}},
+    ]
+    path = tmp_path / "instances.jsonl"
+    path.write_text("\n".join(json.dumps(instance) for instance in instances) + "\n{not json\n")
+    out = io.StringIO()
+    assert run_batch(jsonl_instances(str(path)), out, processes=2, seed=0) == (1, 4)
+    results = {result['id']: result for result in map(json.loads, out.getvalue().splitlines())}
+    assert set(results) == {'week1', '2', 'typo', 'partial', '5'}
+    assert results['week1']['status'] == 'ok'
+    assert set(results['week1']['schedule']) == {'mon', 'tue'}
+    assert set(results['week1']['schedule']['tue']) == set(RIDES_TIME)
+    assert "No assignment exists for day 'mon'" in results['2']['error']
+    assert "'josh'" in results['typo']['error']
+    assert "day 'mon' has no 'uaworkers'" in results['partial']['error']
+    assert results['5']['status'] == 'error' and results['5']['index'] == 4
+
+
+def test_run_batch_solver_error(tmp_path):
+    # An error in a worker process is reported for its instance instead of stopping the batch.
+    path = tmp_path / "instances.jsonl"
+    instance = {'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': day_info(10)}}
+    path.write_text(json.dumps(instance) + "\n" + json.dumps(instance) + "\n")
+    out = io.StringIO()
+    assert run_batch(jsonl_instances(str(path)), out, processes=1, no_such_option=True) == (0, 2)
+    assert all('TypeError' in json.loads(line)['error'] for line in out.getvalue().splitlines())
+
+
+def test_run_batch_bad_roster(tmp_path):
+    # A roster that does not follow the format is reported for its instance, the next one is still solved.
+    path = tmp_path / "instances.jsonl"
+    bad = {'id': 'bad', 'rides_time': RIDES_TIME, 'workers_cannot_check': {'bob': [['wooden']]}, 'days_info': {'mon': day_info(10)}}
+    good = {'id': 'good', 'rides_time': RIDES_TIME, 'workers_cannot_check': WORKERS_CANNOT_CHECK, 'days_info': {'mon': day_info(10)}}
+    path.write_text(json.dumps(bad) + "\n" + json.dumps(good) + "\n")
+    out = io.StringIO()
+    assert run_batch(jsonl_instances(str(path)), out, processes=1, seed=0) == (1, 1)
+    results = {result['id']: result for result in map(json.loads, out.getvalue().splitlines())}
+    assert "does not follow format" in results['bad']['error']
+    assert results['good']['status'] == 'ok'
+
+
+def test_manifest_instances(tmp_path):
+    park = tmp_path / "park"
+    park.mkdir()
+    for name, data in [("rides_time.yaml", RIDES_TIME), ("workers_cannot_check.yaml", WORKERS_CANNOT_CHECK), ("days_info.yaml", {'mon': day_info(10)})]:
+        (park / name).write_text(yaml.safe_dump(data))
+    manifest = tmp_path / "parks.txt"
+    manifest.write_text("# Parks\npark\n\nmissing\n")
+    instances = list(manifest_instances(str(manifest)))
+    assert [(instance.index, instance.id) for instance in instances] == [(0, 'park'), (1, 'missing')]
+    assert instances[0].data == (RIDES_TIME, WORKERS_CANNOT_CHECK, {'mon': day_info(10)})
+    assert instances[1].data is None and 'missing' in instances[1].error
+
+
+def test_shared_rosters():
+    rosters = SharedRosters(size=1)
+    first = rosters.roster(dict(RIDES_TIME), dict(WORKERS_CANNOT_CHECK), {'mon': day_info(10)})
+    second = rosters.roster(dict(RIDES_TIME), dict(WORKERS_CANNOT_CHECK), {'tue': day_info(20)})
+    assert second.all_workers_can_check is first.all_workers_can_check
+    assert first.all_workers_can_check['bob'] == {'wooden', 'scary'}
+    with pytest.raises(InputError):
+        rosters.roster({'wooden': 'ten'}, {}, {})
@@ -0,0 +1,17 @@
+from benchmark import generate_instance, generate_week_instance, run_benchmark
+
+
+def test_generate_instance():
+    worker_time, rides_time, can_check = generate_instance(100, 8, 0.9, 0.8, seed=3)
+    assert (worker_time, rides_time, can_check) == generate_instance(100, 8, 0.9, 0.8, seed=3)
+    assert len(rides_time) == 100 and len(can_check) == 8
+    assert set().union(*can_check.values()) == set(rides_time)
+    assert worker_time * 8 * 0.8 >= sum(rides_time.values())
+    days_info, _, _ = generate_week_instance(100, 8, 0.9, 0.8, seed=3)
+    assert sum(1 for day_info in days_info.values() if day_info['time'] == 0) == 1
+
+
+def test_run_benchmark():
+    records = run_benchmark({'rides': [30], 'workers': [5], 'density': [0.2], 'tightness': [0.7]}, repeats=2)
+    assert [record['kind'] for record in records] == ['day', 'week', 'day', 'week']
+    assert all(record['status'] == 'ok' and record['spread'] is not None for record in records)
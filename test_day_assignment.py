@@ -1,6 +1,9 @@
 from typing import Dict, List, Tuple, Set, Iterable, Callable
+import random
 import pytest
-from day_assignment import generate_day_assignment
+from day_assignment import generate_day_assignment, load_spread, luby, NoDayAssignment
+from benchmark import generate_instance
+from solve_stats import SolveStats
 
 
 def is_valid_assignment(assignment: Dict[str, str], worker_time: int, ride_times: Dict[str, int], can_check: Dict[str, Set[str]]) -> bool:
@@ -35,5 +38,147 @@ def test_generate_day_assignment():
     assert is_valid_assignment(assignment, worker_time, ride_times, can_check)
 
 
+def test_generate_day_assignment_ignores_closed_rides():
+    worker_time = 10
+    ride_times = {
+        'scary': 4,
+        'slow': 5,
+    }
+    can_check = {
+        'bob': {'wooden', 'scary'},
+        'john': {'wooden', 'slow'},
+    }
+    assignment = generate_day_assignment(worker_time, ride_times, can_check)
+    assert assignment == {'scary': 'bob', 'slow': 'john'}
+
+
+def test_generate_day_assignment_infeasible():
+    ride_times = {
+        'wooden': 10,
+        'fast': 5
+    }
+    can_check = {
+        'bob': {'wooden', 'fast'},
+    }
+    with pytest.raises(NoDayAssignment):
+        generate_day_assignment(12, ride_times, can_check)
+
+
+def test_generate_day_assignment_tight_day():
+    # 30 rides of 3 minutes fit exactly into 3 workers with 30 minutes, with one minute less they do not.
+    ride_times = {f'ride{i}': 3 for i in range(30)}
+    can_check = {worker: set(ride_times) for worker in ['bob', 'john', 'josh']}
+    for search in ['plain', 'propagate']:
+        assignment = generate_day_assignment(30, ride_times, can_check, search=search)
+        assert is_valid_assignment(assignment, 30, ride_times, can_check)
+    with pytest.raises(NoDayAssignment):
+        generate_day_assignment(29, ride_times, can_check)
+
+
+def test_generate_day_assignment_same_seed():
+    ride_times = {f'ride{i}': i % 7 + 1 for i in range(40)}
+    can_check = {f'worker{j}': {ride for i, ride in enumerate(ride_times) if i % 5 != j} for j in range(5)}
+    assert generate_day_assignment(40, ride_times, can_check, seed=3) == generate_day_assignment(40, ride_times, can_check, seed=3)
+
+
+def test_generate_day_assignment_many_rides():
+    # Far more rides than the recursion limit.
+    rng = random.Random(0)
+    ride_times = {f'ride{i}': rng.randint(1, 10) for i in range(5000)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.8} for j in range(20)}
+    worker_time = sum(ride_times.values()) // 16
+    for search in ['plain', 'propagate']:
+        assignment = generate_day_assignment(worker_time, ride_times, can_check, search=search, seed=1)
+        assert len(assignment) == len(ride_times)
+        assert is_valid_assignment(assignment, worker_time, ride_times, can_check)
+
+
+def test_generate_day_assignment_local_optimum():
+    rng = random.Random(1)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(200)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(20)}
+    worker_time = sum(ride_times.values()) // 16
+    assignment = generate_day_assignment(worker_time, ride_times, can_check, seed=2)
+    remaining = {worker: worker_time for worker in can_check}
+    for ride, worker in assignment.items():
+        remaining[worker] -= ride_times[ride]
+    # No single transfer of a ride to a less loaded worker narrows the gap between the two workers.
+    for ride, worker in assignment.items():
+        for other in can_check:
+            if ride in can_check[other]:
+                assert remaining[other] - remaining[worker] <= ride_times[ride]
+
+
+def test_load_spread():
+    ride_times = {'wooden': 10, 'scary': 1, 'fast': 5}
+    assert load_spread({'wooden': 'bob', 'scary': 'john', 'fast': 'john'}, ride_times, ['bob', 'john']) == 4
+    assert load_spread({'wooden': 'bob', 'scary': 'john', 'fast': 'john'}, ride_times, ['bob', 'john', 'josh']) == 10
+
+
+def test_generate_day_assignment_anneal():
+    rng = random.Random(4)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(100)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(10)}
+    worker_time = sum(ride_times.values()) // 8
+    hillclimbed = generate_day_assignment(worker_time, ride_times, can_check, seed=5)
+    annealed = generate_day_assignment(worker_time, ride_times, can_check, seed=5, improve='anneal', max_iterations=20000)
+    assert is_valid_assignment(annealed, worker_time, ride_times, can_check)
+    assert len(annealed) == len(ride_times)
+    # Annealing starts from the hillclimbing result and keeps the best assignment it sees.
+    assert load_spread(annealed, ride_times, can_check) <= load_spread(hillclimbed, ride_times, can_check)
+
+
+def test_generate_day_assignment_anneal_no_budget():
+    worker_time, ride_times, can_check = 60, {f'ride{i}': 5 + i % 7 for i in range(20)}, {f'worker{j}': {f'ride{i}' for i in range(20)} for j in range(4)}
+    hillclimbed = generate_day_assignment(worker_time, ride_times, can_check, seed=2)
+    assert generate_day_assignment(worker_time, ride_times, can_check, seed=2, improve='anneal', max_iterations=0) == hillclimbed
+    assert generate_day_assignment(worker_time, ride_times, can_check, seed=2, improve='anneal', time_budget=0) == hillclimbed
+
+
+def test_generate_day_assignment_stats():
+    rng = random.Random(4)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(100)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(10)}
+    worker_time = sum(ride_times.values()) // 9
+    stats = SolveStats()
+    assignment = generate_day_assignment(worker_time, ride_times, can_check, seed=1, improve='anneal', max_iterations=1000, stats=stats)
+    assert assignment == generate_day_assignment(worker_time, ride_times, can_check, seed=1, improve='anneal', max_iterations=1000)
+    assert stats.nodes >= len(ride_times) and stats.moves > 0
+    assert list(stats.phases) == ['search', 'hillclimb', 'anneal']
+    assert stats.spread == load_spread(assignment, ride_times, can_check)
+
+
+def test_generate_day_assignment_vectorized():
+    pytest.importorskip("numpy")
+    rng = random.Random(4)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(100)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(10)}
+    worker_time = sum(ride_times.values()) // 8
+    stats = SolveStats()
+    assignment = generate_day_assignment(worker_time, ride_times, can_check, seed=5, improve='vectorized', stats=stats)
+    assert is_valid_assignment(assignment, worker_time, ride_times, can_check)
+    assert len(assignment) == len(ride_times)
+    assert list(stats.phases) == ['search', 'vectorized']
+    # No improving transfer is left, like after hillclimbing.
+    remaining = {worker: worker_time for worker in can_check}
+    for ride, worker in assignment.items():
+        remaining[worker] -= ride_times[ride]
+    for ride, worker in assignment.items():
+        for other in can_check:
+            if ride in can_check[other]:
+                assert remaining[other] - remaining[worker] <= ride_times[ride]
+
+
+def test_generate_day_assignment_restarts():
+    assert [luby(attempt) for attempt in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    # 803 of 808 minutes used: without restarts most seeds search for minutes, with them every seed takes milliseconds.
+    worker_time, ride_times, can_check = generate_instance(44, 8, 0.4, 0.995, seed=0)
+    stats = SolveStats()
+    for seed in range(10):
+        assignment = generate_day_assignment(worker_time, ride_times, can_check, seed=seed, stats=stats, search_time_limit=10)
+        assert is_valid_assignment(assignment, worker_time, ride_times, can_check)
+    assert stats.restarts > 0
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,41 @@
+import os
+import time
+from typing import Dict
+import multiple_day_assignments
+from multiple_day_assignments import generate_multiple_day_assignments, Day, DayInfo
+from day_cache import DayCache
+
+
+def test_day_cache(tmp_path):
+    cache = DayCache(str(tmp_path), max_entries=2)
+    keys = [cache.key(10, {'wooden': i}, {'bob': {'wooden', 'fast'}}, None, {}) for i in range(3)]
+    assert len(set(keys)) == 3
+    # Rides a worker can check that are closed today do not change the key.
+    assert cache.key(10, {'wooden': 0}, {'bob': {'wooden'}}, None, {}) == keys[0]
+    for key in keys[:2]:
+        cache.put(key, {'wooden': 'bob'})
+        time.sleep(0.01)
+    assert cache.get(keys[0]) == {'wooden': 'bob'}  # keys[0] is now the most recently used.
+    cache.put(keys[2], {'wooden': 'bob'})
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_generate_multiple_day_assignments_cache(tmp_path, monkeypatch):
+    week_info: Dict[Day, DayInfo] = {
+        'mon': {'time': 20, 'uaworkers': [], 'uarides': []},
+        'tue': {'time': 20, 'uaworkers': ['john'], 'uarides': []},
+    }
+    all_ride_times = {'wooden': 10, 'scary': 1, 'fast': 5}
+    all_can_check = {'bob': {'wooden', 'scary', 'fast'}, 'john': {'wooden', 'scary'}}
+    cache = DayCache(str(tmp_path))
+    first = generate_multiple_day_assignments(week_info, all_ride_times, all_can_check, seed=1, cache=cache)
+    solved_days = []
+    generate_single_day = multiple_day_assignments.generate_single_day
+    monkeypatch.setattr(multiple_day_assignments, 'generate_single_day', lambda *args: solved_days.append(args) or generate_single_day(*args))
+    week_info['tue']['uarides'] = ['scary']
+    second = generate_multiple_day_assignments(week_info, all_ride_times, all_can_check, seed=1, cache=cache)
+    assert second['mon'] == first['mon']
+    assert len(solved_days) == 1  # Only the day that changed is solved again.
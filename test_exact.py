@@ -0,0 +1,25 @@
+import random
+from exact import generate_exact_day_assignment, max_load
+from test_day_assignment import is_valid_assignment
+
+
+def test_generate_exact_day_assignment():
+    ride_times = {'wooden': 5, 'metal': 5, 'red': 4, 'slow': 3, 'fast': 3, 'scary': 2}
+    can_check = {'bob': set(ride_times), 'john': set(ride_times), 'josh': {'slow', 'fast', 'scary'}}
+    initial = {'wooden': 'bob', 'metal': 'bob', 'red': 'john', 'slow': 'john', 'fast': 'john', 'scary': 'josh'}
+    result = generate_exact_day_assignment(20, ride_times, can_check, initial=initial, seed=0)
+    assert is_valid_assignment(result.assignment, 20, ride_times, can_check)
+    assert len(result.assignment) == len(ride_times)
+    # 22 minutes over 3 workers needs a max load of 8, and wooden + red or metal + red is 9.
+    assert result.max_load == max_load(result.assignment, ride_times) == 9
+    assert result.optimal
+
+
+def test_generate_exact_day_assignment_time_limit():
+    rng = random.Random(0)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(200)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(20)}
+    result = generate_exact_day_assignment(sum(ride_times.values()) // 15, ride_times, can_check, time_limit=0, seed=0)
+    assert is_valid_assignment(result.assignment, sum(ride_times.values()) // 15, ride_times, can_check)
+    assert result.lower_bound <= result.max_load
+    assert result.gap == result.max_load - result.lower_bound
@@ -0,0 +1,25 @@
+from feasibility import check_day_feasibility
+
+
+def test_check_day_feasibility():
+    ride_times = {'wooden': 8, 'metal': 8, 'scary': 8, 'red': 5, 'slow': 5}
+    can_check = {
+        'bob': {'wooden', 'metal', 'scary', 'red', 'slow'},
+        'john': {'wooden', 'metal', 'scary', 'red', 'slow'},
+        'josh': {'red', 'slow'},
+    }
+    assert check_day_feasibility(12, ride_times, can_check) is None
+    # Only bob and john can check the three 8 minute rides.
+    infeasibility = check_day_feasibility(10, ride_times, can_check)
+    assert infeasibility is not None
+    assert infeasibility.rides == ['wooden', 'metal', 'scary']
+    assert infeasibility.workers == ['bob', 'john']
+    assert (infeasibility.rides_time, infeasibility.workers_time) == (24, 20)
+
+
+def test_check_day_feasibility_single_rides():
+    infeasibility = check_day_feasibility(8, {'wooden': 9, 'fast': 1, 'slow': 1}, {'bob': {'wooden', 'fast'}, 'john': {'fast'}})
+    assert infeasibility is not None
+    assert infeasibility.untrained_rides == ['slow']
+    assert infeasibility.too_long_rides == ['wooden']
+    assert "'slow'" in infeasibility.message() and "'wooden'" in infeasibility.message()
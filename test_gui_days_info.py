@@ -0,0 +1,60 @@
+import os
+import pytest
+pytest.importorskip("PySide6")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+from gui_days_info import NameModel, ChosenWidget, DaysWidget
+
+
+def test_name_model():
+    app = QApplication.instance() or QApplication([])
+    model = NameModel(None, ['a', 'b', 'c', 'a'])
+    assert model.names == ['a', 'b', 'c']
+    model.remove('a') # The last name takes its row.
+    assert model.names == ['c', 'b']
+    assert model.row_of == {'c': 0, 'b': 1}
+    model.add('d')
+    model.add('b')
+    assert model.names == ['c', 'b', 'd']
+    assert model.rowCount() == 3 and model.index(2).data() == 'd'
+
+
+def test_chosen_widget():
+    app = QApplication.instance() or QApplication([])
+    all_model = NameModel(None, ['bob', 'alice', 'carol', 'bill'])
+    widget = ChosenWidget(None, 'absent worker', ['carol'], all_model)
+    other = ChosenWidget(None, 'absent worker', [], all_model)
+    changes = []
+    widget.chosen_changed.connect(lambda: changes.append(True))
+    available = widget.combo_box.model()
+    assert [available.index(row, 0).data() for row in range(available.rowCount())] == ['alice', 'bill', 'bob']
+
+    widget.add_chosen('bob')
+    widget.add_chosen('bob')
+    widget.add_chosen('dave') # Not a worker.
+    assert widget.read_chosen() == ['carol', 'bob']
+    assert [available.index(row, 0).data() for row in range(available.rowCount())] == ['alice', 'bill']
+    assert other.combo_box.model().rowCount() == 4
+
+    available.setFilterFixedString('B')
+    assert [available.index(row, 0).data() for row in range(available.rowCount())] == ['bill']
+    widget.remove_chosen('bob')
+    assert [available.index(row, 0).data() for row in range(available.rowCount())] == ['bill', 'bob']
+    assert widget.read_chosen() == ['carol']
+    assert len(changes) == 2
+
+
+def test_days_widget_lazy():
+    app = QApplication.instance() or QApplication([])
+    days_data = {day: {'time': 60, 'uaworkers': [], 'uarides': ['r1']} for day in ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']}
+    widget = DaysWidget(None, days_data, NameModel(None, ['r1', 'r2']), NameModel(None, ['w1']))
+    edited = []
+    widget.day_edited.connect(edited.append)
+    assert list(widget.day_widgets) == ['mon']
+    widget.show_day('wed')
+    assert list(widget.day_widgets) == ['mon', 'wed']
+    widget.day_widgets['wed'].absent_workers_widget.add_chosen('w1')
+    assert edited == ['wed']
+    days = widget.read_days()
+    assert days['wed'] == {'time': 60, 'uaworkers': ['w1'], 'uarides': ['r1']}
+    assert days['fri'] == days_data['fri'] and days['fri'] is not days_data['fri']
@@ -0,0 +1,52 @@
+import os
+import time
+import pytest
+pytest.importorskip("PySide6")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+from gui_solver import BackgroundSolver
+from pipeline import Roster
+
+
+def wait_until(app, condition, timeout=30.0):
+    end = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+
+
+def test_background_solver():
+    app = QApplication.instance() or QApplication([])
+    all_rides_time = {f'ride{i}': i % 5 + 1 for i in range(20)}
+    all_can_check = {f'worker{j}': {ride for i, ride in enumerate(all_rides_time) if i % 4 != j} for j in range(4)}
+    days_info = {day: {'time': 30, 'uaworkers': [], 'uarides': []} for day in ['mon', 'tue', 'wed']}
+    days_info['tue']['time'] = 0
+    solver = BackgroundSolver(None, Roster(all_rides_time, all_can_check, days_info), lambda: days_info, debounce_ms=10, processes=2)
+    solved, weeks, failed = [], [], []
+    solver.day_solved.connect(solved.append)
+    solver.week_ready.connect(weeks.append)
+    solver.day_failed.connect(lambda day, message: failed.append(day))
+    try:
+        solver.solve_now()
+        wait_until(app, lambda: weeks)
+        assert sorted(solved) == ['mon', 'wed'] and weeks[0]['tue'] == {}
+        # Only the edited day is solved again, once the edits stop.
+        solved.clear()
+        days_info['wed'] = {'time': 28, 'uaworkers': [], 'uarides': ['ride0']}
+        solver.edited()
+        solver.edited()
+        wait_until(app, lambda: len(weeks) == 2)
+        assert solved == ['wed'] and 'ride0' not in weeks[1]['wed']
+        # A cancelled run does not report a week.
+        days_info['mon'] = {'time': 1, 'uaworkers': [], 'uarides': []}
+        solver.solve_now()
+        solver.cancel()
+        wait_until(app, lambda: not solver.is_running())
+        assert len(weeks) == 2
+        solver.solve_now()
+        wait_until(app, lambda: failed)
+        assert failed == ['mon']
+        wait_until(app, lambda: not solver.is_running())
+    finally:
+        solver.shutdown()
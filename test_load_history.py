@@ -0,0 +1,38 @@
+from load_history import LoadHistory
+
+
+def test_load_history(tmp_path):
+    path = str(tmp_path / "load_history.yaml")
+    history = LoadHistory(path, window=2)
+    history.record('2026-W01', {'bob': 30, 'john': 10})
+    history.record('2026-W02', {'bob': 20, 'john': 20})
+    assert history.prior_loads() == {'bob': 50, 'john': 30}
+    # A second run in the same week replaces the first one.
+    history.record('2026-W02', {'bob': 10, 'john': 30})
+    assert LoadHistory(path, window=2).prior_loads() == {'bob': 40, 'john': 40}
+    assert history.prior_loads('2026-W02') == {'bob': 30, 'john': 10}
+    # The oldest week drops out of the window.
+    history = LoadHistory(path, window=2)
+    history.record('2026-W03', {'bob': 5, 'josh': 15})
+    assert LoadHistory(path, window=2).prior_loads() == {'bob': 15, 'john': 30, 'josh': 15}
+
+
+def test_load_history_zero_minutes(tmp_path):
+    # A worker whose rides all take 0 minutes has no total, a rerun in the same week still works.
+    history = LoadHistory(str(tmp_path / "load_history.yaml"))
+    history.record('2026-W42', {'bob': 10, 'zed': 0})
+    assert history.prior_loads('2026-W42') == {}
+    assert history.prior_loads() == {'bob': 10}
+
+
+def test_load_history_window(tmp_path):
+    path = str(tmp_path / "load_history.yaml")
+    history = LoadHistory(path, window=3)
+    for week, minutes in [('2026-W10', 10), ('2026-W12', 30), ('2026-W11', 20)]:
+        history.record(week, {'bob': minutes})
+    assert [entry['week'] for entry in history.entries] == ['2026-W10', '2026-W11', '2026-W12']
+    # A past week only counts the weeks before it, a smaller window only the last weeks.
+    assert history.prior_loads('2026-W11') == {'bob': 10}
+    assert LoadHistory(path, window=1).prior_loads() == {'bob': 30}
+    assert LoadHistory(path, window=2).prior_loads('2026-W13') == {'bob': 50}
+    assert LoadHistory(path, window=0).prior_loads() == {}
@@ -0,0 +1,23 @@
+from make_html_table import make_html_table, schedule_grid, worker_totals, history_sections
+
+
+def test_make_html_table(tmp_path):
+    rides_time = {'wooden': 20, 'metal': 10, 'red': 5}
+    multiple_day_assignments = {'mon': {'wooden': 'bob', 'metal': 'john', 'red': 'bob'}, 'tue': {'wooden': 'john'}}
+    assert schedule_grid(multiple_day_assignments, rides_time) == [('wooden', ['bob', 'john']), ('metal', ['john', '']), ('red', ['bob', ''])] # type: ignore
+    assert worker_totals(multiple_day_assignments, rides_time) == [('john', 2, 30), ('bob', 2, 25)] # type: ignore
+    html_path = str(tmp_path / "ridechecks.html")
+    make_html_table(multiple_day_assignments, rides_time, html_path) # type: ignore
+    with open(html_path) as f:
+        html = f.read()
+    assert "<td>red</td>" in html
+    assert "<td>john</td>\n                <td>2</td>\n                <td>30</td>" in html
+    assert "{'mon'" not in html # The assignments are not dumped as a dict.
+
+
+def test_history_sections():
+    rows = [('2026-10-05', 'wooden', 'mon', 'bob'), ('2026-10-05', 'wooden', 'wed', 'john'), ('2026-10-05', 'metal', 'mon', 'john'), ('2026-10-12', 'wooden', 'sun', 'bob')]
+    sections = [(heading, days, list(grid)) for heading, days, grid in history_sections(iter(rows))] # type: ignore
+    assert [heading for heading, _, _ in sections] == ['Week of 2026-10-05', 'Week of 2026-10-12']
+    assert sections[0][2] == [('wooden', ['bob', '', 'john', '', '', '', '']), ('metal', ['john', '', '', '', '', '', ''])]
+    assert sections[1][2] == [('wooden', ['', '', '', '', '', '', 'bob'])]
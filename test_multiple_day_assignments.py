@@ -1,6 +1,9 @@
 from typing import Dict
+import pytest
+from day_assignment import NoDayAssignment
 from multiple_day_assignments import generate_multiple_day_assignments, without_keys, Day, DayInfo 
 from test_day_assignment import is_valid_assignment
+from solve_stats import SolveStats
 
 
 def test_without_keys(): 
@@ -38,3 +41,33 @@ def test_generate_multiple_day_assignments():
     assert 'wed' in assignments
     assert is_valid_assignment(assignments['mon'], week_info['mon']['time'], without_keys(all_ride_times, week_info['mon']['uarides']), without_keys(all_can_check, week_info['mon']['uaworkers']))
     assert is_valid_assignment(assignments['wed'], week_info['wed']['time'], without_keys(all_ride_times, week_info['wed']['uarides']), without_keys(all_can_check, week_info['wed']['uaworkers']))
+
+
+def test_generate_multiple_day_assignments_processes():
+    week_info: Dict[Day, DayInfo] = {
+        day: {'time': 30, 'uaworkers': [], 'uarides': []} for day in ['sun', 'mon', 'tue', 'wed']  # type: ignore
+    }
+    all_ride_times = {f'ride{i}': i % 5 + 1 for i in range(20)}
+    all_can_check = {f'worker{j}': {ride for i, ride in enumerate(all_ride_times) if i % 4 != j} for j in range(4)}
+    sequential = generate_multiple_day_assignments(week_info, all_ride_times, all_can_check, processes=1, seed=3)
+    stats = SolveStats()
+    parallel = generate_multiple_day_assignments(week_info, all_ride_times, all_can_check, processes=2, seed=3, stats=stats)
+    assert sequential == parallel
+    assert list(parallel) == ['sun', 'mon', 'tue', 'wed']
+    # Stats come back from the worker processes.
+    assert list(stats.days) == ['sun', 'mon', 'tue', 'wed']
+    assert stats.nodes == sum(day_stats.nodes for day_stats in stats.days.values()) >= 4 * len(all_ride_times)
+
+
+def test_generate_multiple_day_assignments_reports_every_day():
+    week_info: Dict[Day, DayInfo] = {
+        'mon': {'time': 5, 'uaworkers': [], 'uarides': []},
+        'tue': {'time': 20, 'uaworkers': [], 'uarides': []},
+        'wed': {'time': 20, 'uaworkers': ['bob'], 'uarides': []},
+    }
+    all_ride_times = {'wooden': 10, 'fast': 5}
+    all_can_check = {'bob': {'wooden', 'fast'}, 'john': {'fast'}}
+    for processes in [1, 2]:
+        with pytest.raises(NoDayAssignment) as e:
+            generate_multiple_day_assignments(week_info, all_ride_times, all_can_check, processes=processes)
+        assert "'mon'" in str(e.value) and "'wed'" in str(e.value) and "'tue'" not in str(e.value)
@@ -0,0 +1,67 @@
+import os
+import pytest
+import yaml
+from pipeline import load_roster, read_input, run_pipeline, InputError
+import pipeline
+
+
+def write_input(directory, rides_time, workers_cannot_check, days_info):
+    os.makedirs(directory, exist_ok=True)
+    for name, data in [('rides_time.yaml', rides_time), ('workers_cannot_check.yaml', workers_cannot_check), ('days_info.yaml', days_info)]:
+        with open(os.path.join(directory, name), 'w') as f:
+            yaml.safe_dump(data, f)
+
+
+def test_load_roster(tmp_path):
+    input_directory = str(tmp_path / "input")
+    with pytest.raises(InputError):
+        load_roster(input_directory)
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'mon': {'time': 20, 'uaworkers': [], 'uarides': []}})
+    roster = load_roster(input_directory)
+    assert roster.all_workers_can_check == {'bob': {'wooden', 'fast'}, 'john': {'fast'}}
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'mon': {'time': 20, 'uaworkers': ['josh'], 'uarides': []}})
+    with pytest.raises(InputError) as e:
+        load_roster(input_directory)
+    assert "'josh'" in str(e.value)
+    # Only mon to sun can be scheduled (and archived).
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'Monday': {'time': 20, 'uaworkers': [], 'uarides': []}})
+    with pytest.raises(InputError) as e:
+        load_roster(input_directory)
+    assert "'Monday'" in str(e.value)
+
+
+def test_load_roster_snapshot(tmp_path, monkeypatch):
+    input_directory, snapshot_path = str(tmp_path / "input"), str(tmp_path / "cache" / "roster.pickle")
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'mon': {'time': 20, 'uaworkers': [], 'uarides': []}})
+    roster = load_roster(input_directory, snapshot_path)
+    assert os.path.exists(snapshot_path)
+    reads = []
+    monkeypatch.setattr(pipeline, 'read_input', lambda directory: reads.append(directory) or read_input(directory))
+    assert load_roster(input_directory, snapshot_path) == roster
+    days_info_path = os.path.join(input_directory, 'days_info.yaml')
+    os.utime(days_info_path, ns=(0, 0)) # Touched, but the same.
+    assert load_roster(input_directory, snapshot_path) == roster
+    assert reads == []
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'mon': {'time': 30, 'uaworkers': [], 'uarides': []}})
+    assert load_roster(input_directory, snapshot_path).days_info['mon']['time'] == 30
+    assert reads == [input_directory]
+    with open(snapshot_path, 'wb') as f:
+        f.write(b'corrupt')
+    assert load_roster(input_directory, snapshot_path).days_info['mon']['time'] == 30
+
+
+def test_run_pipeline(tmp_path):
+    input_directory, output_directory = str(tmp_path / "input"), str(tmp_path / "output")
+    write_input(input_directory, {'wooden': 10, 'fast': 5}, {'bob': [], 'john': ['wooden']}, {'mon': {'time': 20, 'uaworkers': [], 'uarides': []}})
+    roster = load_roster(input_directory)
+    with pytest.raises(InputError):
+        run_pipeline(roster, output_directory, cache_directory=None)
+    os.makedirs(output_directory)
+    result = run_pipeline(roster, output_directory, cache_directory=None, processes=1, seed=1)
+    assert result.multiple_day_assignments == {'mon': {'wooden': 'bob', 'fast': 'john'}}
+    with open(os.path.join(output_directory, "ridechecks.yaml")) as f:
+        assert yaml.safe_load(f) == result.multiple_day_assignments
+    assert os.path.exists(result.html_path)
+    repaired = run_pipeline(roster, output_directory, cache_directory=None, repair=True)
+    assert repaired.repairs is not None and repaired.repairs['mon'].changed == 0
+    assert run_pipeline(roster, output_directory, cache_directory=None, processes=1, seed=1, html=False).html_path is None
@@ -0,0 +1,55 @@
+import random
+import pytest
+from day_assignment import generate_day_assignment, load_spread, NoDayAssignment
+from portfolio import generate_day_assignment_portfolio
+from multiple_day_assignments import generate_single_day
+from test_day_assignment import is_valid_assignment
+from solve_stats import SolveStats
+
+
+def random_day(seed: int):
+    rng = random.Random(seed)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(60)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(8)}
+    return sum(ride_times.values()) // 6, ride_times, can_check
+
+
+def test_generate_day_assignment_portfolio():
+    worker_time, ride_times, can_check = random_day(0)
+    for processes in [1, 2]:
+        assignment = generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=4, processes=processes, seed=7)
+        assert len(assignment) == len(ride_times)
+        assert is_valid_assignment(assignment, worker_time, ride_times, can_check)
+    # Without early stopping the result only depends on the seed.
+    assert generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=4, processes=2, seed=7) == assignment
+
+
+def test_generate_day_assignment_portfolio_target_spread():
+    worker_time, ride_times, can_check = random_day(1)
+    single = generate_day_assignment(worker_time, ride_times, can_check, seed=1)
+    assignment = generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=50, processes=1, seed=1, target_spread=load_spread(single, ride_times, can_check))
+    assert load_spread(assignment, ride_times, can_check) <= load_spread(single, ride_times, can_check)
+
+
+def test_generate_day_assignment_portfolio_infeasible():
+    with pytest.raises(NoDayAssignment):
+        generate_day_assignment_portfolio(5, {'wooden': 10}, {'bob': {'wooden'}}, runs=3, processes=2)
+
+
+def test_generate_single_day_runs():
+    # The week solver makes the runs when asked for them in the solver options.
+    worker_time, ride_times, can_check = random_day(2)
+    assignment, stats = generate_single_day(worker_time, ride_times, can_check, 5, {'runs': 4}, collect_stats=True)
+    assert assignment == generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=4, processes=1, seed=5)
+    assert stats is not None and stats.nodes > 0
+
+
+def test_generate_day_assignment_portfolio_stats():
+    # The stats of runs made in worker processes are added up like those made in this one.
+    worker_time, ride_times, can_check = random_day(3)
+    in_process, on_pool = SolveStats(), SolveStats()
+    assignment = generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=4, processes=1, seed=2, stats=in_process)
+    generate_day_assignment_portfolio(worker_time, ride_times, can_check, runs=4, processes=2, seed=2, stats=on_pool)
+    assert in_process.nodes > 0 and (on_pool.nodes, on_pool.moves) == (in_process.nodes, in_process.moves)
+    assert in_process.spread == on_pool.spread == load_spread(assignment, ride_times, can_check)
+    assert set(on_pool.phases) == {'search', 'hillclimb'}
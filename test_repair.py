@@ -0,0 +1,48 @@
+import random
+import pytest
+from day_assignment import generate_day_assignment, NoDayAssignment
+from repair import repair_day_assignment, repair_multiple_day_assignments
+from test_day_assignment import is_valid_assignment
+
+
+def test_repair_day_assignment_absent_worker():
+    rng = random.Random(0)
+    ride_times = {f'ride{i}': rng.randint(5, 30) for i in range(80)}
+    can_check = {f'worker{j}': {ride for ride in ride_times if rng.random() < 0.7} for j in range(10)}
+    worker_time = sum(ride_times.values()) // 7
+    previous = generate_day_assignment(worker_time, ride_times, can_check, seed=1)
+    del can_check['worker0']
+    repaired = repair_day_assignment(previous, worker_time, ride_times, can_check, seed=1)
+    assert len(repaired.assignment) == len(ride_times)
+    assert is_valid_assignment(repaired.assignment, worker_time, ride_times, can_check)
+    lost = [ride for ride, worker in previous.items() if worker == 'worker0']
+    # Only the rides of the absent worker had to move.
+    assert repaired.changed == len(lost)
+    assert all(repaired.assignment[ride] == worker for ride, worker in previous.items() if worker != 'worker0')
+
+
+def test_repair_day_assignment_shorter_day():
+    ride_times = {'wooden': 10, 'scary': 4, 'slow': 4, 'fast': 2}
+    can_check = {'bob': set(ride_times), 'john': set(ride_times)}
+    previous = {'wooden': 'bob', 'scary': 'bob', 'slow': 'john', 'fast': 'john'}
+    repaired = repair_day_assignment(previous, 12, ride_times, can_check)
+    assert is_valid_assignment(repaired.assignment, 12, ride_times, can_check)
+    assert repaired.assignment['wooden'] == 'bob'
+    assert repaired.changed == 1
+
+
+def test_repair_multiple_day_assignments():
+    previous = {'mon': {'wooden': 'bob', 'fast': 'john'}}
+    days_info = {
+        'mon': {'time': 20, 'uaworkers': ['john'], 'uarides': []},
+        'tue': {'time': 20, 'uaworkers': [], 'uarides': ['wooden']},
+    }
+    all_ride_times = {'wooden': 10, 'fast': 5}
+    all_can_check = {'bob': {'wooden', 'fast'}, 'john': {'wooden', 'fast'}}
+    repairs = repair_multiple_day_assignments(previous, days_info, all_ride_times, all_can_check)  # type: ignore
+    assert repairs['mon'].assignment == {'wooden': 'bob', 'fast': 'bob'}
+    assert repairs['mon'].changed == 1
+    assert list(repairs['tue'].assignment) == ['fast']
+    days_info['mon']['time'] = 12
+    with pytest.raises(NoDayAssignment):
+        repair_multiple_day_assignments(previous, days_info, all_ride_times, all_can_check)  # type: ignore
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiple_day_assignments import generate_multiple_day_assignments
+from pipeline import Roster
+from service import ScheduleService
+import service
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_service():
+    all_rides_time = {f'ride{i}': i % 5 + 1 for i in range(20)}
+    all_can_check = {f'worker{j}': {ride for i, ride in enumerate(all_rides_time) if i % 4 != j} for j in range(4)}
+    days_info = {day: {'time': 30, 'uaworkers': [], 'uarides': []} for day in ['mon', 'tue', 'wed']}
+
+    async def run():
+        executor = ThreadPoolExecutor(2)
+        service = ScheduleService(Roster(all_rides_time, all_can_check, {day: dict(info) for day, info in days_info.items()}), executor, seed=3)
+        server = await service.serve('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        # Several clients at once share the solves.
+        responses = await asyncio.gather(*(request(port, 'GET', '/schedule') for _ in range(4)))
+        assert all(response == responses[0] for response in responses)
+        status, response = responses[0]
+        assert status == 200
+        assert response['schedule'] == generate_multiple_day_assignments(days_info, all_rides_time, all_can_check, seed=3, balance_weekly_totals=True)
+
+        status, response = await request(port, 'PATCH', '/days/wed', {'time': 20, 'uaworkers': {'add': ['worker0']}})
+        assert status == 200 and response['day_info'] == {'time': 20, 'uaworkers': ['worker0'], 'uarides': []}
+        status, response = await request(port, 'GET', '/days/wed/schedule')
+        assert status == 200 and 'worker0' not in response['assignment'].values()
+        status, response = await request(port, 'PATCH', '/days/wed', {'uaworkers': {'add': ['nobody']}})
+        assert status == 400 and "'nobody'" in response['error']
+        status, response = await request(port, 'PATCH', '/days/wed', {'time': 1})
+        assert status == 200
+        status, response = await request(port, 'GET', '/schedule')
+        assert status == 422 and "'wed'" in response['error']
+        assert (await request(port, 'GET', '/nowhere'))[0] == 404
+        server.close()
+        await server.wait_closed()
+        executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_service_edit_while_solving(monkeypatch):
+    all_rides_time = {f'ride{i}': i % 5 + 1 for i in range(20)}
+    all_can_check = {f'worker{j}': set(all_rides_time) for j in range(4)}
+    solve_day = service.solve_day
+
+    def slow_solve_day(*args):
+        time.sleep(0.2)
+        return solve_day(*args)
+
+    monkeypatch.setattr(service, 'solve_day', slow_solve_day)
+
+    async def run():
+        executor = ThreadPoolExecutor(2)
+        schedule_service = ScheduleService(Roster(all_rides_time, all_can_check, {'mon': {'time': 30, 'uaworkers': [], 'uarides': []}}), executor, seed=1)
+        # The week being solved keeps the days it started with, the next one sees the edit.
+        week = asyncio.ensure_future(schedule_service.schedule())
+        await asyncio.sleep(0.05)
+        schedule_service.edit_day('mon', {'uaworkers': {'add': ['worker0']}})
+        assert set((await week)['mon']) == set(all_rides_time)
+        assert 'worker0' not in (await schedule_service.schedule())['mon'].values()
+
+        # Unexpected errors are answered with a 500.
+        monkeypatch.setattr(service, 'solve_day', lambda *args: 1 / 0)
+        schedule_service.edit_day('mon', {'time': 40})
+        server = await schedule_service.serve('127.0.0.1', 0)
+        status, response = await request(server.sockets[0].getsockname()[1], 'GET', '/schedule')
+        assert status == 500 and 'ZeroDivisionError' in response['error']
+        server.close()
+        await server.wait_closed()
+        executor.shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+from startup_benchmark import run_startup_benchmark, COMMANDS
+
+
+def test_main_imports_lazily():
+    # Importing the entry point loads neither the solver nor a renderer, a run without HTML never loads jinja2.
+    code = "import main, sys; print(' '.join(sorted(name for name in ['pipeline', 'jinja2', 'numpy', 'multiprocessing'] if name in sys.modules)))"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip() == ""
+    code = "import pipeline, sys; print('jinja2' in sys.modules, 'numpy' in sys.modules, 'repair' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip() == "False False False"
+
+
+def test_run_startup_benchmark():
+    results = run_startup_benchmark(repeats=1)
+    assert set(results) == set(COMMANDS)
+    assert all(0 < seconds['cold'] and 0 < seconds['warm'] for seconds in results.values())
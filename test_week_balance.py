@@ -0,0 +1,46 @@
+from typing import Dict
+from multiple_day_assignments import Day, DayInfo, without_keys
+from week_balance import balance_week
+from test_day_assignment import is_valid_assignment
+
+
+def weekly_totals(week: Dict[Day, Dict[str, str]], ride_times: Dict[str, int], workers) -> Dict[str, int]:
+    totals = {worker: 0 for worker in workers}
+    for day_assignment in week.values():
+        for ride, worker in day_assignment.items():
+            totals[worker] += ride_times[ride]
+    return totals
+
+
+def test_balance_week():
+    week_info: Dict[Day, DayInfo] = {
+        'mon': {'time': 20, 'uaworkers': [], 'uarides': []},
+        'tue': {'time': 20, 'uaworkers': [], 'uarides': []},
+        'wed': {'time': 20, 'uaworkers': ['john'], 'uarides': []},
+    }
+    all_ride_times = {'wooden': 10, 'scary': 2, 'fast': 4}
+    all_can_check = {'bob': {'wooden', 'scary', 'fast'}, 'john': {'wooden', 'scary', 'fast'}}
+    # Every day on its own is as balanced as it gets, but bob checks wooden every day.
+    week = {
+        'mon': {'wooden': 'bob', 'scary': 'john', 'fast': 'john'},
+        'tue': {'wooden': 'bob', 'scary': 'john', 'fast': 'john'},
+        'wed': {'wooden': 'bob', 'scary': 'bob', 'fast': 'bob'},
+    }
+    balanced = balance_week(week, week_info, all_ride_times, all_can_check, seed=0)
+    for day, day_info in week_info.items():
+        assert balanced[day].keys() == week[day].keys()
+        assert is_valid_assignment(balanced[day], day_info['time'], all_ride_times, without_keys(all_can_check, day_info['uaworkers']))
+    assert balanced['wed'] == week['wed']
+    totals = weekly_totals(balanced, all_ride_times, all_can_check)
+    assert abs(totals['bob'] - totals['john']) < abs(40 - 12)
+    assert abs(totals['bob'] - totals['john']) <= 4
+
+
+def test_balance_week_prior_loads():
+    week_info: Dict[Day, DayInfo] = {'mon': {'time': 20, 'uaworkers': [], 'uarides': []}}
+    all_ride_times = {'wooden': 10, 'scary': 2, 'fast': 4}
+    all_can_check = {'bob': {'wooden', 'scary', 'fast'}, 'john': {'wooden', 'scary', 'fast'}}
+    week = {'mon': {'wooden': 'bob', 'scary': 'john', 'fast': 'john'}}
+    # bob checked 20 minutes more in past weeks, so john checks everything this week.
+    balanced = balance_week(week, week_info, all_ride_times, all_can_check, prior_loads={'bob': 20}, seed=0)
+    assert balanced['mon'] == {'wooden': 'john', 'scary': 'john', 'fast': 'john'}
@@ -0,0 +1,48 @@
+from typing import Dict
+from what_if import what_if, format_matrix
+from day_assignment import SearchTimeout
+import what_if as what_if_module
+from util import Day, DayInfo
+
+
+def test_what_if():
+    days_info: Dict[Day, DayInfo] = {
+        'mon': {'time': 20, 'uaworkers': [], 'uarides': []},
+        'tue': {'time': 0, 'uaworkers': [], 'uarides': []},
+        'wed': {'time': 12, 'uaworkers': ['josh'], 'uarides': ['fast']},
+    }
+    all_rides_time = {'wooden': 10, 'scary': 5, 'slow': 5, 'fast': 10}
+    all_can_check = {
+        'john': {'wooden', 'scary', 'slow'},
+        'bob': {'wooden', 'scary', 'slow', 'fast'},
+        'josh': {'fast'},
+    }
+    results = {(scenario.day, scenario.label()): outcome for scenario, outcome in what_if(days_info, all_rides_time, all_can_check, [-5, 5], seed=1)}
+    assert not any(day == 'tue' for day, _ in results)
+    assert results['mon', 'baseline'].feasible and results['mon', 'baseline'].slack == 10
+    assert results['mon', 'time -5'].feasible and results['mon', 'time -5'].slack == 5
+    assert results['mon', 'time +5'].slack == 15
+    # Only josh and bob can check fast, only john and bob the rest.
+    assert results['mon', 'absent bob'].feasible and results['mon', 'absent bob'].slack == 0
+    assert results['mon', 'absent josh'].feasible
+    assert not results['wed', 'absent john'].feasible and "'wooden'" in results['wed', 'absent john'].reason
+    assert not results['wed', 'time -5'].feasible
+    assert results['wed', 'closed wooden'].feasible
+    assert ('wed', 'absent josh') not in results
+    matrix = format_matrix(what_if(days_info, all_rides_time, all_can_check, [-5, 5], seed=1)).splitlines()
+    assert matrix[0].split() == ['mon', 'wed']
+    assert matrix[1].split() == ['baseline', '10', '2']
+
+
+def test_what_if_time_limit(monkeypatch):
+    # A scenario whose search runs out of time is unknown, the sweep goes on.
+    def timeout(*args, **kwargs):
+        raise SearchTimeout()
+
+    monkeypatch.setattr(what_if_module, 'generate_day_assignment', timeout)
+    days_info: Dict[Day, DayInfo] = {'mon': {'time': 20, 'uaworkers': [], 'uarides': []}}
+    results = what_if(days_info, {'wooden': 10, 'scary': 5}, {'john': {'wooden', 'scary'}, 'bob': {'scary'}}, time_limit=0.1)
+    outcomes = {scenario.label(): outcome for scenario, outcome in results}
+    assert outcomes['baseline'].feasible is None and '0.1s' in outcomes['baseline'].reason
+    assert outcomes['absent john'].feasible is False # Ruled out by the feasibility check, without a search.
+    assert format_matrix(results).splitlines()[1].split() == ['baseline', '?']
@@ -1,6 +1,24 @@
 from typing import Dict, List, Tuple, Set, Iterable, Callable, Collection, Any, Literal
 from datetime import datetime
 import calendar
+import hashlib
+import yaml
+
+# libyaml's C loader and dumper are many times faster than the pure Python ones, PyYAML built without libyaml falls back to those.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+def load_yaml(stream: Any) -> Any:
+    """
+    yaml.safe_load, with libyaml when available.
+    """
+    return yaml.load(stream, Loader=YAML_LOADER)
+
+def dump_yaml(data: Any, stream: Any) -> None:
+    """
+    yaml.safe_dump keeping the order of dicts, with libyaml when available.
+    """
+    yaml.dump(data, stream, Dumper=YAML_DUMPER, sort_keys=False)
 
 def without_keys[T](d: Dict[T, Any], keys_to_exclude: Collection[T]) -> Dict[T, Any]:
     return {k: v for k, v in d.items() if k not in keys_to_exclude}
@@ -10,6 +28,16 @@ def is_list_of_strings(l: Any):
         return False
     return all(map(lambda x: isinstance(x, str), l))
 
+def derive_seed(seed: int | None, *keys: Any) -> int | None:
+    """
+    Derive an independent seed for a sub-problem (a day, a run...) from a base seed, None stays None.
+    Stable across processes and Python versions, unlike hash().
+    """
+    if seed is None:
+        return None
+    digest = hashlib.sha256(repr((seed, *keys)).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
 def timestamp_string():
     now = datetime.now()
     months = calendar.month_abbr
@@ -17,3 +45,13 @@ def timestamp_string():
     return timestamp
 
 Day = Literal['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+DayInfoKey = Literal['time', 'uaworkers', 'uarides']
+DayInfo = Dict[DayInfoKey, Any]
+
+def day_problem(day_info: DayInfo, all_rides_time: Dict[str, int], all_workers_can_check: Dict[str, Set[str]]) -> Tuple[int, Dict[str, int], Dict[str, Set[str]]]:
+    """
+    Filter out the unavailable rides and workers of the day.
+    Returns worker_time, rides_time and workers_can_check for generate_day_assignment.
+    """
+    return day_info['time'], without_keys(all_rides_time, day_info['uarides']), without_keys(all_workers_can_check, day_info['uaworkers'])
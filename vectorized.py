@@ -0,0 +1,105 @@
+from typing import Tuple
+from day_model import DayModel
+from solve_stats import SolveStats
+
+# Swaps are only scored between this many most loaded and this many least loaded workers.
+SWAP_WORKERS = 8
+
+
+def vectorized_improve(model: DayModel, swaps: bool = True, stats: SolveStats | None = None) -> int:
+    """
+    Improve a complete assignment by best-improvement local search scored with NumPy,
+    and leave the local optimum in model. Returns the number of moves, which are also added to stats.moves.
+
+    Eligibility is a rides x workers boolean matrix and the remaining times are a vector.
+    Every step scores the best legal transfer of every ride to another worker at once and applies the best one,
+    once no transfer improves, the legal swaps of two rides between two workers are scored the same way.
+    Swaps are only scored between one of the SWAP_WORKERS most loaded and one of the SWAP_WORKERS least loaded
+    workers, every pair of them as a (rides of one) x (rides of the other) matrix, so a step takes time and memory
+    in the square of the rides per worker rather than of all rides. With up to SWAP_WORKERS workers every pair is scored.
+    Moves are scored by the change in the sum of squared worker loads, like in annealing.anneal:
+    a transfer of a ride of time d from a worker with T time remaining to one with A remaining changes it
+    by 2d(d - (A - T)), so the improving transfers are the ones hillclimb makes (0 < d < A - T).
+
+    Unlike hillclimb this is deterministic, the randomness comes from the dfs that found the assignment.
+    Raises ImportError if numpy is not installed.
+    """
+    try:
+        import numpy as np # Optional and slow to import, so only imported when improve='vectorized' is used.
+    except ImportError:
+        raise ImportError("improve='vectorized' needs numpy, install it with 'pip install numpy'")
+    ride_count = len(model.rides)
+    worker_count = len(model.workers)
+    if ride_count == 0 or worker_count < 2:
+        return 0
+    eligible = np.zeros((ride_count, worker_count), dtype=bool)
+    for ride_id, workers in enumerate(model.eligible):
+        eligible[ride_id, workers] = True
+    ride_time = np.array(model.ride_time, dtype=np.int64)
+    assignment = np.array(model.assignment, dtype=np.int64)
+    remaining = np.array(model.remaining, dtype=np.int64)
+
+    # An improving move never needs more time than the accepting worker has (d < A - T <= A),
+    # so only eligibility is masked.
+
+    def best_transfer() -> Tuple[int, int] | None:
+        # The more time the accepting worker has, the better the transfer, so the best transfer of a ride is to the
+        # eligible worker with the most time left: the first eligible one with workers ordered by remaining time.
+        # For a ride whose own worker is that one no transfer improves, its score is positive.
+        order = np.argsort(-remaining, kind='stable')
+        receiver = order[eligible[:, order].argmax(axis=1)]
+        score = ride_time * (ride_time + remaining[assignment] - remaining[receiver])
+        best = int(np.argmin(score))
+        if score[best] >= 0:
+            return None
+        return best, int(receiver[best])
+
+    def best_swap() -> Tuple[int, int] | None:
+        # ride goes to the worker of other_ride and other_ride to the worker of ride.
+        order = np.argsort(remaining, kind='stable')
+        loaded, unloaded = order[:SWAP_WORKERS].tolist(), order[::-1][:SWAP_WORKERS].tolist()
+        rides_of = {worker_id: np.flatnonzero(assignment == worker_id) for worker_id in set(loaded) | set(unloaded)}
+        best_score, best = 0, None
+        for worker_id in loaded:
+            for other_worker in unloaded:
+                if remaining[other_worker] <= remaining[worker_id]: # Only a worker with more time left can take on more.
+                    continue
+                rides = rides_of[worker_id][eligible[rides_of[worker_id], other_worker]]
+                other_rides = rides_of[other_worker][eligible[rides_of[other_worker], worker_id]]
+                if len(rides) == 0 or len(other_rides) == 0:
+                    continue
+                time_difference = ride_time[rides][:, None] - ride_time[other_rides][None, :] # [ride, other_ride]
+                score = time_difference * (time_difference + remaining[worker_id] - remaining[other_worker])
+                index = int(np.argmin(score))
+                if score.flat[index] < best_score:
+                    best_score = score.flat[index]
+                    best = int(rides[index // len(other_rides)]), int(other_rides[index % len(other_rides)])
+        return best
+
+    def move(ride_id: int, worker_id: int) -> None:
+        remaining[assignment[ride_id]] += ride_time[ride_id]
+        remaining[worker_id] -= ride_time[ride_id]
+        assignment[ride_id] = worker_id
+
+    moves = 0
+    while True: # Until local optimum.
+        transfer = best_transfer()
+        if transfer is not None:
+            move(*transfer)
+            moves += 1
+            continue
+        swap = best_swap() if swaps else None
+        if swap is None:
+            break
+        ride_id, other_ride = swap
+        worker_id, other_worker = int(assignment[ride_id]), int(assignment[other_ride])
+        move(ride_id, other_worker)
+        move(other_ride, worker_id)
+        moves += 1
+
+    for ride_id, worker_id in enumerate(assignment.tolist()):
+        if model.assignment[ride_id] != worker_id:
+            model.transfer(ride_id, worker_id)
+    if stats is not None:
+        stats.moves += moves
+    return moves
@@ -0,0 +1,107 @@
+from typing import Dict, List, Tuple, Set
+from day_model import DayModel
+from util import day_problem, Day, DayInfo
+from solve_stats import SolveStats
+import bisect
+import random
+
+
+def balance_week(
+        multiple_day_assignments: Dict[Day, Dict[str, str]],
+        days_info: Dict[Day, DayInfo],
+        all_rides_time: Dict[str, int],
+        all_workers_can_check: Dict[str, Set[str]],
+        prior_loads: Dict[str, int] | None = None,
+        seed: int | None = None,
+        stats: SolveStats | None = None) -> Dict[Day, Dict[str, str]]:
+    """
+    Balance the total ride check time of every worker over the whole week, instead of every day on its own.
+
+    A ride moves to another worker on the same day if the worker is present, can check it and
+    has the time left that day, and the move narrows the gap between the weekly totals of
+    the two workers: 0 < ride time < giving worker total - accepting worker total.
+    Moves are made until none is left (a local optimum), the most loaded workers give first.
+
+    Weekly totals are kept per worker, together with the rides of every worker and the
+    workers sorted by weekly total, all updated in place after every move. Every day keeps
+    its own DayModel for the time left and who can check what.
+
+    prior_loads {worker: minutes...} are added to the weekly totals, so that workers who
+    checked more than others in past weeks get less this week (see load_history).
+    With stats, the transfers are added to stats.moves.
+    """
+    rng = random.Random(seed)
+    workers = list(all_workers_can_check)
+    week_ids = {worker: week_id for week_id, worker in enumerate(workers)}
+    weekly = [(prior_loads or {}).get(worker, 0) for worker in workers]
+    models: List[DayModel] = []
+    day_ids: List[Dict[int, int]] = [] # For every model, week id of a present worker -> worker id in the model.
+    rides_of: List[Set[Tuple[int, int]]] = [set() for _ in workers] # (model index, ride id)
+    days = [day for day, day_assignment in multiple_day_assignments.items() if day_assignment]
+    for day in days:
+        model = DayModel(*day_problem(days_info[day], all_rides_time, all_workers_can_check))
+        for ride_id, ride in enumerate(model.rides):
+            worker_id = model.worker_ids[multiple_day_assignments[day][ride]]
+            model.assign(ride_id, worker_id)
+            week_id = week_ids[model.workers[worker_id]]
+            weekly[week_id] += model.ride_time[ride_id]
+            rides_of[week_id].add((len(models), ride_id))
+        day_ids.append({week_ids[worker]: worker_id for worker_id, worker in enumerate(model.workers)})
+        models.append(model)
+    by_weekly = sorted((total, week_id) for week_id, total in enumerate(weekly))
+
+    def accepting_worker(model_index: int, ride_id: int, giving_worker: int) -> int | None:
+        """
+        The most loaded worker (closest fit) that is present, can take the ride and should take it from giving_worker.
+        """
+        model = models[model_index]
+        limit = weekly[giving_worker] - model.ride_time[ride_id]
+        for i in reversed(range(bisect.bisect_left(by_weekly, (limit, -1)))):
+            week_id = by_weekly[i][1]
+            worker_id = day_ids[model_index].get(week_id)
+            if worker_id is not None and model.can_take(ride_id, worker_id):
+                return week_id
+        return None
+
+    def transfer(model_index: int, ride_id: int, giving_worker: int, accepting_worker: int) -> None:
+        for week_id in (giving_worker, accepting_worker):
+            del by_weekly[bisect.bisect_left(by_weekly, (weekly[week_id], week_id))]
+        model = models[model_index]
+        model.transfer(ride_id, day_ids[model_index][accepting_worker])
+        weekly[giving_worker] -= model.ride_time[ride_id]
+        weekly[accepting_worker] += model.ride_time[ride_id]
+        rides_of[giving_worker].remove((model_index, ride_id))
+        rides_of[accepting_worker].add((model_index, ride_id))
+        for week_id in (giving_worker, accepting_worker):
+            bisect.insort(by_weekly, (weekly[week_id], week_id))
+
+    transfers = 0
+    transferred = True
+    while transferred:
+        transferred = False
+        for _, giving_worker in reversed(list(by_weekly)):
+            rides_to_transfer = sorted(rides_of[giving_worker])
+            rng.shuffle(rides_to_transfer)
+            for model_index, ride_id in rides_to_transfer:
+                if models[model_index].ride_time[ride_id] > 0 and (week_id := accepting_worker(model_index, ride_id, giving_worker)) is not None:
+                    transfer(model_index, ride_id, giving_worker, week_id)
+                    transfers += 1
+                    transferred = True
+    if stats is not None:
+        stats.moves += transfers
+
+    balanced = dict(multiple_day_assignments)
+    for day, model in zip(days, models):
+        balanced[day] = model.to_dict()
+    return balanced
+
+
+def weekly_loads(multiple_day_assignments: Dict[Day, Dict[str, str]], all_rides_time: Dict[str, int]) -> Dict[str, int]:
+    """
+    Total ride check minutes of every worker with at least one ride in the week.
+    """
+    loads: Dict[str, int] = {}
+    for day_assignment in multiple_day_assignments.values():
+        for ride, worker in day_assignment.items():
+            loads[worker] = loads.get(worker, 0) + all_rides_time[ride]
+    return loads
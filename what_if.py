@@ -0,0 +1,214 @@
+# What-if sweep: which single absence, closure or change of time would make a day impossible, and how much slack every day has.
+# For example: python what_if.py --time-deltas 15 30
+
+from typing import Dict, List, Tuple, Set, Iterable, Any
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from day_assignment import generate_day_assignment, NoDayAssignment, SearchTimeout
+from feasibility import check_day_feasibility
+from util import without_keys, derive_seed, day_problem, Day, DayInfo
+from pipeline import load_roster, InputError
+import argparse
+import json
+import os
+
+
+@dataclass
+class Scenario:
+    """
+    One change to one day: 'baseline' (no change), 'absent' (subject is a worker),
+    'closed' (subject is a ride) or 'time' (subject is the minutes added to the day's time).
+    """
+    day: Day
+    change: str
+    subject: str | int | None = None
+
+    def label(self) -> str:
+        if self.change == 'baseline':
+            return 'baseline'
+        if self.change == 'time':
+            return f"time {self.subject:+d}"
+        return f"{self.change} {self.subject}"
+
+
+@dataclass
+class Outcome:
+    feasible: bool | None # None if the search ran out of time, it is not known.
+    slack: int | None = None # Minutes every worker still has left in the assignment found, worker_time - max load.
+    reason: str = '' # Why the day has no assignment (or why it is not known), empty if the search ruled it out.
+    solved: bool = False # False if the outcome follows from the baseline of the day without a search.
+
+
+def max_load(assignment: Dict[str, str], rides_time: Dict[str, int], without_ride: str | None = None) -> int:
+    loads: Dict[str, int] = {}
+    for ride, worker in assignment.items():
+        if ride != without_ride:
+            loads[worker] = loads.get(worker, 0) + rides_time[ride]
+    return max(loads.values(), default=0)
+
+
+def solve_scenario(
+        worker_time: int,
+        rides_time: Dict[str, int],
+        workers_can_check: Dict[str, Set[str]],
+        seed: int | None,
+        solver_options: Dict[str, Any],
+        time_limit: float | None = None) -> Tuple[Outcome, Dict[str, str]]:
+    """
+    Feasibility check, then a solve if needed, of at most time_limit seconds of search.
+    Module level so that it can be sent to a worker process.
+    """
+    if (infeasibility := check_day_feasibility(worker_time, rides_time, workers_can_check)) is not None:
+        return Outcome(False, reason=infeasibility.message(), solved=True), {}
+    try:
+        assignment = generate_day_assignment(worker_time, rides_time, workers_can_check, seed=seed, search_time_limit=time_limit, **solver_options)
+    except NoDayAssignment:
+        return Outcome(False, solved=True), {}
+    except SearchTimeout:
+        return Outcome(None, reason=f"no assignment found within {time_limit:g}s", solved=True), {}
+    return Outcome(True, worker_time - max_load(assignment, rides_time), solved=True), assignment
+
+
+def day_scenarios(day: Day, day_info: DayInfo, all_rides_time: Dict[str, int], all_workers_can_check: Dict[str, Set[str]], time_deltas: Iterable[int]) -> List[Scenario]:
+    """
+    Every single change to an open day: each time delta, each present worker absent, each open ride closed.
+    """
+    if day_info['time'] == 0:
+        return []
+    scenarios = [Scenario(day, 'baseline')]
+    scenarios += [Scenario(day, 'time', delta) for delta in time_deltas if day_info['time'] + delta > 0]
+    scenarios += [Scenario(day, 'absent', worker) for worker in all_workers_can_check if worker not in day_info['uaworkers']]
+    scenarios += [Scenario(day, 'closed', ride) for ride in all_rides_time if ride not in day_info['uarides']]
+    return scenarios
+
+
+def what_if(
+        days_info: Dict[Day, DayInfo],
+        all_rides_time: Dict[str, int],
+        all_workers_can_check: Dict[str, Set[str]],
+        time_deltas: Iterable[int] = (-30, 30),
+        processes: int | None = 1,
+        seed: int | None = None,
+        time_limit: float | None = 10.0,
+        **solver_options: Any) -> List[Tuple[Scenario, Outcome]]:
+    """
+    Evaluate every single change of day_scenarios for every day of days_info, in that order.
+
+    The baselines are solved first, then their problems and assignments are shared with
+    the other scenarios of the day. Outcomes that follow from the baseline are not searched:
+    - Closing a ride or adding time keeps the baseline assignment valid (slack is at least its slack).
+    - Removing time up to the baseline slack keeps it valid too.
+    - If the baseline is infeasible, so is every absence and every shorter day.
+    - An absent worker with no rides in the baseline assignment changes nothing.
+    Every other scenario gets a feasibility check and, if that does not rule it out, a solve.
+    A solve that searches for more than time_limit seconds gives up, its outcome is unknown (feasible is None),
+    so one nearly impossible scenario cannot stall the sweep. Nothing is derived from an unknown baseline.
+    With processes other than 1 they run on a pool of that many worker processes (None: one per core).
+    solver_options are passed on to generate_day_assignment.
+    """
+    scenarios = [scenario for day, day_info in days_info.items() for scenario in day_scenarios(day, day_info, all_rides_time, all_workers_can_check, time_deltas)]
+    problems = {day: day_problem(day_info, all_rides_time, all_workers_can_check) for day, day_info in days_info.items()}
+
+    def scenario_problem(scenario: Scenario) -> Tuple[int, Dict[str, int], Dict[str, Set[str]]]:
+        worker_time, rides_time, workers_can_check = problems[scenario.day]
+        if scenario.change == 'time':
+            return worker_time + scenario.subject, rides_time, workers_can_check # type: ignore
+        if scenario.change == 'absent':
+            return worker_time, rides_time, without_keys(workers_can_check, [scenario.subject])
+        if scenario.change == 'closed':
+            return worker_time, without_keys(rides_time, [scenario.subject]), workers_can_check
+        return worker_time, rides_time, workers_can_check
+
+    def solve_all(to_solve: List[Scenario]) -> List[Tuple[Outcome, Dict[str, str]]]:
+        arguments = [(*scenario_problem(scenario), derive_seed(seed, scenario.day, scenario.change, scenario.subject), solver_options, time_limit) for scenario in to_solve]
+        if processes == 1 or len(to_solve) <= 1:
+            return [solve_scenario(*scenario_arguments) for scenario_arguments in arguments]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunksize = max(1, len(arguments) // (4 * (processes or os.cpu_count() or 1))) # Scenarios are small, send them in batches.
+            return list(executor.map(solve_scenario, *zip(*arguments), chunksize=chunksize))
+
+    outcomes: Dict[int, Outcome] = {}
+    baselines = [scenario for scenario in scenarios if scenario.change == 'baseline']
+    baseline_results = dict(zip((scenario.day for scenario in baselines), solve_all(baselines)))
+
+    def derived_outcome(scenario: Scenario) -> Outcome | None:
+        baseline, assignment = baseline_results[scenario.day]
+        worker_time, rides_time, _ = problems[scenario.day]
+        if scenario.change == 'baseline':
+            return baseline
+        if baseline.feasible is None:
+            return None
+        if not baseline.feasible:
+            if scenario.change == 'absent' or (scenario.change == 'time' and scenario.subject < 0): # type: ignore
+                return Outcome(False, reason=baseline.reason)
+            return None
+        assert baseline.slack is not None
+        if scenario.change == 'closed':
+            return Outcome(True, worker_time - max_load(assignment, rides_time, scenario.subject)) # type: ignore
+        if scenario.change == 'time' and -scenario.subject <= baseline.slack: # type: ignore
+            return Outcome(True, baseline.slack + scenario.subject) # type: ignore
+        if scenario.change == 'absent' and scenario.subject not in assignment.values():
+            return baseline
+        return None
+
+    to_solve: List[int] = []
+    for index, scenario in enumerate(scenarios):
+        if (outcome := derived_outcome(scenario)) is not None:
+            outcomes[index] = outcome
+        else:
+            to_solve.append(index)
+    for index, (outcome, _) in zip(to_solve, solve_all([scenarios[index] for index in to_solve])):
+        outcomes[index] = outcome
+    return [(scenario, outcomes[index]) for index, scenario in enumerate(scenarios)]
+
+
+def format_matrix(results: List[Tuple[Scenario, Outcome]]) -> str:
+    """
+    One row per scenario, one column per day. A cell is the slack in minutes,
+    X if the day has no assignment, ? if that is not known, and empty if the scenario does not apply to the day.
+    """
+    days: List[Day] = []
+    labels: List[str] = []
+    cells: Dict[Tuple[str, Day], str] = {}
+    for scenario, outcome in results:
+        if scenario.day not in days:
+            days.append(scenario.day)
+        if scenario.label() not in labels:
+            labels.append(scenario.label())
+        cells[scenario.label(), scenario.day] = str(outcome.slack) if outcome.feasible else '?' if outcome.feasible is None else 'X'
+    width = max((len(label) for label in labels), default=0)
+    lines = [" " * width + "".join(f"{day:>6}" for day in days)]
+    for label in labels:
+        lines.append(f"{label:<{width}}" + "".join(f"{cells.get((label, day), ''):>6}" for day in days))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every single absence, ride closure and change of time for the days in the input folder.")
+    parser.add_argument("--time-deltas", type=int, nargs="*", default=[30], help="Minutes added to and removed from the time of every day (default: 30).")
+    parser.add_argument("--processes", type=int, default=None, help="Number of scenarios solved at the same time (default: one per core).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible results.")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="Seconds of search after which a scenario is reported as unknown (default: 10).")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario instead of the matrix.")
+    args = parser.parse_args()
+
+    try:
+        roster = load_roster("input")
+    except InputError as e:
+        print(f"{e}.")
+        return
+    all_rides_time, all_workers_can_check, days_info = roster.all_rides_time, roster.all_workers_can_check, roster.days_info
+    time_deltas = sorted({sign * delta for delta in args.time_deltas for sign in (-1, 1) if delta != 0})
+    results = what_if(days_info, all_rides_time, all_workers_can_check, time_deltas, processes=args.processes, seed=args.seed, time_limit=args.time_limit)
+    if args.json:
+        for scenario, outcome in results:
+            print(json.dumps({'day': scenario.day, 'scenario': scenario.label(), 'feasible': outcome.feasible, 'slack': outcome.slack, 'reason': outcome.reason}))
+    else:
+        print(format_matrix(results))
+        for scenario, outcome in results:
+            if outcome.reason and outcome.solved:
+                print(f"{scenario.day}, {scenario.label()}: {outcome.reason}")
+
+
+if __name__ == "__main__":
+    main()